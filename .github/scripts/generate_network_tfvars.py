@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 import os
 import sys
-import yaml
 import json
+from pathlib import Path
+
+# Shared YAML loader/cache lives in the repository's scripts directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from config_cache import load_yaml
 
 def get_yaml(file_path, key):
     try:
-        with open(file_path, 'r') as f:
-            data = yaml.safe_load(f)
+        data = load_yaml(file_path)
         for part in key.split('.'):
             data = data.get(part)
             if data is None:
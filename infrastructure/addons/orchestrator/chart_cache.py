@@ -0,0 +1,176 @@
+"""
+Local Helm chart cache for the Kubernetes Add-ons Plugin Manager.
+
+Chart archives fetched with ``helm pull`` are kept as .tgz files in one
+directory, with an index.json keyed by repository, chart and version. A
+pinned chart version never changes, so once it is cached installs use the
+local archive and need no access to the chart repository at all, which is
+what lets air-gapped clusters be installed from a pre-warmed cache.
+
+Install scripts resolve a chart through the command line:
+
+    python3 chart_cache.py <cache_dir> <repository> <chart> <version>
+
+prints the path of the cached archive, pulling it first on a cache miss.
+Only the standard library is used, so scripts can run it with any python3.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+INDEX_VERSION = 1
+
+
+class ChartCacheError(Exception):
+    """A chart could not be pulled into the cache"""
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """Directory of pulled chart archives; safe to use from worker threads and concurrent processes"""
+
+    def __init__(self, cache_dir: Path, helm: str = 'helm'):
+        self.cache_dir = Path(cache_dir)
+        self.index_file = self.cache_dir / 'index.json'
+        self.helm = helm
+        self._lock = threading.Lock()
+        self._pull_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def key(repository: str, chart: str, version: str) -> str:
+        return f"{repository.rstrip('/')}|{chart}|{version}"
+
+    def archive_path(self, repository: str, chart: str, version: str) -> Path:
+        """Where a chart version is stored: one subdirectory per repository"""
+        repo_dir = hashlib.sha1(repository.rstrip('/').encode()).hexdigest()[:12]
+        return self.cache_dir / repo_dir / f"{chart}-{version}.tgz"
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get('charts', {}) if data.get('version') == INDEX_VERSION else {}
+
+    def _record(self, key: str, entry: Dict) -> None:
+        # Re-read under a file lock so entries written by other processes are kept
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.cache_dir / '.index.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            charts = self._read_index()
+            charts[key] = entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.index-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'charts': charts}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_file)
+
+    def entries(self) -> Dict[str, Dict]:
+        """Index entries of every cached chart, by key"""
+        return self._read_index()
+
+    def lookup(self, repository: str, chart: str, version: str) -> Optional[Path]:
+        """Path of the cached archive, or None if it is missing or does not match its recorded checksum"""
+        path = self.archive_path(repository, chart, version)
+        if not path.is_file():
+            return None
+        key = self.key(repository, chart, version)
+        entry = self._read_index().get(key)
+        if entry is None:
+            # Archive copied in without the index (e.g. a hand-carried cache): adopt it
+            self._record(key, self._entry(repository, chart, version, path))
+            return path
+        if entry.get('size') != path.stat().st_size or entry.get('sha256') != file_sha256(path):
+            return None
+        return path
+
+    def _entry(self, repository: str, chart: str, version: str, path: Path) -> Dict:
+        return {
+            'repository': repository,
+            'chart': chart,
+            'version': version,
+            'file': str(path.relative_to(self.cache_dir)),
+            'size': path.stat().st_size,
+            'sha256': file_sha256(path),
+            'pulled_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+    def pull(self, repository: str, chart: str, version: str, env: Optional[Dict[str, str]] = None,
+             timeout: float = 300) -> Path:
+        """helm pull one chart version into the cache, replacing any cached copy"""
+        path = self.archive_path(repository, chart, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if repository.startswith('oci://'):
+            command = [self.helm, 'pull', f"{repository.rstrip('/')}/{chart}", '--version', version]
+        else:
+            command = [self.helm, 'pull', chart, '--repo', repository, '--version', version]
+
+        tmp_dir = tempfile.mkdtemp(dir=path.parent, prefix='.pull-')
+        try:
+            try:
+                completed = subprocess.run(command + ['--destination', tmp_dir], env=env, text=True,
+                                           capture_output=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise ChartCacheError(f"helm pull {chart} {version} from {repository} timed out after {timeout}s")
+            if completed.returncode != 0:
+                raise ChartCacheError(f"helm pull {chart} {version} from {repository} failed: "
+                                      f"{(completed.stderr or completed.stdout).strip()}")
+            archives = list(Path(tmp_dir).glob('*.tgz'))
+            if len(archives) != 1:
+                raise ChartCacheError(f"helm pull {chart} {version} produced {len(archives)} archives")
+            os.replace(archives[0], path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._record(self.key(repository, chart, version), self._entry(repository, chart, version, path))
+        return path
+
+    def ensure(self, repository: str, chart: str, version: str, env: Optional[Dict[str, str]] = None,
+               timeout: float = 300) -> Tuple[Path, bool]:
+        """Cached archive of a chart version, pulling it on a miss; also returns whether it was pulled"""
+        key = self.key(repository, chart, version)
+        with self._lock:
+            pull_lock = self._pull_locks.setdefault(key, threading.Lock())
+        # Concurrent requests for the same chart wait for one pull instead of each pulling it
+        with pull_lock:
+            path = self.lookup(repository, chart, version)
+            if path is not None:
+                return path, False
+            return self.pull(repository, chart, version, env, timeout), True
+
+
+def main(argv) -> int:
+    if len(argv) != 5:
+        print(f"usage: {argv[0]} <cache_dir> <repository> <chart> <version>", file=sys.stderr)
+        return 2
+    cache_dir, repository, chart, version = argv[1:]
+    try:
+        path, pulled = ChartCache(Path(cache_dir)).ensure(repository, chart, version)
+    except (ChartCacheError, OSError) as e:
+        print(f"chart cache: {e}", file=sys.stderr)
+        return 1
+    if pulled:
+        print(f"chart cache: pulled {chart} {version} from {repository}", file=sys.stderr)
+    print(path.resolve())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,6 +1,8 @@
 #!/bin/bash
 # Common utility functions for Kubernetes add-ons plugins
 
+ORCHESTRATOR_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
 # Colors for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -168,6 +170,29 @@ add_helm_repo() {
     fi
 }
 
+# Resolve the chart to install into HELM_CHART
+# With a chart cache (CHART_CACHE_DIR, set by the plugin manager) a pinned
+# version is installed from the cached archive, pulled once on a miss, and
+# the repository is never added; otherwise the repository is added as usual.
+resolve_helm_chart() {
+    local repo_name="$1"
+    local repo_url="$2"
+    local chart_name="$3"
+    local version="${4:-}"
+    
+    if [[ -n "${CHART_CACHE_DIR:-}" && -n "$version" ]]; then
+        if HELM_CHART="$(python3 "$ORCHESTRATOR_DIR/chart_cache.py" "$CHART_CACHE_DIR" "$repo_url" "$chart_name" "$version")"; then
+            log_success "Using cached chart $HELM_CHART"
+            return 0
+        fi
+        log_warning "Chart cache unavailable, installing $chart_name from $repo_url"
+    fi
+    
+    add_helm_repo "$repo_name" "$repo_url" || return 1
+    HELM_CHART="$repo_name/$chart_name"
+    return 0
+}
+
 # Install or upgrade Helm chart
 helm_install_or_upgrade() {
     local release_name="$1"
@@ -266,7 +291,7 @@ validate_yaml() {
     fi
 }
 
-# Process template variables in file
+# Process template variables (${VAR} and ${VAR:-default}) in file
 process_template() {
     local input_file="$1"
     local output_file="$2"
@@ -278,7 +303,7 @@ process_template() {
         return 1
     fi
     
-    if envsubst < "$input_file" > "$output_file"; then
+    if python3 "$ORCHESTRATOR_DIR/values_template.py" "$input_file" "$output_file"; then
         log_success "Template processed successfully"
         return 0
     else
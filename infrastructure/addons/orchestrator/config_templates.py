@@ -0,0 +1,120 @@
+"""
+Template resolution for Kubernetes Add-ons Plugin Manager configs.
+
+Placeholders look like ``{{ NAME }}`` or ``{{ NAME | default('value') }}`` and
+are substituted from the environment. Each distinct string is compiled once
+into literal and placeholder segments; compiled templates are cached for the
+lifetime of the process, so resolving several environments that share the
+same global config only compiles its strings once.
+
+The compiled templates take other placeholder syntaxes as well, such as the
+``${NAME}`` of Helm values files (values_template.py).
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+_PLACEHOLDER_PATTERN = re.compile(
+    r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*"
+    r"(?:\|\s*default\(\s*(?:'([^']*)'|\"([^\"]*)\")\s*\)\s*)?"
+    r"\}\}"
+)
+
+# (index in parts, variable name, default from the template or None)
+Slot = Tuple[int, str, Optional[str]]
+
+
+class CompiledTemplate:
+    """A string split once into literal text and placeholders
+
+    `pattern` matches one placeholder: its first group is the variable name,
+    and the first of its other groups that matched is the default.
+    """
+
+    __slots__ = ('source', 'parts', 'slots', 'variables')
+
+    def __init__(self, source: str, pattern: Pattern[str] = _PLACEHOLDER_PATTERN):
+        self.source = source
+        # Literal text at even indices, a placeholder for each variable at odd ones
+        self.parts: List[str] = []
+        self.slots: List[Slot] = []
+        position = 0
+        for match in pattern.finditer(source):
+            self.parts.append(source[position:match.start()])
+            default = next((group for group in match.groups()[1:] if group is not None), None)
+            self.slots.append((len(self.parts), match.group(1), default))
+            self.parts.append('')
+            position = match.end()
+        self.parts.append(source[position:])
+        self.variables = frozenset(name for _, name, _ in self.slots)
+
+    def render(self, lookup: Callable[[str], Optional[str]], fallbacks: Optional[Dict[str, str]] = None) -> str:
+        """Render with `lookup` values, then template defaults, then `fallbacks`, then ''"""
+        if not self.slots:
+            return self.source
+        fallbacks = fallbacks or {}
+        parts = self.parts.copy()
+        for index, name, default in self.slots:
+            value = lookup(name)
+            if value is None:
+                value = default if default is not None else fallbacks.get(name, '')
+            parts[index] = value
+        return ''.join(parts)
+
+    def inputs(self, lookup: Callable[[str], Optional[str]]) -> Dict[str, Optional[str]]:
+        """Values of the referenced variables, None when unset (which is not the same as empty)"""
+        return {name: lookup(name) for name in sorted(self.variables)}
+
+
+@lru_cache(maxsize=8192)
+def compile_template(source: str, pattern: Pattern[str] = _PLACEHOLDER_PATTERN) -> CompiledTemplate:
+    """Compile a template string, reusing the cached result for strings seen before"""
+    return CompiledTemplate(source, pattern)
+
+
+def resolve_tree(data: Any, lookup: Callable[[str], Optional[str]],
+                 fallbacks: Optional[Dict[str, str]] = None) -> Any:
+    """Resolve placeholders in every string leaf of a config tree
+
+    Only string values are rendered; keys and non-string scalars are left
+    untouched. Containers without placeholders are returned as-is rather
+    than copied. Identical strings are rendered once per call.
+    """
+    rendered: Dict[str, str] = {}
+
+    def render(value: str) -> str:
+        result = rendered.get(value)
+        if result is None:
+            result = rendered[value] = compile_template(value).render(lookup, fallbacks)
+        return result
+
+    def walk(node: Any) -> Any:
+        node_type = type(node)
+        if node_type is dict:
+            items = node.items()
+        elif node_type is list:
+            items = enumerate(node)
+        elif node_type is str:
+            return render(node) if '{{' in node else node
+        else:
+            return node
+
+        resolved = None
+        for key, value in items:
+            value_type = type(value)
+            if value_type is str:
+                if '{{' not in value:
+                    continue
+                new_value = render(value)
+            elif value_type is dict or value_type is list:
+                new_value = walk(value)
+            else:
+                continue
+            if new_value is not value:
+                if resolved is None:
+                    resolved = node.copy()
+                resolved[key] = new_value
+        return node if resolved is None else resolved
+
+    return walk(data)
@@ -0,0 +1,190 @@
+"""
+Native Helm driver for the Kubernetes Add-ons Plugin Manager.
+
+Installs plugins whose plugin.yaml declares ``installation.method: helm``
+straight from the chart, version, repository and namespace fields, instead
+of running the plugin's install.sh. Work every install script repeated is
+done once per run: each chart repository is added at most once (and not at
+all if helm already has it), ``helm repo update`` runs once for all of the
+run's repositories, and the release namespaces are created in one
+``kubectl apply``. With a chart cache, pinned chart versions are installed
+from the cached archive and their repositories are not contacted at all.
+
+A plugin opts out, keeping its scripts, with ``installation.driver: script``.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from chart_cache import ChartCache, ChartCacheError
+from process_runner import ProcessResult, run_streaming
+from values_template import load_values
+
+
+class HelmError(Exception):
+    """A helm or kubectl command run by the driver failed"""
+
+    def __init__(self, message: str, result: Optional[ProcessResult] = None):
+        super().__init__(message)
+        self.result = result
+
+
+def release_spec(plugin_name: str, installation: Dict, cloud_provider: str, plugin_dir: Path) -> Dict:
+    """Normalise a plugin.yaml installation block into what the driver needs"""
+    chart = installation['chart']
+    repo_name = chart.split('/', 1)[0] if '/' in chart else None
+    values = installation.get('values')
+    if values is None:
+        default_values = plugin_dir / 'values' / f"{cloud_provider}.yaml"
+        values = [str(default_values.relative_to(plugin_dir))] if default_values.is_file() else []
+    return {
+        'plugin': plugin_name,
+        'release': installation.get('release', plugin_name),
+        'chart': chart,
+        'chart_name': chart.rsplit('/', 1)[-1],
+        'version': str(installation['version']) if installation.get('version') else None,
+        'repo_name': repo_name,
+        'repository': installation.get('repository') if repo_name else None,
+        'namespace': installation.get('namespace', plugin_name),
+        'create_namespace': installation.get('create_namespace', True),
+        'values': [plugin_dir / path for path in values],
+    }
+
+
+class HelmDriver:
+    """Runs helm for native-driver plugins; one instance is shared by every cluster of a run"""
+
+    def __init__(self, helm: str = 'helm', kubectl: str = 'kubectl', chart_cache: Optional[ChartCache] = None):
+        self.helm = helm
+        self.kubectl = kubectl
+        self.chart_cache = chart_cache
+        self._lock = threading.Lock()
+        # Repositories added and updated during this run, by name
+        self._prepared_repos: Dict[str, str] = {}
+
+    def _run(self, command: List[str], env: Dict[str, str], timeout: float, prefix: str,
+             input_text: Optional[str] = None) -> ProcessResult:
+        if input_text is None:
+            result = run_streaming(command, env=env, cwd=None, timeout=timeout, prefix=prefix)
+        else:
+            # Only small manifests are piped in, and their output is short enough to log after exit
+            started = time.monotonic()
+            completed = subprocess.run(command, env=env, input=input_text, text=True, capture_output=True,
+                                       timeout=timeout)
+            output = (completed.stdout or '') + (completed.stderr or '')
+            for line in output.splitlines():
+                logging.info(f"[{prefix}] {line}")
+            result = ProcessResult(returncode=completed.returncode, timed_out=False, output_tail=output,
+                                   duration=time.monotonic() - started)
+        if result.timed_out or result.returncode != 0:
+            reason = 'timed out' if result.timed_out else f"exit code {result.returncode}"
+            raise HelmError(f"{' '.join(command[:3])} failed ({reason})", result)
+        return result
+
+    def configured_repos(self, env: Dict[str, str]) -> Dict[str, str]:
+        """Repositories helm already knows, by name"""
+        completed = subprocess.run([self.helm, 'repo', 'list', '-o', 'json'], env=env, text=True,
+                                   capture_output=True, timeout=60)
+        if completed.returncode != 0:
+            # helm exits non-zero when no repositories are configured yet
+            return {}
+        return {repo['name']: repo['url'] for repo in json.loads(completed.stdout or '[]')}
+
+    def cached_chart(self, release: Dict, env: Dict[str, str]) -> Optional[Path]:
+        """Local archive of a release's chart from the chart cache, pulled on a miss; None if not cacheable"""
+        if self.chart_cache is None or not release['repository'] or not release['version']:
+            return None
+        try:
+            path, pulled = self.chart_cache.ensure(release['repository'], release['chart_name'], release['version'], env)
+        except (ChartCacheError, OSError) as e:
+            raise HelmError(f"Caching chart {release['chart']} {release['version']} failed: {e}")
+        if pulled:
+            logging.info(f"📦 Pulled {release['chart']} {release['version']} into the chart cache")
+        return path
+
+    def prepare(self, releases: List[Dict], env: Dict[str, str]) -> None:
+        """Add and update every repository and create every namespace the releases need, once
+
+        Releases whose chart comes from the chart cache need no repository.
+        """
+        repos: Dict[str, str] = {}
+        for release in releases:
+            release['chart_path'] = self.cached_chart(release, env)
+            if release['repository'] and release['chart_path'] is None:
+                if repos.setdefault(release['repo_name'], release['repository']) != release['repository']:
+                    raise HelmError(f"Helm repository {release['repo_name']} is declared with two URLs: "
+                                    f"{repos[release['repo_name']]} and {release['repository']}")
+
+        with self._lock:
+            pending = {name: url for name, url in repos.items() if self._prepared_repos.get(name) != url}
+            if pending:
+                configured = self.configured_repos(env)
+                for name, url in sorted(pending.items()):
+                    if configured.get(name) != url:
+                        self._run([self.helm, 'repo', 'add', '--force-update', name, url], env, 120, 'helm')
+                logging.info(f"⎈ Updating Helm repositories once for this run: {', '.join(sorted(pending))}")
+                self._run([self.helm, 'repo', 'update', *sorted(pending)], env, 300, 'helm')
+                self._prepared_repos.update(pending)
+
+        namespaces: Dict[str, List[str]] = {}
+        for release in releases:
+            if release['create_namespace']:
+                namespaces.setdefault(release['namespace'], []).append(release['plugin'])
+        if namespaces:
+            manifests = [
+                {
+                    'apiVersion': 'v1',
+                    'kind': 'Namespace',
+                    'metadata': {
+                        'name': namespace,
+                        'labels': {
+                            'app.kubernetes.io/managed-by': 'plugin-manager',
+                            # A namespace shared by several plugins is labelled with the first
+                            'app.kubernetes.io/name': plugins[0],
+                        },
+                    },
+                }
+                for namespace, plugins in sorted(namespaces.items())
+            ]
+            logging.info(f"⎈ Ensuring namespaces: {', '.join(sorted(namespaces))}")
+            self._run([self.kubectl, 'apply', '-f', '-'], env, 120, 'kubectl',
+                      input_text=yaml.safe_dump_all(manifests, sort_keys=False))
+
+    def install(self, release: Dict, env: Dict[str, str], timeout: float) -> ProcessResult:
+        """helm upgrade --install the release with its rendered values files"""
+        with tempfile.TemporaryDirectory(prefix=f"helm-{release['plugin']}-") as tmp_dir:
+            chart_path = release['chart_path'] if 'chart_path' in release else self.cached_chart(release, env)
+            command = [
+                self.helm, 'upgrade', '--install', release['release'], str(chart_path or release['chart']),
+                '--namespace', release['namespace'],
+            ]
+            for i, values_file in enumerate(release['values']):
+                rendered = Path(tmp_dir) / f"{i}-{values_file.name}"
+                rendered.write_text(load_values(values_file).render(env.get))
+                os.chmod(rendered, 0o600)
+                command += ['--values', str(rendered)]
+            if release['version'] and chart_path is None:
+                command += ['--version', release['version']]
+            command += ['--timeout', f"{int(timeout)}s", '--wait', '--atomic']
+            # Give helm's own --timeout (and --atomic rollback) a chance to finish first
+            return self._run(command, env, timeout + 120, release['plugin'])
+
+    def uninstall(self, release: Dict, env: Dict[str, str], timeout: float = 300) -> Optional[ProcessResult]:
+        """helm uninstall the release; None if it was not installed"""
+        status = subprocess.run([self.helm, 'status', release['release'], '--namespace', release['namespace']],
+                                env=env, capture_output=True, timeout=60)
+        if status.returncode != 0:
+            logging.info(f"ℹ️ Helm release {release['release']} not found in namespace {release['namespace']}")
+            return None
+        command = [self.helm, 'uninstall', release['release'], '--namespace', release['namespace'],
+                   '--timeout', f"{int(timeout)}s"]
+        return self._run(command, env, timeout + 60, release['plugin'])
@@ -0,0 +1,159 @@
+"""
+Persistent install state for the Kubernetes Add-ons Plugin Manager.
+
+Records a content fingerprint for every successfully installed plugin,
+keyed by cluster, environment and plugin name, so unchanged plugins can be
+skipped on the next reconcile, and checkpoints the progress of each install
+run so an interrupted run can be resumed.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_VERSION = 1
+
+
+class InstallStateStore:
+    """JSON-backed store of last successful installs, safe to use from worker threads"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    @staticmethod
+    def key(cluster: str, environment: str, plugin_name: str) -> str:
+        return f"{cluster}/{environment}/{plugin_name}"
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            data = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    # Corrupt or partly written: every plugin is installed again
+                    logging.warning(f"⚠️ Ignoring unreadable install state {self.path}: {e}")
+            if not isinstance(data, dict) or data.get('version') != STATE_VERSION:
+                # Unknown layout: start over rather than trusting stale fingerprints
+                data = {}
+            self._entries = data.get('entries', {})
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': STATE_VERSION, 'entries': self._entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, cluster: str, environment: str, plugin_name: str) -> Optional[Dict]:
+        with self._lock:
+            return self._load().get(self.key(cluster, environment, plugin_name))
+
+    def entries(self, cluster: str, environment: str) -> Dict[str, Dict]:
+        """All recorded installs of one cluster and environment, by plugin name"""
+        prefix = self.key(cluster, environment, '')
+        with self._lock:
+            return {key[len(prefix):]: dict(entry) for key, entry in self._load().items() if key.startswith(prefix)}
+
+    def history(self, plugin_name: str) -> List[Dict]:
+        """Recorded installs of a plugin across all clusters and environments"""
+        with self._lock:
+            return [dict(entry) for key, entry in self._load().items() if key.rsplit('/', 1)[-1] == plugin_name]
+
+    def record(self, cluster: str, environment: str, plugin_name: str, fingerprint: str, **details) -> None:
+        with self._lock:
+            entry = {
+                'fingerprint': fingerprint,
+                'installed_at': datetime.now(timezone.utc).isoformat(),
+            }
+            entry.update(details)
+            self._load()[self.key(cluster, environment, plugin_name)] = entry
+            self._save()
+
+    def forget(self, cluster: str, environment: str, plugin_name: str) -> None:
+        with self._lock:
+            if self._load().pop(self.key(cluster, environment, plugin_name), None) is not None:
+                self._save()
+
+
+class RunCheckpoint:
+    """Progress of one install run, saved after every plugin so an interrupted run can be resumed
+
+    A checkpoint without a path (e.g. in dry-run mode) tracks progress in memory only.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self.data: Dict = {}
+
+    def load(self) -> Optional[Dict]:
+        """Return the saved checkpoint of an unfinished run, if any"""
+        if self.path is None or not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Ignoring unreadable checkpoint {self.path}, not resuming: {e}")
+            return None
+        if not isinstance(data, dict) or data.get('version') != STATE_VERSION or data.get('finished'):
+            return None
+        return data
+
+    def start(self, run_id: str, plan: List[str], completed: Optional[Dict[str, str]] = None,
+              started_at: Optional[str] = None) -> None:
+        with self._lock:
+            now = datetime.now(timezone.utc).isoformat()
+            self.data = {
+                'version': STATE_VERSION,
+                'run_id': run_id,
+                'started_at': started_at or now,
+                'updated_at': now,
+                'plan': plan,
+                'completed': dict(completed or {}),
+                'failed': [],
+                'finished': False,
+            }
+            self._save()
+
+    def record(self, plugin_name: str, status: str) -> None:
+        with self._lock:
+            if status == 'failed':
+                if plugin_name not in self.data['failed']:
+                    self.data['failed'].append(plugin_name)
+            elif status != 'skipped':
+                self.data['completed'][plugin_name] = status
+                if plugin_name in self.data['failed']:
+                    self.data['failed'].remove(plugin_name)
+            self._save()
+
+    def forget(self, plugin_names: List[str]) -> None:
+        """Drop completed plugins again, e.g. after they were rolled back"""
+        with self._lock:
+            for plugin_name in plugin_names:
+                self.data['completed'].pop(plugin_name, None)
+            self._save()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.data['finished'] = True
+            self._save()
+
+    def _save(self) -> None:
+        self.data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
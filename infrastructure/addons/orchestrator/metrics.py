@@ -0,0 +1,182 @@
+"""
+Prometheus metrics for the Kubernetes Add-ons Plugin Manager.
+
+plugin-manager is a one-shot process, so counters and histograms are kept
+cumulative across runs in a small JSON state file and the full registry is
+exported after every run, either as a node-exporter textfile collector file
+or pushed to a Pushgateway. No client library is needed; the text exposition
+format is written directly.
+"""
+
+import base64
+import json
+import math
+import os
+import threading
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Install scripts take seconds to many minutes; health probes well under a minute
+INSTALL_BUCKETS = (5, 15, 30, 60, 120, 300, 600, 1200, 1800)
+PROBE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS = {
+    'plugin_manager_plugin_install_duration_seconds': ('histogram', 'Duration of plugin install scripts', INSTALL_BUCKETS),
+    'plugin_manager_plugin_ready_seconds': ('histogram', 'Time from plugin install until its health check passed', INSTALL_BUCKETS),
+    'plugin_manager_plugin_installs_total': ('counter', 'Plugin installs by result (success, failure, unchanged)', None),
+    'plugin_manager_health_check_duration_seconds': ('histogram', 'Duration of plugin health check scripts', PROBE_BUCKETS),
+    'plugin_manager_health_checks_total': ('counter', 'Plugin health checks by result (pass, fail)', None),
+    'plugin_manager_rollbacks_total': ('counter', 'Rollbacks triggered by failed installs', None),
+    'plugin_manager_rollback_plugins_total': ('counter', 'Plugins uninstalled by rollbacks, by result', None),
+    'plugin_manager_last_run_timestamp_seconds': ('gauge', 'Unix time the last run of an action finished', None),
+    'plugin_manager_last_run_success': ('gauge', 'Whether the last run of an action succeeded (1) or failed (0)', None),
+    'plugin_manager_last_run_duration_seconds': ('gauge', 'Wall time of the last run of an action', None),
+}
+
+STATE_VERSION = 1
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by metric name and label set; safe to use from worker threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict[LabelKey, object]] = {name: {} for name in METRICS}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, labels: Dict[str, str], amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series[name]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, labels: Dict[str, str], value: float) -> None:
+        with self._lock:
+            self._series[name][self._key(labels)] = value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        buckets = METRICS[name][2]
+        key = self._key(labels)
+        with self._lock:
+            series = self._series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+            # Per-bucket counts, the last one being +Inf; cumulated when rendered
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def load(self, path: Path) -> None:
+        """Add the series saved by previous runs; unreadable or outdated state is ignored"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != STATE_VERSION:
+            return
+        with self._lock:
+            for name, entries in data.get('series', {}).items():
+                if name not in METRICS:
+                    continue
+                metric_type, _, buckets = METRICS[name]
+                for entry in entries:
+                    key = self._key(entry['labels'])
+                    value = entry['value']
+                    if metric_type == 'histogram' and len(value.get('buckets', [])) != len(buckets) + 1:
+                        continue  # bucket layout changed
+                    self._series[name][key] = value
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            data = {
+                'version': STATE_VERSION,
+                'series': {
+                    name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                    for name, series in self._series.items() if series
+                },
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for name, (metric_type, help_text, buckets) in METRICS.items():
+                series = self._series[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for key in sorted(series):
+                    value = series[key]
+                    if metric_type != 'histogram':
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(buckets) + [math.inf], value['buckets']):
+                        cumulative += count
+                        le = '+Inf' if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: Path) -> None:
+        """Write a node-exporter textfile collector file, atomically so a scrape never sees half of it"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def push(self, gateway_url: str, job: str, grouping: Dict[str, str], timeout: float = 10) -> None:
+        """Replace this job's metric group on a Pushgateway"""
+        url = f"{gateway_url.rstrip('/')}/metrics/job/{_path_segment(job)}"
+        for label, value in grouping.items():
+            if '/' in value or not value:
+                encoded = base64.urlsafe_b64encode(value.encode()).decode() or '='
+                url += f"/{label}@base64/{encoded}"
+            else:
+                url += f"/{label}/{_path_segment(value)}"
+        request = urllib.request.Request(
+            url,
+            data=self.render().encode(),
+            method='PUT',
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+
+
+def _path_segment(value: str) -> str:
+    return urllib.parse.quote(value, safe='')
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{label}="{_escape_label_value(value)}"' for label, value in key) + '}'
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
@@ -13,91 +13,145 @@ import os
 import time
 import json
 import argparse
+import copy
+import hashlib
+import random
+import re
+import uuid
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError, as_completed, wait
 from typing import Dict, List, Optional, Tuple
 import logging
-from datetime import datetime
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+# Shared YAML loader/cache lives in the repository's scripts directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'scripts'))
+
+from chart_cache import ChartCache, ChartCacheError
+from config_cache import load_yaml
+from config_templates import resolve_tree
+from helm_driver import HelmDriver, HelmError, release_spec
+from install_state import InstallStateStore, RunCheckpoint
+from metrics import MetricsRegistry
+from plugin_index import PluginIndex, installation_driver
+from process_runner import ProcessResult, run_streaming
+from python_plugin import PluginError, load_plugin_class
+from tracing import TRACE_FORMATS, Tracer, traced
+
+# Values used when a placeholder has neither an environment value nor a default()
+TEMPLATE_FALLBACKS = {
+    'GRAFANA_ADMIN_PASSWORD': 'admin123',
+    'ARGOCD_ADMIN_PASSWORD': 'admin123',
+}
+
+def deep_merge(base, override):
+    """Return `override` merged onto `base` without mutating either"""
+    if not isinstance(base, dict) or not isinstance(override, dict):
+        return override
+    if not base:
+        return override
+    if not override:
+        return base
+    
+    merged = dict(base)
+    for key, value in override.items():
+        merged[key] = deep_merge(base[key], value) if key in base else value
+    return merged
 
 class PluginManager:
-    def __init__(self, config_file: str, environment: str, cloud_provider: str, dry_run: bool = False):
+    def __init__(self, config_file: str, environment: str, cloud_provider: str, dry_run: bool = False,
+                 force: bool = False, resume: bool = False, tracer: Optional[Tracer] = None):
         self.config_file = config_file
         self.environment = environment
         self.cloud_provider = cloud_provider
         self.dry_run = dry_run
+        self.force = force
+        self.resume = resume
         self.plugins_dir = Path("infrastructure/addons/plugins")
+        self.config_dir = Path("infrastructure/addons/config") / cloud_provider
+        self.tracer = tracer if tracer is not None else Tracer()
         self.config = self.load_config()
+        self.state_dir = Path(self.config.get('settings', {}).get('state_dir', '.plugin-manager'))
+        self.install_state = InstallStateStore(self.state_dir / 'install-state.json')
+        self.plugin_index = PluginIndex(self.plugins_dir, self.state_dir / 'plugin-index.json')
+        self.chart_cache = ChartCache(Path(self.config.get('settings', {}).get('chart_cache_dir', self.state_dir / 'charts')))
+        self.helm = HelmDriver(chart_cache=self.chart_cache)
+        self.metrics = MetricsRegistry()
+        self.metrics.load(self.state_dir / 'metrics-state.json')
+        self.ready_times: Dict[str, float] = {}
+        self.extra_env: Dict[str, str] = {}
+        self.rollback_scope: Optional[str] = None
         self.setup_logging()
         
+    @traced('config.load')
     def load_config(self) -> Dict:
-        """Load and merge plugin configurations"""
+        """Load, layer and resolve plugin configurations
+        
+        Layers are merged in order: global (config_file), cloud
+        (<cloud>/common.yaml), environment (<cloud>/<environment>.yaml) and
+        cluster (<cloud>/clusters/<cluster_name>.yaml). Missing optional layers
+        are skipped.
+        """
         # Load global configuration
-        with open(self.config_file, 'r') as f:
-            global_config = yaml.safe_load(f)
-            
+        layers = [self.load_yaml_file(Path(self.config_file))]
+        
+        # Load cloud-wide config
+        cloud_config_file = self.config_dir / 'common.yaml'
+        if cloud_config_file.exists():
+            layers.append(self.load_yaml_file(cloud_config_file))
+        
         # Load environment-specific config
-        env_config_file = f"infrastructure/addons/config/{self.cloud_provider}/{self.environment}.yaml"
-        if Path(env_config_file).exists():
-            with open(env_config_file, 'r') as f:
-                env_config = yaml.safe_load(f)
+        env_config_file = self.config_dir / f"{self.environment}.yaml"
+        if env_config_file.exists():
+            layers.append(self.load_yaml_file(env_config_file))
         else:
             logging.warning(f"Environment config not found: {env_config_file}")
-            env_config = {}
-            
-        # Merge configurations
-        merged_config = self.merge_configs(global_config, env_config)
+        
+        # Merge configurations; the pre-cluster view is kept for for_cluster()
+        self.base_config = self.merge_configs(*layers)
+        cluster_name = resolve_tree(self.base_config.get('cluster_name', ''), os.environ.get, TEMPLATE_FALLBACKS)
         
         # Resolve template variables
-        merged_config = self.resolve_template_variables(merged_config)
-        
-        return merged_config
-    
-    def merge_configs(self, global_config: Dict, env_config: Dict) -> Dict:
-        """Merge global and environment-specific configurations"""
-        merged = global_config.copy()
-        
-        # Merge plugin configurations
-        if 'plugins' in env_config:
-            for plugin_name, env_plugin_config in env_config['plugins'].items():
-                if plugin_name in merged['plugins']:
-                    # Merge plugin config
-                    if 'config' in env_plugin_config:
-                        if 'config' not in merged['plugins'][plugin_name]:
-                            merged['plugins'][plugin_name]['config'] = {}
-                        merged['plugins'][plugin_name]['config'].update(env_plugin_config['config'])
-                    
-                    # Override other plugin settings
-                    for key, value in env_plugin_config.items():
-                        if key != 'config':
-                            merged['plugins'][plugin_name][key] = value
-        
-        # Add environment-specific settings
-        for key, value in env_config.items():
-            if key not in ['plugins']:
-                merged[key] = value
-                
+        return self.resolve_template_variables(self.apply_cluster_layer(self.base_config, cluster_name))
+    
+    def load_yaml_file(self, path: Path) -> Dict:
+        """Load a YAML config layer, treating an empty file as an empty mapping"""
+        return load_yaml(path) or {}
+    
+    def apply_cluster_layer(self, config: Dict, cluster_name: str) -> Dict:
+        """Merge the cluster-specific config layer, if one exists for the cluster"""
+        cluster_config_file = self.config_dir / 'clusters' / f"{cluster_name}.yaml"
+        if cluster_name and cluster_config_file.exists():
+            logging.debug(f"Applying cluster config: {cluster_config_file}")
+            return self.merge_configs(config, self.load_yaml_file(cluster_config_file))
+        return config
+    
+    @traced('config.merge')
+    def merge_configs(self, *layers: Dict) -> Dict:
+        """Deep-merge configuration layers, later layers taking precedence
+        
+        Nested mappings are merged at any depth; lists and scalars are replaced.
+        Inputs are never mutated, and subtrees a layer does not touch are shared
+        with the input rather than copied, so a parsed global config can be
+        reused to derive many environment views.
+        """
+        merged: Dict = {}
+        for layer in layers:
+            merged = deep_merge(merged, layer or {})
         return merged
     
-    def resolve_template_variables(self, config: Dict) -> Dict:
-        """Resolve template variables in configuration"""
-        # This is a simplified template resolver
-        # In production, you might want to use a more sophisticated templating system
-        config_str = json.dumps(config)
-        
-        # Replace common template variables
-        replacements = {
-            "{{ VPC_ID }}": os.environ.get('VPC_ID', ''),
-            "{{ PRIVATE_SUBNET_IDS }}": os.environ.get('PRIVATE_SUBNET_IDS', ''),
-            "{{ PUBLIC_SUBNET_IDS }}": os.environ.get('PUBLIC_SUBNET_IDS', ''),
-            "{{ GRAFANA_ADMIN_PASSWORD }}": os.environ.get('GRAFANA_ADMIN_PASSWORD', 'admin123'),
-            "{{ ARGOCD_ADMIN_PASSWORD }}": os.environ.get('ARGOCD_ADMIN_PASSWORD', 'admin123'),
-            "{{ AZURE_TENANT_ID }}": os.environ.get('AZURE_TENANT_ID', ''),
-            "{{ ROUTE53_HOSTED_ZONE_ID }}": os.environ.get('ROUTE53_HOSTED_ZONE_ID', ''),
-        }
+    @traced('config.resolve_templates')
+    def resolve_template_variables(self, config: Dict, overrides: Optional[Dict[str, str]] = None) -> Dict:
+        """Resolve template variables in configuration
         
-        for template, value in replacements.items():
-            config_str = config_str.replace(template, value)
-            
-        return json.loads(config_str)
+        Substitutes `{{ NAME }}` and `{{ NAME | default('value') }}` placeholders
+        in string values from the environment, in a single walk of the config.
+        Variables in `overrides` take precedence over the environment.
+        """
+        if not overrides:
+            return resolve_tree(config, os.environ.get, TEMPLATE_FALLBACKS)
+        return resolve_tree(config, lambda name: overrides.get(name, os.environ.get(name)), TEMPLATE_FALLBACKS)
     
     def get_enabled_plugins(self, specific_plugins: Optional[List[str]] = None) -> List[Dict]:
         """Get list of enabled plugins sorted by priority"""
@@ -115,82 +169,248 @@ class PluginManager:
                         logging.info(f"Skipping {plugin_name}: not compatible with {self.cloud_provider}")
                         continue
                 
-                plugin_config['name'] = plugin_name
-                enabled_plugins.append(plugin_config)
+                manifest = self.plugin_index.get(plugin_name)
+                if manifest and manifest['cloud_providers'] and self.cloud_provider not in manifest['cloud_providers']:
+                    logging.info(f"Skipping {plugin_name}: plugin.yaml does not support {self.cloud_provider} "
+                                 f"(supports {', '.join(manifest['cloud_providers'])})")
+                    continue
+                
+                dependencies = self.get_plugin_dependencies(plugin_name)
+                # Copy so the shared (cached) config tree is never mutated
+                enabled_plugins.append(dict(
+                    plugin_config,
+                    name=plugin_name,
+                    dependencies=dependencies['required'],
+                    optional_dependencies=dependencies['optional'],
+                    conflicts=dependencies['conflicts'],
+                ))
         
         # Sort by priority
         return sorted(enabled_plugins, key=lambda x: x.get('priority', 999))
     
+    def get_plugin_dependencies(self, plugin_name: str) -> Dict[str, List[str]]:
+        """Combine the config's flat dependency list with the plugin.yaml dependency semantics
+        
+        Dependencies listed in plugins-config.yaml are required unless the
+        plugin's manifest declares them optional. Required dependencies must be
+        installed first; optional ones are ordering hints only; conflicts may
+        not be installed together with the plugin.
+        """
+        configured = self.config.get('plugins', {}).get(plugin_name, {}).get('dependencies', [])
+        manifest = self.plugin_index.get(plugin_name)
+        declared = manifest['dependencies'] if manifest and manifest['valid'] else {}
+        
+        required = list(declared.get('required', []))
+        optional = [dep for dep in declared.get('optional', []) if dep not in required]
+        required = [dep for dep in dict.fromkeys(list(configured) + required) if dep not in optional]
+        return {'required': required, 'optional': optional, 'conflicts': list(declared.get('conflicts', []))}
+    
     def resolve_dependencies(self, plugins: List[Dict]) -> List[Dict]:
         """Resolve plugin dependencies and return installation order"""
-        resolved = []
-        remaining = plugins.copy()
-        max_iterations = len(plugins) * 2  # Prevent infinite loops
-        iterations = 0
-        
-        while remaining and iterations < max_iterations:
-            progress = False
-            iterations += 1
-            
-            for plugin in remaining[:]:
-                dependencies = plugin.get('dependencies', [])
-                
-                # Check if all dependencies are resolved
-                if all(dep in [p['name'] for p in resolved] for dep in dependencies):
-                    resolved.append(plugin)
-                    remaining.remove(plugin)
-                    progress = True
-                    logging.debug(f"Resolved plugin: {plugin['name']}")
+        return [plugin for level in self.resolve_dependency_levels(plugins) for plugin in level]
+    
+    @traced('dependencies.resolve')
+    def resolve_dependency_levels(self, plugins: List[Dict]) -> List[List[Dict]]:
+        """Resolve plugin dependencies into installation waves
+        
+        Uses Kahn's algorithm over an index of the plugin list, so resolution is
+        O(V+E). Every plugin in a wave only depends on plugins from earlier waves.
+        Only required dependencies (`dependencies`) create edges; optional
+        dependencies (`optional_dependencies`) never delay a plugin, they only
+        move the plugins they name to the front of their wave, otherwise the
+        input (priority) order is preserved. Selected plugins that `conflicts`
+        with each other are rejected.
+        """
+        index = {plugin['name']: i for i, plugin in enumerate(plugins)}
+        
+        conflicts = sorted({
+            ' <-> '.join(sorted((plugin['name'], other)))
+            for plugin in plugins
+            for other in plugin.get('conflicts', [])
+            if other in index and other != plugin['name']
+        })
+        if conflicts:
+            raise Exception(f"Conflicting plugins selected: {conflicts}")
+        
+        missing_deps = [
+            f"{plugin['name']} -> {dep} (missing)"
+            for plugin in plugins
+            for dep in plugin.get('dependencies', [])
+            if dep not in index
+        ]
+        if missing_deps:
+            raise Exception(f"Dependency resolution failed: {missing_deps}")
+        
+        indegree = [0] * len(plugins)
+        dependents: List[List[int]] = [[] for _ in plugins]
+        for i, plugin in enumerate(plugins):
+            deps = {index[dep] for dep in plugin.get('dependencies', [])}
+            indegree[i] = len(deps)
+            for dep in deps:
+                dependents[dep].append(i)
+        
+        hinted = {index[dep] for plugin in plugins for dep in plugin.get('optional_dependencies', []) if dep in index}
+        
+        levels = []
+        resolved_count = 0
+        current = [i for i, degree in enumerate(indegree) if degree == 0]
+        
+        while current:
+            current.sort(key=lambda i: (i not in hinted, i))
+            levels.append([plugins[i] for i in current])
+            resolved_count += len(current)
             
-            if not progress:
-                # Check for circular dependencies or missing dependencies
-                missing_deps = []
-                for plugin in remaining:
-                    for dep in plugin.get('dependencies', []):
-                        if dep not in [p['name'] for p in resolved + remaining]:
-                            missing_deps.append(f"{plugin['name']} -> {dep} (missing)")
-                        elif dep in [p['name'] for p in remaining]:
-                            missing_deps.append(f"{plugin['name']} -> {dep} (circular)")
-                
-                if missing_deps:
-                    raise Exception(f"Dependency resolution failed: {missing_deps}")
-                else:
-                    # No progress but no missing deps - might be circular
-                    remaining_names = [p['name'] for p in remaining]
-                    raise Exception(f"Circular dependency detected among: {remaining_names}")
+            next_level = []
+            for i in current:
+                for dependent in dependents[i]:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        next_level.append(dependent)
+            current = next_level
+        
+        if resolved_count < len(plugins):
+            cycle = self.find_dependency_cycle(plugins, index, indegree)
+            raise Exception(f"Circular dependency detected: {' -> '.join(cycle)}")
+        
+        for depth, level in enumerate(levels, start=1):
+            logging.debug(f"Resolved wave {depth}: {[p['name'] for p in level]}")
         
-        return resolved
+        return levels
     
+    def find_dependency_cycle(self, plugins: List[Dict], index: Dict[str, int], indegree: List[int]) -> List[str]:
+        """Return one dependency cycle among the plugins Kahn's algorithm could not resolve"""
+        # Every unresolved plugin has at least one unresolved dependency, so walking
+        # those edges from any unresolved plugin must eventually revisit a plugin.
+        current = next(i for i, degree in enumerate(indegree) if degree > 0)
+        path: List[int] = []
+        position: Dict[int, int] = {}
+        
+        while current not in position:
+            position[current] = len(path)
+            path.append(current)
+            current = next(
+                index[dep] for dep in plugins[current].get('dependencies', [])
+                if indegree[index[dep]] > 0
+            )
+        
+        cycle = path[position[current]:] + [current]
+        return [plugins[i]['name'] for i in cycle]
+    
+    @traced('plugin.validate')
     def validate_plugin(self, plugin_name: str) -> bool:
-        """Validate plugin structure and requirements"""
-        plugin_dir = self.plugins_dir / plugin_name
+        """Validate plugin structure and requirements
         
-        if not plugin_dir.exists():
-            logging.error(f"Plugin directory not found: {plugin_dir}")
+        Uses the plugin index, which only revalidates the plugin directory if
+        its content changed since it was last indexed.
+        """
+        entry = self.plugin_index.get(plugin_name)
+        if entry is None:
+            logging.error(f"Plugin directory not found: {self.plugins_dir / plugin_name}")
             return False
         
-        required_files = ['plugin.yaml', 'install.sh']
-        for file in required_files:
-            if not (plugin_dir / file).exists():
-                logging.error(f"Required file missing: {plugin_dir / file}")
-                return False
+        for error in entry['errors']:
+            logging.error(f"Plugin {plugin_name}: {error}")
+        return entry['valid']
+    
+    def index_plugins(self) -> bool:
+        """Scan and validate every plugin directory in parallel and save the plugin index"""
+        started = time.monotonic()
+        entries, rescanned = self.plugin_index.build(max_workers=min(32, (os.cpu_count() or 1) * 4))
+        logging.info(f"📇 Indexed {len(entries)} plugin(s) in {time.monotonic() - started:.2f}s "
+                     f"({rescanned} rescanned, {len(entries) - rescanned} unchanged) -> {self.plugin_index.index_file}")
         
-        # Validate plugin.yaml
-        try:
-            with open(plugin_dir / 'plugin.yaml', 'r') as f:
-                plugin_spec = yaml.safe_load(f)
-                
-            required_fields = ['plugin', 'plugin.name', 'plugin.version']
-            for field in required_fields:
-                if not self.get_nested_value(plugin_spec, field.split('.')):
-                    logging.error(f"Required field missing in plugin.yaml: {field}")
-                    return False
-                    
-        except Exception as e:
-            logging.error(f"Error validating plugin.yaml: {e}")
-            return False
+        invalid = 0
+        for plugin_name, entry in entries.items():
+            if entry['valid']:
+                logging.info(f"  ✅ {plugin_name:<30} {entry['version'] or '-':<10} "
+                             f"{entry['installation_method'] or '-':<8} {', '.join(entry['cloud_providers'])}")
+                continue
+            invalid += 1
+            logging.error(f"  ❌ {plugin_name}")
+            for error in entry['errors']:
+                logging.error(f"      {error}")
         
-        return True
+        enabled_without_dir = sorted(
+            name for name, plugin_config in self.config.get('plugins', {}).items()
+            if plugin_config.get('enabled', False) and name not in entries
+        )
+        if enabled_without_dir:
+            logging.warning(f"⚠️ Enabled plugins without a plugin directory: {', '.join(enabled_without_dir)}")
+        
+        return invalid == 0
+    
+    def prefetch_charts(self, specific_plugins: Optional[List[str]] = None) -> bool:
+        """Pull the pinned chart version of every enabled helm-method plugin into the chart cache in parallel
+        
+        Charts already cached are only checksummed, so a warm cache makes
+        this a local no-op; afterwards installs need no chart repository.
+        """
+        charts: Dict[str, Tuple[str, str, str, List[str]]] = {}
+        for plugin in self.get_enabled_plugins(specific_plugins):
+            installation = self.get_nested_value(self.load_plugin_spec(plugin['name']) or {}, ['plugin', 'installation']) or {}
+            if installation.get('method') != 'helm' or not installation.get('chart'):
+                continue
+            if not installation.get('repository') or not installation.get('version'):
+                logging.warning(f"⚠️ {plugin['name']}: chart {installation['chart']} needs a pinned version "
+                                f"and a repository to be cached")
+                continue
+            repository = installation['repository']
+            chart_name = installation['chart'].rsplit('/', 1)[-1]
+            version = str(installation['version'])
+            key = self.chart_cache.key(repository, chart_name, version)
+            charts.setdefault(key, (repository, chart_name, version, []))[3].append(plugin['name'])
+        
+        if not charts:
+            logging.info("No pinned Helm charts to prefetch")
+            return True
+        
+        if self.dry_run:
+            for repository, chart_name, version, plugin_names in charts.values():
+                cached = self.chart_cache.lookup(repository, chart_name, version) is not None
+                logging.info(f"[DRY-RUN] {'Cached' if cached else 'Would pull'}: {chart_name} {version} "
+                             f"from {repository} ({', '.join(plugin_names)})")
+            return True
+        
+        def prefetch(repository: str, chart_name: str, version: str) -> Tuple[Optional[Path], bool, float, Optional[str]]:
+            started = time.monotonic()
+            try:
+                with self.tracer.span('chart.prefetch', **{'helm.chart': chart_name, 'helm.chart_version': version}):
+                    path, pulled = self.chart_cache.ensure(repository, chart_name, version)
+                return path, pulled, time.monotonic() - started, None
+            except (ChartCacheError, OSError) as e:
+                return None, False, time.monotonic() - started, str(e)
+        
+        logging.info(f"📦 Prefetching {len(charts)} chart(s) into {self.chart_cache.cache_dir}")
+        started = time.monotonic()
+        failed = 0
+        max_workers = min(len(charts), max(self.get_max_parallel(), 4))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch') as executor:
+            futures = {
+                executor.submit(self.tracer.bind(prefetch), repository, chart_name, version): (chart_name, version, plugin_names)
+                for repository, chart_name, version, plugin_names in charts.values()
+            }
+            for future in as_completed(futures):
+                chart_name, version, plugin_names = futures[future]
+                path, pulled, duration, error = future.result()
+                if error:
+                    failed += 1
+                    logging.error(f"  ❌ {chart_name} {version} ({', '.join(plugin_names)}): {error}")
+                else:
+                    logging.info(f"  {'⬇️' if pulled else '✅'} {chart_name:<30} {version:<10} "
+                                 f"{'pulled' if pulled else 'cached'} in {duration:.1f}s "
+                                 f"({path.stat().st_size // 1024} KB)")
+        
+        logging.info(f"📦 Prefetched {len(charts) - failed}/{len(charts)} chart(s) in {time.monotonic() - started:.1f}s")
+        return failed == 0
+    
+    def load_plugin_spec(self, plugin_name: str) -> Optional[Dict]:
+        """Load a plugin's plugin.yaml, or None if it is missing or invalid"""
+        spec_file = self.plugins_dir / plugin_name / 'plugin.yaml'
+        try:
+            return load_yaml(spec_file)
+        except (OSError, yaml.YAMLError) as e:
+            logging.debug(f"Could not load {spec_file}: {e}")
+            return None
     
     def get_nested_value(self, data: Dict, keys: List[str]):
         """Get nested value from dictionary"""
@@ -201,11 +421,15 @@ class PluginManager:
                 return None
         return data
     
+    @traced('plugin.install')
     def install_plugin(self, plugin: Dict) -> bool:
         """Install a single plugin"""
         plugin_name = plugin['name']
         
-        if not self.validate_plugin(plugin_name):
+        # Manifest errors were already reported when the run validated its plugins
+        entry = self.plugin_index.get(plugin_name)
+        if entry is None or not entry['valid']:
+            logging.error(f"❌ Plugin {plugin_name} is not valid, not installing")
             return False
             
         plugin_dir = self.plugins_dir / plugin_name
@@ -224,10 +448,15 @@ class PluginManager:
             'ENVIRONMENT': self.environment,
             'CLUSTER_NAME': self.config.get('cluster_name', ''),
             'DRY_RUN': str(self.dry_run).lower(),
+            # Install scripts resolve their charts through the same cache
+            'CHART_CACHE_DIR': str(self.chart_cache.cache_dir.resolve()),
+            # Where a plugin's scripts may keep state between runs
+            'PLUGIN_STATE_DIR': str((self.state_dir / 'plugins' / plugin_name).resolve()),
         })
+        env.update(self.extra_env)
         
-        # Add plugin-specific configuration
-        if plugin_name in self.config.get('plugins', {}):
+        # Add plugin-specific configuration; Python plugins read it from their config mapping instead
+        if plugin_name in self.config.get('plugins', {}) and entry['installation_driver'] != 'python':
             plugin_config = self.config['plugins'][plugin_name].get('config', {})
             for key, value in plugin_config.items():
                 env_key = key.upper().replace('-', '_').replace('.', '_')
@@ -241,37 +470,169 @@ class PluginManager:
             for key, value in self.config['azure'].items():
                 env[f'AZURE_{key.upper()}'] = str(value)
         
+        timeout = self.config.get('settings', {}).get('installation_timeout', 600)
+        started = time.monotonic()
+        installed = self.run_python_hook(plugin_name, 'install', env, timeout)
+        if installed is not None:
+            if installed:
+                logging.info(f"✅ Plugin {plugin_name} installed successfully ({time.monotonic() - started:.1f}s)")
+            return installed
+        
+        release = self.get_helm_release(plugin_name)
+        if release is not None:
+            return self.install_helm_release(release, env)
+        
         # Execute installation script
         install_script = plugin_dir / "install.sh"
         try:
             logging.info(f"Executing installation script: {install_script}")
-            result = subprocess.run(
-                [str(install_script)],
-                env=env,
-                cwd=plugin_dir,
-                capture_output=True,
-                text=True,
-                timeout=self.config.get('settings', {}).get('installation_timeout', 600)
-            )
+            result = self.run_plugin_script(plugin_name, install_script, env, timeout)
             
-            if result.returncode == 0:
-                logging.info(f"✅ Plugin {plugin_name} installed successfully")
-                logging.debug(f"Installation output: {result.stdout}")
+            if result.timed_out:
+                logging.error(f"❌ Plugin {plugin_name} installation timed out after {timeout}s")
+                self.log_output_tail(plugin_name, result)
+                return False
+            elif result.returncode == 0:
+                logging.info(f"✅ Plugin {plugin_name} installed successfully ({result.duration:.1f}s)")
                 return True
             else:
                 logging.error(f"❌ Plugin {plugin_name} installation failed (exit code: {result.returncode})")
-                logging.error(f"Error output: {result.stderr}")
-                if result.stdout:
-                    logging.error(f"Standard output: {result.stdout}")
+                self.log_output_tail(plugin_name, result)
                 return False
                 
-        except subprocess.TimeoutExpired:
-            logging.error(f"❌ Plugin {plugin_name} installation timed out")
+        except Exception as e:
+            logging.error(f"❌ Plugin {plugin_name} installation error: {e}")
             return False
+    
+    def run_python_hook(self, plugin_name: str, hook: str, env: Dict[str, str], timeout: float,
+                        log_failures: bool = True) -> Optional[bool]:
+        """Call a hook of a python-driver plugin in process
+        
+        Returns None when the plugin is not a Python plugin or leaves the hook
+        to its scripts. Unlike scripts, a hook cannot be killed on timeout:
+        the plugin gets the timeout as a deadline that cuts off the commands
+        it runs, and a hook that still overruns it counts as failed.
+        """
+        entry = self.plugin_index.get(plugin_name)
+        if not entry or entry['installation_driver'] != 'python':
+            return None
+        
+        log = logging.error if log_failures else logging.debug
+        plugin = None
+        try:
+            plugin_class = load_plugin_class(self.plugins_dir / plugin_name)
+            if not plugin_class.implements(hook):
+                return None
+            plugin_config = self.config.get('plugins', {}).get(plugin_name, {}).get('config', {})
+            deadline = time.monotonic() + timeout
+            plugin = plugin_class(plugin_name, self.plugins_dir / plugin_name, env, plugin_config, deadline=deadline)
+            with self.tracer.span('plugin.hook', **{'plugin.name': plugin_name, 'plugin.hook': hook}) as span:
+                result = getattr(plugin, hook)()
+                if result is not False and time.monotonic() > deadline:
+                    raise PluginError(f"{hook} timed out after {timeout}s")
+                if result is False:
+                    span.set_error('returned False')
+            return result is not False
+        except PluginError as e:
+            log(f"❌ Plugin {plugin_name} {hook} failed: {e}")
         except Exception as e:
+            log(f"❌ Plugin {plugin_name} {hook} error: {e}", exc_info=True)
+        
+        if hook == 'install' and plugin is not None:
+            try:
+                # Cleanup gets its own time budget; the install may have used up the deadline
+                plugin.deadline = time.monotonic() + timeout
+                plugin.cleanup_on_failure()
+            except Exception as e:
+                logging.error(f"❌ Plugin {plugin_name} cleanup failed: {e}")
+        return False
+    
+    def get_helm_release(self, plugin_name: str) -> Optional[Dict]:
+        """Helm release of a plugin installed by the native Helm driver, or None if it uses scripts"""
+        installation = self.get_nested_value(self.load_plugin_spec(plugin_name) or {}, ['plugin', 'installation']) or {}
+        if installation_driver(installation) != 'native':
+            return None
+        return release_spec(plugin_name, installation, self.cloud_provider, self.plugins_dir / plugin_name)
+    
+    def prepare_helm_releases(self, plugins: List[Dict]) -> bool:
+        """Add/update chart repositories and create namespaces for every native-driver plugin of the run at once
+        
+        Plugins the install state shows as unchanged are left out, so a run
+        with nothing to install does not refresh any repository.
+        """
+        if self.dry_run:
+            return True
+        cluster_name = self.config.get('cluster_name', '')
+        releases = []
+        for plugin in plugins:
+            release = self.get_helm_release(plugin['name'])
+            if release is None:
+                continue
+            previous = self.install_state.get(cluster_name, self.environment, plugin['name'])
+            if not self.force and previous and previous.get('fingerprint') == self.plugin_fingerprint(plugin):
+                continue
+            releases.append(release)
+        if not releases:
+            return True
+        
+        env = os.environ.copy()
+        env.update(self.extra_env)
+        try:
+            with self.tracer.span('helm.prepare', releases=len(releases)):
+                self.helm.prepare(releases, env)
+            return True
+        except HelmError as e:
+            logging.error(f"❌ Preparing Helm releases failed: {e}")
+            if e.result is not None:
+                self.log_output_tail('helm', e.result)
+            return False
+    
+    def install_helm_release(self, release: Dict, env: Dict[str, str]) -> bool:
+        """Install a plugin with the native Helm driver"""
+        plugin_name = release['plugin']
+        timeout = self.config.get('settings', {}).get('installation_timeout', 600)
+        logging.info(f"⎈ Installing {release['chart']} {release['version'] or ''} as release "
+                     f"{release['release']} in namespace {release['namespace']}")
+        try:
+            with self.tracer.span('helm.upgrade', **{'plugin.name': plugin_name, 'helm.chart': release['chart']}):
+                result = self.helm.install(release, env, timeout)
+            logging.info(f"✅ Plugin {plugin_name} installed successfully ({result.duration:.1f}s)")
+            return True
+        except HelmError as e:
+            logging.error(f"❌ Plugin {plugin_name} installation failed: {e}")
+            if e.result is not None:
+                self.log_output_tail(plugin_name, e.result)
+            return False
+        except OSError as e:
             logging.error(f"❌ Plugin {plugin_name} installation error: {e}")
             return False
     
+    def run_plugin_script(self, plugin_name: str, script: Path, env: Dict[str, str], timeout: float,
+                          log_level: int = logging.INFO) -> ProcessResult:
+        """Run a plugin script, streaming its output to the log prefixed with the plugin name"""
+        tail_kb = self.config.get('settings', {}).get('output_tail_kb', 64)
+        with self.tracer.span('process', **{'plugin.name': plugin_name, 'process.command': str(script)}) as span:
+            result = run_streaming(
+                [str(script.resolve())],
+                env=env,
+                cwd=script.parent,
+                timeout=timeout,
+                prefix=plugin_name,
+                tail_bytes=int(tail_kb * 1024),
+                log_level=log_level,
+            )
+            span.set_attribute('process.exit_code', result.returncode)
+            span.set_attribute('process.timed_out', result.timed_out)
+            if result.timed_out or result.returncode != 0:
+                span.set_error('timed out' if result.timed_out else f"exit code {result.returncode}")
+            return result
+    
+    def log_output_tail(self, plugin_name: str, result: ProcessResult) -> None:
+        """Log the retained tail of a failed script's output"""
+        if result.output_tail:
+            logging.error(f"Last output from {plugin_name}:\n{result.output_tail.rstrip()}")
+    
+    @traced('plugin.uninstall')
     def uninstall_plugin(self, plugin_name: str) -> bool:
         """Uninstall a single plugin"""
         plugin_dir = self.plugins_dir / plugin_name
@@ -283,31 +644,49 @@ class PluginManager:
             logging.info(f"[DRY-RUN] Would uninstall {plugin_name}")
             return True
         
-        if uninstall_script.exists():
+        release = self.get_helm_release(plugin_name)
+        if release is not None:
             env = os.environ.copy()
-            env.update({
-                'PLUGIN_NAME': plugin_name,
-                'CLOUD_PROVIDER': self.cloud_provider,
-                'ENVIRONMENT': self.environment,
-                'CLUSTER_NAME': self.config.get('cluster_name', ''),
-            })
-            
+            env.update(self.extra_env)
             try:
-                result = subprocess.run(
-                    [str(uninstall_script)],
-                    env=env,
-                    cwd=plugin_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
+                self.helm.uninstall(release, env)
+            except (HelmError, OSError) as e:
+                logging.error(f"❌ Plugin {plugin_name} uninstallation failed: {e}")
+                if isinstance(e, HelmError) and e.result is not None:
+                    self.log_output_tail(plugin_name, e.result)
+                return False
+            logging.info(f"✅ Plugin {plugin_name} uninstalled successfully")
+            self.install_state.forget(self.config.get('cluster_name', ''), self.environment, plugin_name)
+            return True
+        
+        env = os.environ.copy()
+        env.update({
+            'PLUGIN_NAME': plugin_name,
+            'CLOUD_PROVIDER': self.cloud_provider,
+            'ENVIRONMENT': self.environment,
+            'CLUSTER_NAME': self.config.get('cluster_name', ''),
+        })
+        env.update(self.extra_env)
+        
+        uninstalled = self.run_python_hook(plugin_name, 'uninstall', env, 300)
+        if uninstalled is not None:
+            if uninstalled:
+                logging.info(f"✅ Plugin {plugin_name} uninstalled successfully")
+                self.install_state.forget(self.config.get('cluster_name', ''), self.environment, plugin_name)
+            return uninstalled
+        
+        if uninstall_script.exists():
+            try:
+                result = self.run_plugin_script(plugin_name, uninstall_script, env, 300)
                 
-                if result.returncode == 0:
+                if result.returncode == 0 and not result.timed_out:
                     logging.info(f"✅ Plugin {plugin_name} uninstalled successfully")
+                    self.install_state.forget(self.config.get('cluster_name', ''), self.environment, plugin_name)
                     return True
                 else:
-                    logging.error(f"❌ Plugin {plugin_name} uninstallation failed:")
-                    logging.error(result.stderr)
+                    reason = "timed out" if result.timed_out else f"exit code: {result.returncode}"
+                    logging.error(f"❌ Plugin {plugin_name} uninstallation failed ({reason})")
+                    self.log_output_tail(plugin_name, result)
                     return False
                     
             except Exception as e:
@@ -317,44 +696,107 @@ class PluginManager:
             logging.warning(f"⚠️ Uninstall script not found for plugin: {plugin_name}")
             return True
     
-    def health_check_plugin(self, plugin_name: str) -> bool:
+    @traced('plugin.health_check')
+    def health_check_plugin(self, plugin_name: str, timeout: float = 60, log_failures: bool = True) -> bool:
         """Perform health check for a plugin"""
         plugin_dir = self.plugins_dir / plugin_name
         health_script = plugin_dir / "health-check.sh"
+        env = os.environ.copy()
+        env.update({
+            'PLUGIN_NAME': plugin_name,
+            'CLOUD_PROVIDER': self.cloud_provider,
+            'ENVIRONMENT': self.environment,
+        })
+        env.update(self.extra_env)
+        
+        started = time.monotonic()
+        healthy = self.run_python_hook(plugin_name, 'health_check', env, timeout, log_failures=log_failures)
+        if healthy is not None:
+            labels = self.metric_labels(plugin=plugin_name)
+            self.metrics.observe('plugin_manager_health_check_duration_seconds', labels, time.monotonic() - started)
+            self.metrics.inc('plugin_manager_health_checks_total', dict(labels, result='pass' if healthy else 'fail'))
+            if healthy:
+                logging.info(f"✅ Plugin {plugin_name} health check passed")
+            else:
+                (logging.warning if log_failures else logging.debug)(f"⚠️ Plugin {plugin_name} health check failed")
+            return healthy
         
         if health_script.exists():
             try:
-                env = os.environ.copy()
-                env.update({
-                    'PLUGIN_NAME': plugin_name,
-                    'CLOUD_PROVIDER': self.cloud_provider,
-                    'ENVIRONMENT': self.environment,
-                })
+                # Health probes are frequent; stream their output at debug level only
+                result = self.run_plugin_script(plugin_name, health_script, env, timeout, log_level=logging.DEBUG)
                 
-                result = subprocess.run(
-                    [str(health_script)],
-                    env=env,
-                    cwd=plugin_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
+                healthy = result.returncode == 0 and not result.timed_out
+                labels = self.metric_labels(plugin=plugin_name)
+                self.metrics.observe('plugin_manager_health_check_duration_seconds', labels, result.duration)
+                self.metrics.inc('plugin_manager_health_checks_total', dict(labels, result='pass' if healthy else 'fail'))
                 
-                if result.returncode == 0:
+                if healthy:
                     logging.info(f"✅ Plugin {plugin_name} health check passed")
                     return True
                 else:
-                    logging.warning(f"⚠️ Plugin {plugin_name} health check failed:")
-                    logging.warning(result.stderr)
+                    log = logging.warning if log_failures else logging.debug
+                    reason = f"timed out after {timeout:.0f}s" if result.timed_out else f"exit code: {result.returncode}"
+                    log(f"⚠️ Plugin {plugin_name} health check failed ({reason}):")
+                    log(result.output_tail)
                     return False
                     
             except Exception as e:
-                logging.error(f"❌ Plugin {plugin_name} health check error: {e}")
+                log = logging.error if log_failures else logging.debug
+                log(f"❌ Plugin {plugin_name} health check error: {e}")
                 return False
         else:
             logging.info(f"ℹ️ No health check script for plugin: {plugin_name}")
             return True  # No health check script means healthy
     
+    def get_health_check_policy(self, plugin_name: str) -> Dict:
+        """Get readiness polling parameters from plugin.yaml, falling back to global settings"""
+        settings = self.config.get('settings', {})
+        plugin_spec = self.load_plugin_spec(plugin_name) or {}
+        health_check = self.get_nested_value(plugin_spec, ['plugin', 'health_check']) or {}
+        
+        return {
+            'initial_delay': float(health_check.get('initial_delay', 0)),
+            'timeout': float(health_check.get('timeout', 60)),
+            'retries': int(health_check.get('retries', settings.get('health_check_retries', 5))),
+            'max_interval': float(settings.get('health_check_interval', 30)),
+        }
+    
+    @traced('plugin.wait_ready')
+    def wait_for_plugin_ready(self, plugin_name: str) -> Tuple[bool, float]:
+        """Poll a plugin's health check until it passes, with exponential backoff and jitter
+        
+        Probing starts immediately. Failed probes during the plugin's
+        initial_delay are expected and free; after that, up to `retries` further
+        failures are tolerated. Each probe is bounded by the plugin's timeout.
+        Returns whether the plugin became ready and the time it took.
+        """
+        policy = self.get_health_check_policy(plugin_name)
+        started = time.monotonic()
+        grace_deadline = started + policy['initial_delay']
+        delay = 1.0
+        attempts = 0
+        failures = 0
+        
+        while True:
+            attempts += 1
+            if self.health_check_plugin(plugin_name, timeout=policy['timeout'], log_failures=False):
+                elapsed = time.monotonic() - started
+                logging.info(f"⏱️ Plugin {plugin_name} ready after {elapsed:.1f}s ({attempts} probe(s))")
+                return True, elapsed
+            
+            if time.monotonic() >= grace_deadline:
+                failures += 1
+                if failures > policy['retries']:
+                    break
+            
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, policy['max_interval'])
+        
+        elapsed = time.monotonic() - started
+        logging.warning(f"⚠️ Plugin {plugin_name} not ready after {elapsed:.1f}s ({attempts} probe(s))")
+        return False, elapsed
+    
     def install_all_plugins(self, specific_plugins: Optional[List[str]] = None) -> bool:
         """Install all enabled plugins or specific plugins"""
         logging.info("🚀 Starting plugin installation process")
@@ -369,58 +811,325 @@ class PluginManager:
         
         # Resolve dependencies
         try:
-            ordered_plugins = self.resolve_dependencies(enabled_plugins)
+            levels = self.resolve_dependency_levels(enabled_plugins)
+            ordered_plugins = [plugin for level in levels for plugin in level]
             logging.info("✅ Dependencies resolved successfully")
             
             # Log installation order
             plugin_names = [p['name'] for p in ordered_plugins]
             logging.info(f"Installation order: {' -> '.join(plugin_names)}")
+            for depth, level in enumerate(levels, start=1):
+                logging.info(f"  Wave {depth}: {', '.join(p['name'] for p in level)}")
             
         except Exception as e:
             logging.error(f"❌ Dependency resolution failed: {e}")
             return False
         
-        # Install plugins in order
-        failed_plugins = []
-        installed_plugins = []
+        # Validate every plugin before installing any, so manifest errors surface up front
+        invalid_plugins = [name for name in plugin_names if not self.validate_plugin(name)]
+        if invalid_plugins:
+            logging.error(f"❌ Invalid plugins, nothing installed: {invalid_plugins}")
+            return False
         
-        for plugin in ordered_plugins:
-            plugin_name = plugin['name']
-            
-            if self.install_plugin(plugin):
-                installed_plugins.append(plugin_name)
-                
-                # Perform health check after installation
-                if not self.dry_run:
-                    time.sleep(5)  # Wait a bit before health check
-                    if not self.health_check_plugin(plugin_name):
-                        logging.warning(f"⚠️ Plugin {plugin_name} failed health check after installation")
-                        
-            else:
-                failed_plugins.append(plugin_name)
-                
-                if self.config.get('settings', {}).get('rollback_on_failure', True):
-                    logging.warning("🔄 Rolling back due to failure...")
-                    self.rollback_plugins(installed_plugins)
-                    return False
+        if not self.prepare_helm_releases(ordered_plugins):
+            return False
+        
+        # Install plugins as dependency waves
+        max_parallel = self.get_max_parallel()
+        logging.info(f"Installing with up to {max_parallel} plugin(s) in parallel")
+        
+        checkpoint, resumed = self.start_checkpoint(plugin_names)
+        
+        run_started = time.monotonic()
+        statuses, timings, installed_plugins = self.execute_install_dag(ordered_plugins, max_parallel, checkpoint, resumed)
+        self.log_timing_summary(ordered_plugins, statuses, timings, time.monotonic() - run_started)
+        
+        failed_plugins = [name for name, status in statuses.items() if status == 'failed']
+        
+        if failed_plugins and self.config.get('settings', {}).get('rollback_on_failure', True):
+            logging.warning("🔄 Rolling back due to failure...")
+            rollback_statuses = self.rollback_plugins(installed_plugins, failed_plugins)
+            checkpoint.forget([name for name, status in rollback_statuses.items() if status == 'uninstalled'])
+            return False
         
         if failed_plugins:
+            skipped_plugins = [name for name, status in statuses.items() if status == 'skipped']
             logging.error(f"❌ Failed to install plugins: {failed_plugins}")
+            if skipped_plugins:
+                logging.error(f"⏭️ Skipped plugins due to failed dependencies: {skipped_plugins}")
             return False
         
+        checkpoint.finish()
         logging.info("🎉 All plugins installed successfully!")
         return True
     
+    def start_checkpoint(self, plugin_names: List[str]) -> Tuple[RunCheckpoint, Dict[str, str]]:
+        """Start a run checkpoint, continuing the unfinished run for this cluster with --resume
+        
+        Returns the checkpoint and the plugins the resumed run already completed.
+        """
+        cluster_name = self.config.get('cluster_name', '')
+        checkpoint_name = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{cluster_name}-{self.environment}")
+        checkpoint_path = None if self.dry_run else self.state_dir / 'checkpoints' / f"{checkpoint_name}.json"
+        checkpoint = RunCheckpoint(checkpoint_path)
+        
+        previous = checkpoint.load() if self.resume else None
+        if previous:
+            completed = {name: status for name, status in previous['completed'].items() if name in plugin_names}
+            checkpoint.start(previous['run_id'], plugin_names, completed, started_at=previous['started_at'])
+            logging.info(f"↩️ Resuming run {previous['run_id']}: "
+                         f"{len(completed)}/{len(plugin_names)} plugin(s) already completed")
+            return checkpoint, completed
+        
+        if self.resume:
+            logging.info("↩️ No unfinished run to resume, starting a new run")
+        run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+        checkpoint.start(run_id, plugin_names)
+        logging.info(f"Run ID: {run_id}")
+        return checkpoint, {}
+    
+    def verify_resumed_plugin(self, plugin_name: str) -> bool:
+        """Confirm a plugin completed by an interrupted run is still healthy"""
+        if self.health_check_plugin(plugin_name, timeout=30, log_failures=False):
+            logging.info(f"↩️ {plugin_name}: completed in resumed run and healthy, not reinstalling")
+            return True
+        logging.info(f"↩️ {plugin_name}: completed in resumed run but unhealthy, reinstalling")
+        return False
+    
+    def get_max_parallel(self) -> int:
+        """Get the number of plugins that may be installed concurrently"""
+        settings = self.config.get('settings', {})
+        if not settings.get('parallel_installation', True):
+            return 1
+        return max(1, int(settings.get('max_parallel', 4)))
+    
+    @traced('plugin.reconcile')
+    def install_and_verify_plugin(self, plugin: Dict) -> str:
+        """Install a plugin and run its health check
+        
+        Returns 'installed', 'unchanged' (skipped because the install state
+        fingerprint matches) or 'failed'.
+        """
+        plugin_name = plugin['name']
+        components = self.plugin_fingerprint_components(plugin)
+        fingerprint = self.combine_fingerprint(components)
+        
+        labels = self.metric_labels(plugin=plugin_name)
+        if self.is_plugin_unchanged(plugin_name, fingerprint):
+            self.metrics.inc('plugin_manager_plugin_installs_total', dict(labels, result='unchanged'))
+            return 'unchanged'
+        
+        started = time.monotonic()
+        installed = self.install_plugin(plugin)
+        if not self.dry_run:
+            self.metrics.observe('plugin_manager_plugin_install_duration_seconds', labels, time.monotonic() - started)
+            self.metrics.inc('plugin_manager_plugin_installs_total', dict(labels, result='success' if installed else 'failure'))
+        if not installed:
+            return 'failed'
+        
+        # Poll until the plugin reports healthy
+        if not self.dry_run:
+            ready, time_to_ready = self.wait_for_plugin_ready(plugin_name)
+            self.ready_times[plugin_name] = time_to_ready
+            if ready:
+                self.metrics.observe('plugin_manager_plugin_ready_seconds', labels, time_to_ready)
+                self.install_state.record(
+                    self.config.get('cluster_name', ''), self.environment, plugin_name, fingerprint,
+                    duration=round(time.monotonic() - started, 3),
+                    time_to_ready=round(time_to_ready, 3),
+                    components=components,
+                )
+            else:
+                logging.warning(f"⚠️ Plugin {plugin_name} failed health check after installation")
+                # Only a healthy install counts as unchanged next time; the next run retries this one
+                self.install_state.forget(self.config.get('cluster_name', ''), self.environment, plugin_name)
+        
+        return 'installed'
+    
+    def plugin_fingerprint(self, plugin: Dict) -> str:
+        """Hash everything that determines the outcome of a plugin installation"""
+        return self.combine_fingerprint(self.plugin_fingerprint_components(plugin))
+    
+    def plugin_fingerprint_components(self, plugin: Dict) -> Dict[str, str]:
+        """Hash each input of a plugin installation separately
+        
+        Covers the merged plugin config, the cloud settings passed to the
+        installer, the plugin.yaml version and every file in the plugin
+        directory, so a plan can tell which of them changed.
+        """
+        plugin_name = plugin['name']
+        plugin_spec = self.load_plugin_spec(plugin_name) or {}
+        
+        def digest_of(value) -> str:
+            return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+        
+        index_entry = self.plugin_index.get(plugin_name)
+        
+        return {
+            # The configured plugin, not the resolved dependencies merged in from plugin.yaml
+            'config': digest_of(dict(self.config.get('plugins', {}).get(plugin_name, {}), name=plugin_name)),
+            'cloud': digest_of({'provider': self.cloud_provider, 'config': self.config.get(self.cloud_provider, {})}),
+            'version': str(self.get_nested_value(plugin_spec, ['plugin', 'version'])),
+            'files': index_entry['content_hash'] if index_entry else hashlib.sha256().hexdigest(),
+        }
+    
+    @staticmethod
+    def combine_fingerprint(components: Dict[str, str]) -> str:
+        return hashlib.sha256(json.dumps(components, sort_keys=True).encode()).hexdigest()
+    
+    def is_plugin_unchanged(self, plugin_name: str, fingerprint: str) -> bool:
+        """Check the install state and report the install/skip decision for a plugin"""
+        if self.force:
+            logging.info(f"🔁 {plugin_name}: --force set, reinstalling")
+            return False
+        
+        previous = self.install_state.get(self.config.get('cluster_name', ''), self.environment, plugin_name)
+        if previous is None:
+            logging.info(f"🆕 {plugin_name}: no previous install recorded, installing")
+            return False
+        if previous.get('fingerprint') != fingerprint:
+            logging.info(f"🔄 {plugin_name}: changed since {previous.get('installed_at')}, installing")
+            return False
+        
+        logging.info(f"⏭️ {plugin_name}: unchanged since {previous.get('installed_at')} ({fingerprint[:12]}), skipping")
+        return True
+    
+    def execute_install_dag(self, plugins: List[Dict], max_parallel: int, checkpoint: Optional[RunCheckpoint] = None,
+                            resumed: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, str], Dict[str, float], List[str]]:
+        """Install plugins concurrently, starting each one as soon as its dependencies are installed
+        
+        Plugins in `resumed` (completed by an interrupted run) are only probed
+        and reinstalled if unhealthy. Every outcome is saved to `checkpoint`.
+        
+        Returns the per-plugin status (installed, unchanged, resumed, failed,
+        skipped), the per-plugin duration in seconds and the plugins installed
+        by this run in completion order.
+        """
+        plugin_map = {p['name']: p for p in plugins}
+        waiting_on = {
+            name: {dep for dep in p.get('dependencies', []) if dep in plugin_map}
+            for name, p in plugin_map.items()
+        }
+        settings = self.config.get('settings', {})
+        # Only an 'all' rollback needs the run to stop; otherwise independent plugins carry on
+        stop_on_failure = settings.get('rollback_on_failure', True) and self.get_rollback_scope() == 'all'
+        
+        resumed = resumed or {}
+        
+        def install(plugin_name: str) -> str:
+            if plugin_name in resumed and self.verify_resumed_plugin(plugin_name):
+                status = 'resumed'
+            else:
+                status = self.install_and_verify_plugin(plugin_map[plugin_name])
+            if checkpoint is not None:
+                checkpoint.record(plugin_name, status)
+            return status
+        
+        statuses, timings, completed = self.execute_dag(
+            [p['name'] for p in plugins],
+            waiting_on,
+            install,
+            max_parallel,
+            stop_on_failure,
+        )
+        installed_plugins = [name for name in completed if statuses[name] in ('installed', 'resumed')]
+        return statuses, timings, installed_plugins
+    
+    def execute_dag(self, order: List[str], waiting_on: Dict[str, set], task, max_parallel: int,
+                    stop_on_failure: bool) -> Tuple[Dict[str, str], Dict[str, float], List[str]]:
+        """Run `task` for every node on a thread pool, starting each node once the nodes it waits on succeed
+        
+        `task` returns a status string; 'failed' (or an exception) marks the
+        node failed and everything waiting on it, transitively, as skipped.
+        With `stop_on_failure`, no new nodes are started after the first
+        failure. `order` is the tie-breaker among ready nodes.
+        
+        Returns per-node statuses, per-node durations and the successful nodes
+        in completion order.
+        """
+        waiting_on = {name: set(waiting_on.get(name, ())) for name in order}
+        dependents: Dict[str, List[str]] = {name: [] for name in order}
+        for name, blockers in waiting_on.items():
+            for blocker in blockers:
+                dependents[blocker].append(name)
+        
+        ready = [name for name in order if not waiting_on[name]]
+        statuses: Dict[str, str] = {}
+        timings: Dict[str, float] = {}
+        completed: List[str] = []
+        aborted = False
+        
+        def skip_dependents(name: str) -> None:
+            for dependent in dependents[name]:
+                if dependent not in statuses:
+                    statuses[dependent] = 'skipped'
+                    logging.warning(f"⏭️ Skipping {dependent}: {name} did not succeed")
+                    skip_dependents(dependent)
+        
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='plugin') as executor:
+            running = {}
+            
+            while ready or running:
+                while ready and len(running) < max_parallel and not aborted:
+                    name = ready.pop(0)
+                    if name in statuses:
+                        continue
+                    running[executor.submit(self.tracer.bind(task), name)] = (name, time.monotonic())
+                
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started = running.pop(future)
+                    timings[name] = time.monotonic() - started
+                    
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ Plugin {name} error: {e}")
+                        status = 'failed'
+                    
+                    statuses[name] = status
+                    if status != 'failed':
+                        completed.append(name)
+                        for dependent in dependents[name]:
+                            waiting_on[dependent].discard(name)
+                            if not waiting_on[dependent] and dependent not in statuses:
+                                ready.append(dependent)
+                    else:
+                        skip_dependents(name)
+                        if stop_on_failure:
+                            aborted = True
+        
+        # Anything never started (aborted run) is reported as skipped
+        for name in order:
+            statuses.setdefault(name, 'skipped')
+        
+        return statuses, timings, completed
+    
+    def log_timing_summary(self, plugins: List[Dict], statuses: Dict[str, str], timings: Dict[str, float], wall_time: float,
+                           title: str = "Installation") -> None:
+        """Log per-plugin status and duration"""
+        icons = {'installed': '✅', 'unchanged': '💤', 'resumed': '↩️', 'uninstalled': '🗑️', 'failed': '❌', 'skipped': '⏭️'}
+        
+        logging.info(f"⏱️ {title} timing summary:")
+        for plugin in plugins:
+            plugin_name = plugin['name']
+            status = statuses.get(plugin_name, 'skipped')
+            duration = f"{timings[plugin_name]:.1f}s" if plugin_name in timings else "-"
+            ready = f"ready {self.ready_times[plugin_name]:.1f}s" if status == 'installed' and plugin_name in self.ready_times else ""
+            logging.info(f"  {icons[status]} {plugin_name:<40} {status:<11} {duration:>8}  {ready}")
+        
+        total = sum(timings.values())
+        logging.info(f"  Wall time: {wall_time:.1f}s (cumulative plugin time: {total:.1f}s)")
+    
     def uninstall_plugins(self, plugin_names: List[str]) -> bool:
         """Uninstall specific plugins"""
         logging.info(f"🗑️ Uninstalling plugins: {plugin_names}")
         
-        failed_plugins = []
-        
-        # Uninstall in reverse dependency order
-        for plugin_name in reversed(plugin_names):
-            if not self.uninstall_plugin(plugin_name):
-                failed_plugins.append(plugin_name)
+        statuses = self.uninstall_in_reverse_dependency_order(plugin_names, "Uninstall")
+        failed_plugins = [name for name in plugin_names if statuses[name] != 'uninstalled']
         
         if failed_plugins:
             logging.error(f"❌ Failed to uninstall plugins: {failed_plugins}")
@@ -429,33 +1138,400 @@ class PluginManager:
         logging.info("✅ All plugins uninstalled successfully!")
         return True
     
-    def rollback_plugins(self, plugin_names: List[str]) -> None:
-        """Rollback installed plugins"""
-        logging.info("🔄 Rolling back plugins...")
+    def get_rollback_scope(self) -> str:
+        """Get the rollback scope: 'all' installed plugins or only the failed plugins' 'dependents'"""
+        return self.rollback_scope or self.config.get('settings', {}).get('rollback_scope', 'all')
+    
+    def rollback_plugins(self, plugin_names: List[str], failed_plugins: Optional[List[str]] = None) -> Dict[str, str]:
+        """Rollback installed plugins
+        
+        With the 'all' scope every plugin in `plugin_names` is uninstalled. With
+        the 'dependents' scope only the failed plugins and the plugins in
+        `plugin_names` that depend on them (transitively) are uninstalled.
+        Plugins requiring a failed plugin are never installed (they are skipped),
+        so in practice these are the plugins that optionally depend on a failed
+        plugin, and the plugins that in turn depend on those.
+        """
+        scope = self.get_rollback_scope()
+        targets = list(plugin_names)
+        
+        if scope == 'dependents' and failed_plugins is not None:
+            depends_on = {}
+            for name in plugin_names:
+                dependencies = self.get_plugin_dependencies(name)
+                depends_on[name] = set(dependencies['required']) | set(dependencies['optional'])
+            affected = set(failed_plugins)
+            changed = True
+            while changed:
+                changed = False
+                for plugin_name in plugin_names:
+                    if plugin_name not in affected and affected.intersection(depends_on[plugin_name]):
+                        affected.add(plugin_name)
+                        changed = True
+            targets = list(failed_plugins) + [name for name in plugin_names if name in affected]
+        
+        logging.info(f"🔄 Rolling back plugins (scope: {scope}): {targets}")
+        self.metrics.inc('plugin_manager_rollbacks_total', self.metric_labels(scope=scope))
+        if not targets:
+            return {}
+        statuses = self.uninstall_in_reverse_dependency_order(targets, "Rollback")
+        for plugin_name, status in statuses.items():
+            self.metrics.inc('plugin_manager_rollback_plugins_total', self.metric_labels(plugin=plugin_name, result=status))
+        return statuses
+    
+    def uninstall_in_reverse_dependency_order(self, plugin_names: List[str], title: str) -> Dict[str, str]:
+        """Uninstall plugins concurrently, removing dependents before the plugins they depend on
         
-        # Uninstall in reverse order
-        for plugin_name in reversed(plugin_names):
-            self.uninstall_plugin(plugin_name)
+        Returns the per-plugin status (uninstalled, failed, skipped). A plugin is
+        skipped when one of its dependents could not be uninstalled.
+        """
+        names = list(dict.fromkeys(plugin_names))
+        name_set = set(names)
+        # On the reverse graph a plugin waits for every dependent being removed with it
+        waiting_on = {name: set() for name in names}
+        for name in names:
+            for dep in self.get_plugin_dependencies(name)['required']:
+                if dep in name_set and dep != name:
+                    waiting_on[dep].add(name)
+        
+        started = time.monotonic()
+        statuses, timings, _ = self.execute_dag(
+            list(reversed(names)),
+            waiting_on,
+            lambda plugin_name: 'uninstalled' if self.uninstall_plugin(plugin_name) else 'failed',
+            self.get_max_parallel(),
+            stop_on_failure=False,
+        )
+        self.log_timing_summary([{'name': name} for name in names], statuses, timings,
+                                time.monotonic() - started, title=title)
+        return statuses
     
-    def health_check_all_plugins(self, specific_plugins: Optional[List[str]] = None) -> bool:
-        """Perform health check on all plugins"""
-        logging.info("🔍 Performing health check on plugins")
+    def health_check_all_plugins(self, specific_plugins: Optional[List[str]] = None, concurrency: int = 1,
+                                 deadline: Optional[float] = None, report_file: Optional[str] = None,
+                                 report_format: str = 'json') -> bool:
+        """Perform health check on all plugins
+        
+        Runs up to `concurrency` health checks at once and logs each result as it
+        completes. `deadline` caps the wall time of the whole sweep in seconds;
+        checks still pending when it expires are reported as timed out.
+        """
+        logging.info(f"🔍 Performing health check on plugins (concurrency: {concurrency})")
         
         enabled_plugins = self.get_enabled_plugins(specific_plugins)
-        failed_plugins = []
+        sweep_started = time.monotonic()
+        started_at = datetime.now(timezone.utc)
+        results: Dict[str, Dict] = {}
+        
+        def check(plugin_name: str) -> Dict:
+            timeout = 60
+            if deadline is not None:
+                timeout = max(0.1, min(timeout, deadline - (time.monotonic() - sweep_started)))
+            probe_started = time.monotonic()
+            healthy = self.health_check_plugin(plugin_name, timeout=timeout)
+            return {'status': 'passed' if healthy else 'failed', 'latency': time.monotonic() - probe_started}
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='health')
+        futures = {executor.submit(self.tracer.bind(check), plugin['name']): plugin['name'] for plugin in enabled_plugins}
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                plugin_name = futures[future]
+                try:
+                    results[plugin_name] = future.result()
+                except Exception as e:
+                    logging.error(f"❌ Plugin {plugin_name} health check error: {e}")
+                    results[plugin_name] = {'status': 'failed', 'latency': 0.0}
+                logging.info(f"  [{len(results)}/{len(futures)}] {plugin_name}: "
+                             f"{results[plugin_name]['status']} ({results[plugin_name]['latency']:.2f}s)")
+        except FuturesTimeoutError:
+            logging.error(f"⏰ Health check sweep exceeded deadline of {deadline}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
         for plugin in enabled_plugins:
-            plugin_name = plugin['name']
-            if not self.health_check_plugin(plugin_name):
-                failed_plugins.append(plugin_name)
+            results.setdefault(plugin['name'], {'status': 'timeout', 'latency': time.monotonic() - sweep_started})
+        
+        sweep_duration = time.monotonic() - sweep_started
+        if report_file:
+            self.write_health_report(report_file, report_format, enabled_plugins, results, started_at, sweep_duration)
         
+        failed_plugins = [name for name, result in results.items() if result['status'] != 'passed']
         if failed_plugins:
             logging.error(f"❌ Health check failed for plugins: {failed_plugins}")
             return False
         
-        logging.info("✅ All plugins passed health check!")
+        logging.info(f"✅ All plugins passed health check in {sweep_duration:.1f}s!")
+        return True
+    
+    def write_health_report(self, report_file: str, report_format: str, plugins: List[Dict],
+                            results: Dict[str, Dict], started_at: datetime, duration: float) -> None:
+        """Write health check results as a JSON or JUnit XML report"""
+        cluster_name = self.config.get('cluster_name', '')
+        path = Path(report_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        if report_format == 'junit':
+            failures = sum(1 for r in results.values() if r['status'] != 'passed')
+            suite = ET.Element('testsuite', {
+                'name': f"plugin-health.{cluster_name or self.environment}",
+                'tests': str(len(plugins)),
+                'failures': str(failures),
+                'errors': '0',
+                'time': f"{duration:.3f}",
+                'timestamp': started_at.isoformat(),
+            })
+            for plugin in plugins:
+                result = results[plugin['name']]
+                case = ET.SubElement(suite, 'testcase', {
+                    'classname': f"{self.cloud_provider}.{self.environment}",
+                    'name': plugin['name'],
+                    'time': f"{result['latency']:.3f}",
+                })
+                if result['status'] != 'passed':
+                    ET.SubElement(case, 'failure', {'message': f"health check {result['status']}"})
+            ET.ElementTree(suite).write(path, encoding='utf-8', xml_declaration=True)
+        else:
+            report = {
+                'cluster_name': cluster_name,
+                'environment': self.environment,
+                'cloud_provider': self.cloud_provider,
+                'started_at': started_at.isoformat(),
+                'duration': round(duration, 3),
+                'results': [
+                    {
+                        'plugin': plugin['name'],
+                        'status': results[plugin['name']]['status'],
+                        'latency': round(results[plugin['name']]['latency'], 3),
+                    }
+                    for plugin in plugins
+                ],
+            }
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+        
+        logging.info(f"📝 Health report written to {path}")
+    
+    def for_cluster(self, cluster_name: str, kube_context: Optional[str] = None) -> 'PluginManager':
+        """Derive a manager for another cluster that shares this manager's parsed config layers
+        
+        The config is resolved again for the cluster, with the cluster's
+        variables (CLUSTER_NAME, KUBE_CONTEXT, KUBECONFIG) taking precedence
+        over the process environment, so templates such as a TXT owner of
+        `{{ CLUSTER_NAME }}` differ between the clusters of a fleet.
+        """
+        manager = copy.copy(self)
+        manager.ready_times = {}
+        manager.extra_env = dict(self.extra_env, CLUSTER_NAME=cluster_name)
+        if kube_context:
+            manager.extra_env['KUBE_CONTEXT'] = kube_context
+            if not self.dry_run:
+                manager.extra_env['KUBECONFIG'] = str(self.export_kubeconfig(kube_context))
+        
+        cluster_config = self.apply_cluster_layer(self.base_config, cluster_name)
+        manager.config = dict(self.resolve_template_variables(cluster_config, manager.extra_env), cluster_name=cluster_name)
+        return manager
+    
+    def export_kubeconfig(self, kube_context: str) -> Path:
+        """Write a standalone kubeconfig for one context so kubectl and helm target that cluster"""
+        result = subprocess.run(
+            ['kubectl', 'config', 'view', '--minify', '--flatten', '--context', kube_context],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode != 0:
+            raise Exception(f"Cannot export kubeconfig for context {kube_context}: {result.stderr.strip()}")
+        
+        kubeconfig_dir = self.state_dir / 'kubeconfigs'
+        kubeconfig_dir.mkdir(parents=True, exist_ok=True)
+        kubeconfig = kubeconfig_dir / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', kube_context)}.yaml"
+        kubeconfig.touch(mode=0o600)
+        # touch() keeps the mode of an existing file; the kubeconfig holds credentials
+        os.chmod(kubeconfig, 0o600)
+        kubeconfig.write_text(result.stdout)
+        return kubeconfig.resolve()
+    
+    def run_fleet(self, clusters: List[Tuple[str, Optional[str]]], action: str,
+                  specific_plugins: Optional[List[str]] = None, fleet_parallel: int = 2,
+                  **health_check_options) -> bool:
+        """Run install or health-check across several clusters using the already loaded config
+        
+        `clusters` holds (cluster_name, kube_context) pairs. Up to `fleet_parallel`
+        clusters are reconciled at once; within a cluster, settings.max_parallel
+        and --concurrency still bound plugin-level parallelism.
+        """
+        logging.info(f"🌐 Running {action} on {len(clusters)} cluster(s), {fleet_parallel} at a time")
+        
+        def reconcile_cluster(cluster_name: str, kube_context: Optional[str]) -> bool:
+            with self.tracer.span('cluster', **{'cluster.name': cluster_name}):
+                manager = self.for_cluster(cluster_name, kube_context)
+                if action == 'install':
+                    return manager.install_all_plugins(specific_plugins)
+                
+                options = dict(health_check_options)
+                if options.get('report_file'):
+                    report = Path(options['report_file'])
+                    options['report_file'] = str(report.with_name(f"{report.stem}-{cluster_name}{report.suffix}"))
+                return manager.health_check_all_plugins(specific_plugins, **options)
+        
+        def run_cluster(cluster_name: str, kube_context: Optional[str]) -> Tuple[bool, float]:
+            # Timed here rather than at submit, so time queued behind --fleet-parallel is not counted
+            started = time.monotonic()
+            try:
+                success = reconcile_cluster(cluster_name, kube_context)
+            except Exception as e:
+                logging.error(f"❌ Cluster {cluster_name} {action} error: {e}")
+                success = False
+            return success, time.monotonic() - started
+        
+        results: Dict[str, Tuple[bool, float]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, fleet_parallel), thread_name_prefix='cluster') as executor:
+            futures = {
+                executor.submit(self.tracer.bind(run_cluster), cluster_name, kube_context): cluster_name
+                for cluster_name, kube_context in clusters
+            }
+            
+            for future in as_completed(futures):
+                cluster_name = futures[future]
+                results[cluster_name] = future.result()
+                logging.info(f"{'✅' if results[cluster_name][0] else '❌'} Cluster {cluster_name} finished {action} "
+                             f"in {results[cluster_name][1]:.1f}s")
+        
+        logging.info("🌐 Fleet summary:")
+        for cluster_name, _ in clusters:
+            success, duration = results[cluster_name]
+            logging.info(f"  {'✅' if success else '❌'} {cluster_name:<40} {'ok' if success else 'failed':<8} {duration:>8.1f}s")
+        
+        failed_clusters = [name for name, (success, _) in results.items() if not success]
+        if failed_clusters:
+            logging.error(f"❌ {action} failed on clusters: {failed_clusters}")
+            return False
+        
         return True
     
+    def plan_plugins(self, specific_plugins: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
+        """Compare the desired plugin configs with the install state and print what an install would do
+        
+        Each plugin is planned as add (never installed here), change (its
+        fingerprint differs from the last successful install), no-op, or
+        remove (recorded as installed but no longer enabled). Plugins that
+        fail the validation an install runs first (e.g. no plugin directory)
+        are planned as invalid: an install of the plan would not start. The
+        install time of the plan is estimated from the durations of previous
+        installs.
+        
+        Returns the planned action per plugin, or None if the plan failed.
+        """
+        enabled_plugins = self.get_enabled_plugins(specific_plugins)
+        try:
+            ordered_plugins = self.resolve_dependencies(enabled_plugins)
+        except Exception as e:
+            logging.error(f"❌ Dependency resolution failed: {e}")
+            return None
+        
+        cluster_name = self.config.get('cluster_name', '')
+        recorded = self.install_state.entries(cluster_name, self.environment)
+        
+        actions: Dict[str, str] = {}
+        reasons: Dict[str, str] = {}
+        for plugin in ordered_plugins:
+            plugin_name = plugin['name']
+            if not self.validate_plugin(plugin_name):
+                actions[plugin_name] = 'invalid'
+                continue
+            previous = recorded.get(plugin_name)
+            components = self.plugin_fingerprint_components(plugin)
+            if previous is None:
+                actions[plugin_name] = 'add'
+            elif previous.get('fingerprint') == self.combine_fingerprint(components):
+                actions[plugin_name] = 'no-op'
+            else:
+                actions[plugin_name] = 'change'
+                previous_components = previous.get('components') or {}
+                changed = [name for name, digest in components.items() if previous_components.get(name) != digest]
+                reasons[plugin_name] = ', '.join(changed) if previous_components else 'fingerprint'
+        
+        if not specific_plugins:
+            for plugin_name in sorted(set(recorded) - set(actions)):
+                actions[plugin_name] = 'remove'
+        
+        # Estimate from this cluster's last install, else the mean over other clusters
+        estimates: Dict[str, Optional[float]] = {}
+        for plugin_name, action in actions.items():
+            if action not in ('add', 'change'):
+                continue
+            history = [recorded[plugin_name]] if plugin_name in recorded else self.install_state.history(plugin_name)
+            durations = [(h.get('duration') or 0) + (h.get('time_to_ready') or 0) for h in history if h.get('duration')]
+            estimates[plugin_name] = sum(durations) / len(durations) if durations else None
+        
+        # Critical path through the dependency DAG, treating no-op plugins as instant
+        finish: Dict[str, float] = {}
+        for plugin in ordered_plugins:
+            deps = [finish[dep] for dep in plugin.get('dependencies', []) if dep in finish]
+            finish[plugin['name']] = max(deps, default=0.0) + (estimates.get(plugin['name']) or 0.0)
+        
+        icons = {'add': '➕', 'change': '🔄', 'remove': '➖', 'no-op': '💤', 'invalid': '❌'}
+        logging.info(f"📝 Plan for cluster {cluster_name or '-'} ({self.environment}, {self.cloud_provider}):")
+        for plugin_name, action in actions.items():
+            detail = f"  ({reasons[plugin_name]})" if plugin_name in reasons else ''
+            estimate = estimates.get(plugin_name)
+            timing = f"  ~{estimate:.0f}s" if estimate is not None else ('  ~?' if plugin_name in estimates else '')
+            logging.info(f"  {icons[action]} {plugin_name:<40} {action:<7}{timing}{detail}".rstrip())
+        
+        counts = {action: list(actions.values()).count(action) for action in icons}
+        logging.info(f"Plan: {counts['add']} to add, {counts['change']} to change, "
+                     f"{counts['remove']} to remove, {counts['no-op']} unchanged")
+        if counts['invalid']:
+            logging.error(f"❌ {counts['invalid']} invalid plugin(s); an install would not start: "
+                          f"{[name for name, action in actions.items() if action == 'invalid']}")
+        
+        known = [e for e in estimates.values() if e is not None]
+        unknown = len(estimates) - len(known)
+        if known:
+            logging.info(f"⏱️ Estimated install time: {max(finish.values(), default=0.0):.0f}s critical path, "
+                         f"{sum(known):.0f}s cumulative"
+                         + (f" ({unknown} plugin(s) without install history not included)" if unknown else ""))
+        elif unknown:
+            logging.info(f"⏱️ No install history to estimate the install time of {unknown} plugin(s) from")
+        
+        return actions
+    
+    def metric_labels(self, **labels) -> Dict[str, str]:
+        """Labels shared by every metric of this manager's cluster, plus `labels`"""
+        return dict(
+            cluster=self.config.get('cluster_name', ''),
+            environment=self.environment,
+            cloud_provider=self.cloud_provider,
+            **labels,
+        )
+    
+    def export_metrics(self, action: str, success: bool, duration: float, textfile: Optional[str] = None,
+                       pushgateway: Optional[str] = None) -> None:
+        """Record the outcome of this run, save the cumulative metrics and export them
+        
+        Metrics go to a node-exporter textfile collector file and/or a
+        Pushgateway. Export problems are logged but never fail the run.
+        """
+        if self.dry_run:
+            logging.info("[DRY-RUN] Not recording or exporting metrics")
+            return
+        
+        labels = self.metric_labels(action=action)
+        self.metrics.set('plugin_manager_last_run_timestamp_seconds', labels, round(time.time(), 3))
+        self.metrics.set('plugin_manager_last_run_success', labels, 1 if success else 0)
+        self.metrics.set('plugin_manager_last_run_duration_seconds', labels, round(duration, 3))
+        
+        try:
+            self.metrics.save(self.state_dir / 'metrics-state.json')
+            if textfile:
+                self.metrics.write_textfile(Path(textfile))
+                logging.info(f"📈 Metrics written to {textfile}")
+            if pushgateway:
+                self.metrics.push(pushgateway, 'plugin-manager',
+                                  {'environment': self.environment, 'cloud_provider': self.cloud_provider})
+                logging.info(f"📈 Metrics pushed to {pushgateway}")
+        except Exception as e:
+            logging.warning(f"⚠️ Could not export metrics: {e}")
+    
     def list_plugins(self) -> None:
         """List all available plugins with their status"""
         logging.info("📋 Available Plugins:")
@@ -507,10 +1583,40 @@ def main():
     parser.add_argument('config_file', help='Path to plugins configuration file')
     parser.add_argument('environment', help='Target environment (dev, staging, prod)')
     parser.add_argument('cloud_provider', help='Cloud provider (aws, azure)')
-    parser.add_argument('--action', choices=['install', 'uninstall', 'health-check', 'list'], 
+    parser.add_argument('--action', choices=['install', 'uninstall', 'health-check', 'list', 'plan', 'index', 'prefetch'], 
                        default='install', help='Action to perform')
     parser.add_argument('--plugins', help='Comma-separated list of specific plugins')
     parser.add_argument('--dry-run', action='store_true', help='Dry run mode')
+    parser.add_argument('--force', action='store_true',
+                       help='Reinstall plugins even if unchanged since the last successful install')
+    parser.add_argument('--detailed-exitcode', action='store_true',
+                       help='With --action plan, exit with status 2 when the plan has changes')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the last unfinished install run, health-probing completed plugins '
+                            'instead of reinstalling them')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Number of health checks to run in parallel')
+    parser.add_argument('--deadline', type=float,
+                       help='Maximum wall time in seconds for the health-check sweep')
+    parser.add_argument('--report-file', help='Write a health-check report to this file')
+    parser.add_argument('--report-format', choices=['json', 'junit'], default='json',
+                       help='Format of the health-check report')
+    parser.add_argument('--rollback-scope', choices=['all', 'dependents'],
+                       help='On install failure, roll back all plugins installed in this run (default) '
+                            'or only the failed plugins and the installed plugins that optionally depend on them')
+    parser.add_argument('--clusters',
+                       help='Comma-separated kubeconfig contexts to reconcile in one run; '
+                            'use name=context to set a cluster name different from the context')
+    parser.add_argument('--trace-file',
+                       help='Write timing spans of this run to a trace file')
+    parser.add_argument('--trace-format', choices=TRACE_FORMATS, default='otel',
+                       help='Trace file format: OpenTelemetry OTLP/JSON or Chrome trace events')
+    parser.add_argument('--metrics-textfile',
+                       help='Write Prometheus metrics to this file, e.g. in the node-exporter textfile collector directory')
+    parser.add_argument('--metrics-pushgateway',
+                       help='Push Prometheus metrics to this Pushgateway URL')
+    parser.add_argument('--fleet-parallel', type=int, default=2,
+                       help='Number of clusters to reconcile at the same time with --clusters')
     
     args = parser.parse_args()
     
@@ -518,30 +1624,72 @@ def main():
     if args.plugins:
         specific_plugins = [p.strip() for p in args.plugins.split(',')]
     
+    tracer = Tracer(attributes={
+        'plugin_manager.action': args.action,
+        'deployment.environment': args.environment,
+        'cloud.provider': args.cloud_provider,
+    })
+    
+    manager = None
+    run_started = time.monotonic()
     try:
-        manager = PluginManager(args.config_file, args.environment, args.cloud_provider, args.dry_run)
-        
-        if args.action == 'install':
-            success = manager.install_all_plugins(specific_plugins)
-        elif args.action == 'uninstall':
-            if not specific_plugins:
-                logging.error("--plugins is required for uninstall action")
+        with tracer.span(f"plugin-manager {args.action}", dry_run=args.dry_run):
+            manager = PluginManager(args.config_file, args.environment, args.cloud_provider, args.dry_run,
+                                    force=args.force, resume=args.resume, tracer=tracer)
+            manager.rollback_scope = args.rollback_scope
+            
+            if args.clusters:
+                if args.action not in ('install', 'health-check'):
+                    logging.error("--clusters is only supported for install and health-check actions")
+                    sys.exit(1)
+                clusters = []
+                for entry in args.clusters.split(','):
+                    name, _, context = entry.strip().partition('=')
+                    clusters.append((name, context or name))
+                success = manager.run_fleet(clusters, args.action, specific_plugins, args.fleet_parallel,
+                                            concurrency=args.concurrency, deadline=args.deadline,
+                                            report_file=args.report_file, report_format=args.report_format)
+            elif args.action == 'install':
+                success = manager.install_all_plugins(specific_plugins)
+            elif args.action == 'uninstall':
+                if not specific_plugins:
+                    logging.error("--plugins is required for uninstall action")
+                    sys.exit(1)
+                success = manager.uninstall_plugins(specific_plugins)
+            elif args.action == 'health-check':
+                success = manager.health_check_all_plugins(specific_plugins, concurrency=args.concurrency,
+                                                           deadline=args.deadline, report_file=args.report_file,
+                                                           report_format=args.report_format)
+            elif args.action == 'plan':
+                actions = manager.plan_plugins(specific_plugins)
+                success = actions is not None and 'invalid' not in actions.values()
+                if success and args.detailed_exitcode and any(a != 'no-op' for a in actions.values()):
+                    sys.exit(2)
+            elif args.action == 'index':
+                success = manager.index_plugins()
+            elif args.action == 'prefetch':
+                success = manager.prefetch_charts(specific_plugins)
+            elif args.action == 'list':
+                manager.list_plugins()
+                success = True
+            else:
+                logging.error(f"Unknown action: {args.action}")
                 sys.exit(1)
-            success = manager.uninstall_plugins(specific_plugins)
-        elif args.action == 'health-check':
-            success = manager.health_check_all_plugins(specific_plugins)
-        elif args.action == 'list':
-            manager.list_plugins()
-            success = True
-        else:
-            logging.error(f"Unknown action: {args.action}")
-            sys.exit(1)
-        
-        sys.exit(0 if success else 1)
-        
+            
+            sys.exit(0 if success else 1)
+            
     except Exception as e:
         logging.error(f"Plugin manager error: {e}")
         sys.exit(1)
+    finally:
+        if args.trace_file:
+            tracer.export(args.trace_file, args.trace_format)
+            logging.info(f"🧭 Trace with {len(tracer.spans)} span(s) written to {args.trace_file}")
+        if manager is not None and (args.metrics_textfile or args.metrics_pushgateway):
+            # Every path out of the try block is a sys.exit(); its code is the run's outcome
+            exit_code = getattr(sys.exc_info()[1], 'code', 1)
+            manager.export_metrics(args.action, exit_code in (0, None, 2), time.monotonic() - run_started,
+                                   textfile=args.metrics_textfile, pushgateway=args.metrics_pushgateway)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
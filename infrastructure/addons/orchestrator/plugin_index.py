@@ -0,0 +1,264 @@
+"""
+Manifest index of the Kubernetes Add-ons plugin directories.
+
+Scanning a plugin directory means listing its files, hashing their content,
+parsing plugin.yaml and validating it against the manifest schema. The index
+keeps the result for every directory (name, version, capabilities,
+dependencies, cloud providers, content hash and validation errors) in one
+compact JSON file. A directory is only rescanned when the size or mtime of
+one of its files changed, and only revalidated when its content hash changed.
+Each directory is checked at most once per PluginIndex instance, so repeated
+lookups during a run are dictionary reads.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config_cache import load_yaml
+
+INDEX_VERSION = 3
+
+REQUIRED_FILES = ('plugin.yaml', 'install.sh')
+INSTALL_METHODS = ('helm', 'kubectl', 'script')
+# 'native' installs helm-method plugins with the built-in Helm driver,
+# 'python' runs the PythonPlugin defined in the plugin's plugin.py in process
+INSTALL_DRIVERS = ('native', 'python', 'script')
+
+# Build artefacts that never change what a plugin installs
+IGNORED_DIRS = {'__pycache__'}
+IGNORED_SUFFIXES = ('.pyc', '.pyo')
+
+
+def plugin_files(plugin_dir: Path) -> List[Path]:
+    """Files of a plugin directory in a stable order"""
+    files = []
+    for root, dirs, names in os.walk(plugin_dir):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+        files.extend(Path(root) / name for name in names if not name.endswith(IGNORED_SUFFIXES))
+    return sorted(files)
+
+
+def stat_signature(plugin_dir: Path, files: List[Path]) -> str:
+    """Cheap change detector: hash of every file's path, size and mtime"""
+    digest = hashlib.sha1()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path.relative_to(plugin_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def content_hash(plugin_dir: Path, files: List[Path]) -> str:
+    """SHA-256 of every file's relative path and content"""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(str(path.relative_to(plugin_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _check(errors: List[str], data: Dict, field: str, types: Tuple[type, ...], required: bool = False):
+    value = data.get(field.rsplit('.', 1)[-1]) if isinstance(data, dict) else None
+    if value is None:
+        if required:
+            errors.append(f"Required field missing in plugin.yaml: {field}")
+        return None
+    if not isinstance(value, types) or isinstance(value, bool) and bool not in types:
+        errors.append(f"plugin.yaml field {field} must be {' or '.join(t.__name__ for t in types)}")
+        return None
+    return value
+
+
+def _check_string_list(errors: List[str], data: Dict, field: str) -> List[str]:
+    values = _check(errors, data, field, (list,))
+    if values is None:
+        return []
+    if not all(isinstance(v, str) for v in values):
+        errors.append(f"plugin.yaml field {field} must be a list of strings")
+        return []
+    return values
+
+
+def validate_manifest(spec, directory_name: str) -> List[str]:
+    """Validate a parsed plugin.yaml against the manifest schema, returning the errors"""
+    errors: List[str] = []
+    plugin = spec.get('plugin') if isinstance(spec, dict) else None
+    if not isinstance(plugin, dict):
+        return ["Required field missing in plugin.yaml: plugin"]
+
+    name = _check(errors, plugin, 'plugin.name', (str,), required=True)
+    if name and name != directory_name:
+        errors.append(f"plugin.yaml name '{name}' does not match directory '{directory_name}'")
+    _check(errors, plugin, 'plugin.version', (str, int, float), required=True)
+    _check(errors, plugin, 'plugin.priority', (int,))
+    _check_string_list(errors, plugin, 'plugin.capabilities')
+    _check_string_list(errors, plugin, 'plugin.cloud_providers')
+
+    dependencies = _check(errors, plugin, 'plugin.dependencies', (dict,)) or {}
+    for kind in ('required', 'optional', 'conflicts'):
+        _check_string_list(errors, dependencies, f"plugin.dependencies.{kind}")
+
+    installation = _check(errors, plugin, 'plugin.installation', (dict,)) or {}
+    method = _check(errors, installation, 'plugin.installation.method', (str,))
+    if method is not None and method not in INSTALL_METHODS:
+        errors.append(f"plugin.yaml field plugin.installation.method must be one of {', '.join(INSTALL_METHODS)}")
+    if method == 'helm':
+        _check(errors, installation, 'plugin.installation.chart', (str,), required=True)
+    driver = _check(errors, installation, 'plugin.installation.driver', (str,))
+    if driver is not None and driver not in INSTALL_DRIVERS:
+        errors.append(f"plugin.yaml field plugin.installation.driver must be one of {', '.join(INSTALL_DRIVERS)}")
+    _check_string_list(errors, installation, 'plugin.installation.values')
+
+    health_check = _check(errors, plugin, 'plugin.health_check', (dict,)) or {}
+    for field in ('timeout', 'retries', 'initial_delay', 'interval'):
+        value = _check(errors, health_check, f"plugin.health_check.{field}", (int, float))
+        if value is not None and value < 0:
+            errors.append(f"plugin.yaml field plugin.health_check.{field} must not be negative")
+
+    return errors
+
+
+def installation_driver(installation: Dict) -> str:
+    """'python' if requested, 'native' for helm-method plugins that did not opt out of the Helm driver, else 'script'"""
+    if installation.get('driver') == 'python':
+        return 'python'
+    if installation.get('method') == 'helm' and installation.get('driver', 'native') == 'native':
+        return 'native'
+    return 'script'
+
+
+def scan_plugin(plugin_dir: Path, previous: Optional[Dict] = None) -> Dict:
+    """Index one plugin directory, reusing `previous` when the directory did not change"""
+    files = plugin_files(plugin_dir)
+    signature = stat_signature(plugin_dir, files)
+    if previous is not None and previous.get('signature') == signature:
+        return previous
+
+    digest = content_hash(plugin_dir, files)
+    if previous is not None and previous.get('content_hash') == digest:
+        return dict(previous, signature=signature)
+
+    errors = []
+    spec = {}
+    if (plugin_dir / 'plugin.yaml').is_file():
+        try:
+            spec = load_yaml(plugin_dir / 'plugin.yaml') or {}
+            errors.extend(validate_manifest(spec, plugin_dir.name))
+        except Exception as e:
+            errors.append(f"Error parsing plugin.yaml: {e}")
+
+    plugin = spec.get('plugin') if isinstance(spec, dict) and isinstance(spec.get('plugin'), dict) else {}
+    dependencies = plugin.get('dependencies') if isinstance(plugin.get('dependencies'), dict) else {}
+    installation = plugin.get('installation') if isinstance(plugin.get('installation'), dict) else {}
+    driver = installation_driver(installation)
+
+    # Native-driver plugins need no install script; Python plugins need their module instead
+    required_files = [name for name in REQUIRED_FILES if not (driver != 'script' and name == 'install.sh')]
+    if driver == 'python':
+        required_files.append('plugin.py')
+    errors[:0] = [f"Required file missing: {plugin_dir / name}" for name in required_files
+                  if not (plugin_dir / name).is_file()]
+    if driver == 'native' and isinstance(installation.get('values'), list):
+        errors.extend(f"Values file missing: {plugin_dir / path}" for path in installation['values']
+                      if isinstance(path, str) and not (plugin_dir / path).is_file())
+    return {
+        'name': plugin.get('name', plugin_dir.name),
+        'version': str(plugin['version']) if plugin.get('version') is not None else None,
+        'capabilities': plugin.get('capabilities') or [],
+        'dependencies': {kind: dependencies.get(kind) or [] for kind in ('required', 'optional', 'conflicts')},
+        'cloud_providers': plugin.get('cloud_providers') or [],
+        'installation_method': installation.get('method'),
+        'installation_driver': driver,
+        'content_hash': digest,
+        'signature': signature,
+        'errors': errors,
+        'valid': not errors,
+    }
+
+
+class PluginIndex:
+    """Index of every plugin directory, persisted as one JSON file; safe to use from worker threads"""
+
+    def __init__(self, plugins_dir: Path, index_file: Path):
+        self.plugins_dir = Path(plugins_dir)
+        self.index_file = Path(index_file)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        # Entries checked against their directory by this instance (None: no such directory)
+        self._checked: Dict[str, Optional[Dict]] = {}
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION and data.get('plugins_dir') == str(self.plugins_dir.resolve()):
+                    self._entries = data.get('plugins', {})
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self) -> None:
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_file.with_suffix(self.index_file.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'plugins_dir': str(self.plugins_dir.resolve()),
+                       'plugins': self._entries}, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, self.index_file)
+
+    def get(self, plugin_name: str) -> Optional[Dict]:
+        """Index entry of a plugin; None if it does not exist
+
+        The first lookup of a plugin rescans its directory if it changed; later
+        lookups return the same entry until build() or refresh().
+        """
+        with self._lock:
+            if plugin_name in self._checked:
+                return self._checked[plugin_name]
+            previous = self._load().get(plugin_name)
+
+        plugin_dir = self.plugins_dir / plugin_name
+        entry = scan_plugin(plugin_dir, previous) if plugin_dir.is_dir() else None
+        with self._lock:
+            if entry is not None and entry is not previous:
+                self._entries[plugin_name] = entry
+                self._save()
+            self._checked[plugin_name] = entry
+        return entry
+
+    def refresh(self, plugin_name: Optional[str] = None) -> None:
+        """Check a plugin directory (or all of them) against the file system again on the next lookup"""
+        with self._lock:
+            if plugin_name is None:
+                self._checked.clear()
+            else:
+                self._checked.pop(plugin_name, None)
+
+    def build(self, max_workers: int = 8) -> Tuple[Dict[str, Dict], int]:
+        """Scan every plugin directory in parallel and save the index
+
+        Returns the entries by plugin name and the number of directories that
+        had to be rescanned.
+        """
+        with self._lock:
+            previous = dict(self._load())
+        plugin_dirs = sorted(p for p in self.plugins_dir.iterdir() if p.is_dir() and p.name not in IGNORED_DIRS) \
+            if self.plugins_dir.is_dir() else []
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='index') as executor:
+            entries = dict(zip(
+                (p.name for p in plugin_dirs),
+                executor.map(lambda p: scan_plugin(p, previous.get(p.name)), plugin_dirs),
+            ))
+
+        rescanned = sum(1 for name, entry in entries.items() if entry is not previous.get(name))
+        with self._lock:
+            self._entries = entries
+            self._save()
+            self._checked = dict(entries)
+        return entries, rescanned
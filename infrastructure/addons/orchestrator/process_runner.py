@@ -0,0 +1,112 @@
+"""
+Streaming subprocess runner for plugin scripts.
+
+Plugin install/uninstall/health scripts can run for many minutes. Instead of
+buffering their whole output until exit, run_streaming logs every line as it
+arrives (prefixed with the plugin name, so concurrent plugins stay readable)
+and keeps only a bounded tail for failure reports. Timeouts kill the whole
+process group, so helm/kubectl children started by a script die with it.
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Seconds between SIGTERM and SIGKILL when a script times out
+KILL_GRACE_PERIOD = 10
+
+
+@dataclass
+class ProcessResult:
+    returncode: Optional[int]
+    timed_out: bool
+    output_tail: str
+    duration: float
+
+
+class OutputTail:
+    """Ring buffer holding the last `max_bytes` of output, line by line"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lines = deque()
+        self._size = 0
+        self.truncated = False
+
+    def append(self, line: str) -> None:
+        self._lines.append(line)
+        self._size += len(line)
+        while self._size > self.max_bytes and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft())
+            self.truncated = True
+
+    def text(self) -> str:
+        prefix = "... (earlier output truncated)\n" if self.truncated else ""
+        return prefix + ''.join(self._lines)
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    for sig, grace in ((signal.SIGTERM, KILL_GRACE_PERIOD), (signal.SIGKILL, None)):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        if grace is None:
+            break
+        try:
+            process.wait(timeout=grace)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+    process.wait()
+
+
+def run_streaming(command: List[str], *, env: Dict[str, str], cwd, timeout: Optional[float],
+                  prefix: str, tail_bytes: int = 64 * 1024, log_level: int = logging.INFO) -> ProcessResult:
+    """Run a command, streaming its combined stdout/stderr to the log line by line"""
+    started = time.monotonic()
+    tail = OutputTail(tail_bytes)
+    process = subprocess.Popen(
+        command,
+        env=env,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors='replace',
+        bufsize=1,
+        start_new_session=True,
+    )
+
+    def pump() -> None:
+        for line in process.stdout:
+            tail.append(line)
+            logging.log(log_level, f"[{prefix}] {line.rstrip()}")
+        process.stdout.close()
+
+    reader = threading.Thread(target=pump, name=f"output-{prefix}", daemon=True)
+    reader.start()
+
+    timed_out = False
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_process_group(process)
+    finally:
+        # Orphaned grandchildren may keep the pipe open; don't wait on them forever
+        reader.join(timeout=KILL_GRACE_PERIOD)
+
+    return ProcessResult(
+        returncode=process.returncode,
+        timed_out=timed_out,
+        output_tail=tail.text(),
+        duration=time.monotonic() - started,
+    )
@@ -0,0 +1,222 @@
+"""
+Python plugin framework for the Kubernetes Add-ons Plugin Manager.
+
+A plugin whose plugin.yaml sets ``installation.driver: python`` ships a
+plugin.py defining a PythonPlugin subclass. The plugin manager imports it
+once per run and calls its install, health_check and uninstall hooks in
+process, from its own worker threads: no interpreter start-up per plugin,
+and the plugin reads its settings from its configuration mapping instead of
+parsing them back out of environment variables. The environment only
+carries the run context (cluster, cloud provider, credentials) and is what
+the plugin's commands run with. Hooks a plugin does not implement fall back
+to the plugin's scripts.
+
+The same class runs standalone, e.g. from install.sh, with run_cli(); there
+the settings are read from the environment variables the class declares in
+ENV_SETTINGS.
+"""
+
+import importlib.util
+import inspect
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+
+from process_runner import run_streaming
+
+
+class PluginError(Exception):
+    """A plugin hook cannot continue"""
+
+
+class PluginLogger(logging.LoggerAdapter):
+    """Prefixes records with the plugin name, like the output of plugin scripts"""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['plugin']}] {msg}", kwargs
+
+
+class PythonPlugin:
+    """Base class of in-process plugins
+
+    `env` is the environment the plugin's commands run with (the same
+    variables plugin scripts receive) and `config` the plugin's merged
+    configuration mapping. `deadline` (a time.monotonic() value) bounds the
+    hook: commands started through run() are cut off when it passes.
+    Instances are created per hook call, so hooks of different clusters can
+    run concurrently; a plugin must not change os.environ or the working
+    directory.
+    """
+
+    # Setting name -> environment variables it is read from when run standalone, first set wins
+    ENV_SETTINGS: Dict[str, Tuple[str, ...]] = {}
+
+    def __init__(self, name: str, plugin_dir: Path, env: Mapping[str, str], config: Optional[Dict] = None,
+                 deadline: Optional[float] = None):
+        self.name = name
+        self.plugin_dir = Path(plugin_dir)
+        self.env = dict(env)
+        self.config = dict(config or {})
+        self.deadline = deadline
+        self.log = PluginLogger(logging.getLogger(f"plugin.{name}"), {'plugin': name})
+
+    @classmethod
+    def config_from_env(cls, env: Mapping[str, str]) -> Dict[str, Any]:
+        """Settings of a standalone run, from the variables named in ENV_SETTINGS"""
+        config = {}
+        for key, var_names in cls.ENV_SETTINGS.items():
+            for var_name in var_names:
+                if env.get(var_name) not in (None, ""):
+                    config[key] = env[var_name]
+                    break
+        return config
+
+    @classmethod
+    def implements(cls, hook: str) -> bool:
+        """Whether the plugin overrides a hook instead of leaving it to its scripts"""
+        return getattr(cls, hook) is not getattr(PythonPlugin, hook)
+
+    def install(self) -> None:
+        raise NotImplementedError
+
+    def health_check(self) -> bool:
+        raise NotImplementedError
+
+    def uninstall(self) -> None:
+        raise NotImplementedError
+
+    def cleanup_on_failure(self) -> None:
+        """Undo a partial install; called when install raises"""
+
+    def setting(self, key: str, default: Any = None) -> Any:
+        value = self.config.get(key)
+        return default if value in (None, "") else value
+
+    def require_setting(self, key: str, message: Optional[str] = None) -> Any:
+        value = self.setting(key)
+        if value is None:
+            raise PluginError(message or f"Plugin setting {key} must be set")
+        return value
+
+    def require(self, var_name: str, message: Optional[str] = None) -> str:
+        value = self.env.get(var_name)
+        if value in (None, ""):
+            raise PluginError(message or f"Environment variable {var_name} must be set")
+        return value
+
+    def optional(self, var_name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.env.get(var_name)
+        return value if value is not None else default
+
+    def remaining(self, limit: Optional[float] = None) -> Optional[float]:
+        """Seconds left for a step: `limit` capped by the hook deadline; raises PluginError once it passed"""
+        if self.deadline is None:
+            return limit
+        left = self.deadline - time.monotonic()
+        if left <= 0:
+            raise PluginError(f"{self.name} ran out of time")
+        return left if limit is None else min(limit, left)
+
+    def run(self, command: List[str], *, input_text: Optional[str] = None, capture_output: bool = False,
+            check: bool = True, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run a command with the plugin's environment
+
+        Uncaptured output is streamed to the log line by line; captured output
+        is returned. A failed command raises PluginError when `check` is set.
+        The timeout is capped by the hook deadline.
+        """
+        timeout = self.remaining(timeout)
+        self.log.debug(f"Running command: {' '.join(command)}")
+        if input_text is None and not capture_output:
+            result = run_streaming(command, env=self.env, cwd=self.plugin_dir, timeout=timeout, prefix=self.name)
+            # The output was logged as it arrived; don't repeat it in errors
+            completed = subprocess.CompletedProcess(command, result.returncode, '', '')
+            if result.timed_out:
+                raise PluginError(f"Command timed out after {timeout}s ({' '.join(command)})")
+        else:
+            try:
+                completed = subprocess.run(command, env=self.env, cwd=self.plugin_dir, input=input_text, text=True,
+                                           capture_output=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                raise PluginError(f"Command timed out after {timeout}s ({' '.join(command)})")
+            if not capture_output:
+                for line in (completed.stdout + completed.stderr).splitlines():
+                    self.log.info(line)
+
+        if check and completed.returncode != 0:
+            message = f"Command failed ({' '.join(command)}): return code {completed.returncode}"
+            for stream, output in (('stdout', completed.stdout), ('stderr', completed.stderr)):
+                if output and output.strip():
+                    message += f"\n{stream}: {output.strip()}"
+            raise PluginError(message)
+        return completed
+
+
+_loaded: Dict[Path, Type[PythonPlugin]] = {}
+_load_lock = threading.Lock()
+
+
+def load_plugin_class(plugin_dir: Path) -> Type[PythonPlugin]:
+    """Import a plugin directory's plugin.py once and return its PythonPlugin subclass
+
+    The module may name its class with PLUGIN_CLASS; otherwise it must
+    define exactly one PythonPlugin subclass.
+    """
+    plugin_file = (Path(plugin_dir) / 'plugin.py').resolve()
+    with _load_lock:
+        plugin_class = _loaded.get(plugin_file)
+        if plugin_class is not None:
+            return plugin_class
+        if not plugin_file.is_file():
+            raise PluginError(f"Python plugin module not found: {plugin_file}")
+
+        # Unique module name, so plugins cannot shadow each other or stdlib modules
+        module_name = "addon_plugin_" + re.sub(r'\W', '_', plugin_file.parent.name)
+        spec = importlib.util.spec_from_file_location(module_name, plugin_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            del sys.modules[module_name]
+            raise PluginError(f"Error importing {plugin_file}: {e}") from e
+
+        plugin_class = getattr(module, 'PLUGIN_CLASS', None)
+        if plugin_class is None:
+            candidates = [
+                obj for obj in vars(module).values()
+                if inspect.isclass(obj) and issubclass(obj, PythonPlugin) and obj is not PythonPlugin
+                and obj.__module__ == module_name
+            ]
+            if len(candidates) != 1:
+                raise PluginError(f"{plugin_file} must define exactly one PythonPlugin subclass "
+                                  f"(found {len(candidates)}) or set PLUGIN_CLASS")
+            plugin_class = candidates[0]
+        _loaded[plugin_file] = plugin_class
+        return plugin_class
+
+
+def run_cli(plugin_class: Type[PythonPlugin], hook: str, plugin_dir: Optional[Path] = None) -> int:
+    """Run one hook of a plugin as a standalone script, configured from os.environ; returns the exit code"""
+    level_name = os.environ.get('PLUGIN_LOG_LEVEL', 'INFO').upper()
+    logging.basicConfig(level=getattr(logging, level_name, logging.INFO), format='%(levelname)s %(message)s')
+    plugin_dir = Path(plugin_dir or Path(inspect.getfile(plugin_class)).resolve().parent)
+    plugin = plugin_class(os.environ.get('PLUGIN_NAME', plugin_dir.name), plugin_dir, os.environ,
+                          plugin_class.config_from_env(os.environ))
+    try:
+        result = getattr(plugin, hook)()
+    except PluginError as e:
+        logging.error(f"{hook} failed: {e}")
+        if hook == 'install':
+            try:
+                plugin.cleanup_on_failure()
+            except Exception as cleanup_error:
+                logging.error(f"Cleanup failed: {cleanup_error}")
+        return 1
+    return 1 if result is False else 0
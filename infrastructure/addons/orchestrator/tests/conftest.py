@@ -0,0 +1,69 @@
+"""Make the orchestrator modules importable the way plugin-manager.py imports them."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ORCHESTRATOR_DIR = Path(__file__).resolve().parents[1]
+PLUGINS_DIR = ORCHESTRATOR_DIR.parent / "plugins"
+
+sys.path.insert(0, str(ORCHESTRATOR_DIR))
+# The shared YAML loader (config_cache) lives in the repository's scripts directory
+sys.path.insert(0, str(ORCHESTRATOR_DIR.parents[2] / "scripts"))
+
+
+@pytest.fixture(scope="session")
+def plugin_manager():
+    """plugin-manager.py as a module (its file name is not importable)"""
+    spec = importlib.util.spec_from_file_location("plugin_manager", ORCHESTRATOR_DIR / "plugin-manager.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def external_dns():
+    """The external-dns plugin module (plugins/external-dns/plugin.py)"""
+    spec = importlib.util.spec_from_file_location("external_dns_plugin", PLUGINS_DIR / "external-dns" / "plugin.py")
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses resolve the module's annotations through sys.modules
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def make_manager(plugin_manager, tmp_path, monkeypatch):
+    """Build a PluginManager in a scratch checkout
+
+    make_manager(config, plugins) writes the global config and a plugin
+    directory (plugin.yaml and install.sh) for every plugin.yaml in `plugins`.
+    """
+    monkeypatch.chdir(tmp_path)
+    addons = tmp_path / "infrastructure" / "addons"
+
+    def make(config, plugins=None, cloud_provider="aws", **options):
+        (addons / "config" / cloud_provider).mkdir(parents=True, exist_ok=True)
+        config_file = addons / "config" / "plugins-config.yaml"
+        config_file.write_text(yaml.safe_dump(config))
+        for name, spec in (plugins or {}).items():
+            plugin_dir = addons / "plugins" / name
+            plugin_dir.mkdir(parents=True, exist_ok=True)
+            (plugin_dir / "plugin.yaml").write_text(yaml.safe_dump(spec))
+            (plugin_dir / "install.sh").write_text("#!/bin/bash\n")
+        return plugin_manager.PluginManager(str(config_file), "dev", cloud_provider, **options)
+
+    return make
+
+
+def plugin_yaml(name, required=(), optional=()):
+    """A minimal valid plugin.yaml"""
+    return {"plugin": {
+        "name": name,
+        "version": "1.0.0",
+        "dependencies": {"required": list(required), "optional": list(optional), "conflicts": []},
+        "installation": {"method": "script"},
+    }}
@@ -0,0 +1,68 @@
+"""The shared YAML loader and its on-disk cache (scripts/config_cache.py)."""
+
+import marshal
+import os
+
+import pytest
+
+import config_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "cache"
+    monkeypatch.setenv("MSDP_CONFIG_CACHE_DIR", str(directory))
+    monkeypatch.setattr(config_cache, "_memory", {})
+    return directory
+
+
+def cache_file(cache_dir):
+    (path,) = cache_dir.iterdir()
+    return path
+
+
+def test_returns_fresh_copies_and_writes_a_private_cache(tmp_path, cache_dir):
+    config = tmp_path / "config.yaml"
+    config.write_text("plugins:\n  a: {enabled: true}\n")
+
+    first = config_cache.load_yaml(config)
+    first["plugins"]["a"]["enabled"] = False
+
+    assert config_cache.load_yaml(config) == {"plugins": {"a": {"enabled": True}}}
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+
+
+def test_cache_hit_survives_a_new_process(tmp_path, cache_dir, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text("a: 1\n")
+    config_cache.load_yaml(config)
+    record = marshal.loads(cache_file(cache_dir).read_bytes())
+    record["payload"] = marshal.dumps({"a": "from cache"})
+    cache_file(cache_dir).write_bytes(marshal.dumps(record))
+    monkeypatch.setattr(config_cache, "_memory", {})
+
+    assert config_cache.load_yaml(config) == {"a": "from cache"}
+
+
+@pytest.mark.parametrize("payload", [b"", b"\xff\x00garbage"])
+def test_undecodable_payload_is_a_miss(tmp_path, cache_dir, monkeypatch, payload):
+    config = tmp_path / "config.yaml"
+    config.write_text("a: 1\n")
+    config_cache.load_yaml(config)
+    record = marshal.loads(cache_file(cache_dir).read_bytes())
+    record["payload"] = payload
+    cache_file(cache_dir).write_bytes(marshal.dumps(record))
+    monkeypatch.setattr(config_cache, "_memory", {})
+
+    assert config_cache.load_yaml(config) == {"a": 1}
+    assert marshal.loads(marshal.loads(cache_file(cache_dir).read_bytes())["payload"]) == {"a": 1}
+
+
+def test_truncated_cache_file_is_a_miss(tmp_path, cache_dir, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text("a: [1, 2]\n")
+    config_cache.load_yaml(config)
+    cache_file(cache_dir).write_bytes(cache_file(cache_dir).read_bytes()[:10])
+    monkeypatch.setattr(config_cache, "_memory", {})
+
+    assert config_cache.load_yaml(config) == {"a": [1, 2]}
@@ -0,0 +1,47 @@
+"""Deep-merging the global, cloud, environment and cluster config layers."""
+
+import copy
+
+import yaml
+
+
+def test_nested_mappings_merge_and_lists_are_replaced(plugin_manager):
+    base = {"settings": {"timeout": 300, "retries": 2}, "domains": ["a.example"], "tags": {"team": "infra"}}
+    override = {"settings": {"timeout": 600}, "domains": ["b.example"], "extra": None}
+    before = copy.deepcopy((base, override))
+
+    merged = plugin_manager.deep_merge(base, override)
+
+    assert merged == {
+        "settings": {"timeout": 600, "retries": 2},
+        "domains": ["b.example"],
+        "tags": {"team": "infra"},
+        "extra": None,
+    }
+    assert (base, override) == before
+    # Subtrees the override leaves alone are shared, not copied
+    assert merged["tags"] is base["tags"]
+
+
+def test_scalars_and_empty_layers(plugin_manager):
+    deep_merge = plugin_manager.deep_merge
+    base = {"a": {"b": 1}}
+
+    assert deep_merge(base, {}) is base
+    assert deep_merge({}, base) is base
+    assert deep_merge(base, {"a": "replaced"}) == {"a": "replaced"}
+    assert deep_merge({"a": "scalar"}, {"a": {"b": 2}}) == {"a": {"b": 2}}
+
+
+def test_layers_apply_in_order(make_manager, tmp_path):
+    config_dir = tmp_path / "infrastructure" / "addons" / "config" / "aws"
+    config_dir.mkdir(parents=True)
+    (config_dir / "common.yaml").write_text(yaml.safe_dump({"settings": {"timeout": 400, "max_parallel": 2}}))
+    (config_dir / "dev.yaml").write_text(yaml.safe_dump({"settings": {"timeout": 500}}))
+    (config_dir / "clusters").mkdir()
+    (config_dir / "clusters" / "eks-dev.yaml").write_text(yaml.safe_dump({"settings": {"max_parallel": 8}}))
+
+    manager = make_manager({"cluster_name": "eks-dev", "settings": {"timeout": 300, "verify": True}})
+
+    assert manager.config["settings"] == {"timeout": 500, "max_parallel": 8, "verify": True}
+    assert manager.base_config["settings"]["max_parallel"] == 2
@@ -0,0 +1,58 @@
+"""Resolving plugin dependencies into installation waves."""
+
+import pytest
+
+
+def plugin(name, dependencies=(), optional=(), conflicts=()):
+    return {
+        "name": name,
+        "dependencies": list(dependencies),
+        "optional_dependencies": list(optional),
+        "conflicts": list(conflicts),
+    }
+
+
+@pytest.fixture
+def resolve(plugin_manager):
+    manager = plugin_manager.PluginManager.__new__(plugin_manager.PluginManager)
+
+    def resolve(plugins):
+        return [[p["name"] for p in level] for level in manager.resolve_dependency_levels(plugins)]
+
+    return resolve
+
+
+def test_waves_follow_required_dependencies(resolve):
+    plugins = [
+        plugin("monitoring", ["cert-manager", "nginx-ingress"]),
+        plugin("nginx-ingress"),
+        plugin("cert-manager"),
+        plugin("alerts", ["monitoring"]),
+    ]
+
+    assert resolve(plugins) == [["nginx-ingress", "cert-manager"], ["monitoring"], ["alerts"]]
+
+
+def test_optional_dependencies_only_reorder_a_wave(resolve):
+    plugins = [plugin("a", optional=["c", "absent"]), plugin("b"), plugin("c")]
+
+    assert resolve(plugins) == [["c", "a", "b"]]
+
+
+def test_cycle_is_reported_with_its_path(resolve):
+    plugins = [plugin("a", ["b"]), plugin("b", ["c"]), plugin("c", ["a"]), plugin("d")]
+
+    with pytest.raises(Exception, match="Circular dependency detected: ") as error:
+        resolve(plugins)
+    cycle = str(error.value).split(": ", 1)[1].split(" -> ")
+    assert cycle[0] == cycle[-1] and set(cycle) == {"a", "b", "c"}
+
+
+def test_missing_dependency(resolve):
+    with pytest.raises(Exception, match=r"a -> b \(missing\)"):
+        resolve([plugin("a", ["b"])])
+
+
+def test_conflicting_plugins(resolve):
+    with pytest.raises(Exception, match="Conflicting plugins selected: .*a <-> b"):
+        resolve([plugin("a", conflicts=["b"]), plugin("b")])
@@ -0,0 +1,63 @@
+"""Running plugin tasks as a dependency DAG on a thread pool."""
+
+import threading
+
+import pytest
+
+from tracing import Tracer
+
+# c waits on a and b; d waits on c; e is independent
+ORDER = ["a", "b", "c", "d", "e"]
+WAITING_ON = {"c": {"a", "b"}, "d": {"c"}}
+
+
+@pytest.fixture
+def manager(plugin_manager):
+    manager = plugin_manager.PluginManager.__new__(plugin_manager.PluginManager)
+    manager.tracer = Tracer()
+    return manager
+
+
+def test_nodes_start_after_the_nodes_they_wait_on(manager):
+    started = []
+    lock = threading.Lock()
+
+    def task(name):
+        with lock:
+            started.append(name)
+        return "installed"
+
+    statuses, timings, completed = manager.execute_dag(ORDER, WAITING_ON, task, 3, stop_on_failure=False)
+
+    assert statuses == dict.fromkeys(ORDER, "installed")
+    assert set(timings) == set(ORDER)
+    assert sorted(completed) == sorted(ORDER)
+    assert started.index("c") > max(started.index("a"), started.index("b"))
+    assert started.index("d") > started.index("c")
+
+
+@pytest.mark.parametrize("outcome", ["failed", "raise"])
+def test_a_failure_skips_its_dependents_only(manager, outcome):
+    started = []
+
+    def task(name):
+        started.append(name)
+        if name == "b":
+            if outcome == "raise":
+                raise RuntimeError("boom")
+            return "failed"
+        return "installed"
+
+    statuses, _, completed = manager.execute_dag(ORDER, WAITING_ON, task, 1, stop_on_failure=False)
+
+    assert statuses == {"a": "installed", "b": "failed", "c": "skipped", "d": "skipped", "e": "installed"}
+    assert "c" not in started and "d" not in started
+    assert completed == ["a", "e"]
+
+
+def test_stop_on_failure_starts_nothing_new(manager):
+    statuses, _, completed = manager.execute_dag(
+        ORDER, WAITING_ON, lambda name: "failed" if name == "a" else "installed", 1, stop_on_failure=True)
+
+    assert statuses == {"a": "failed", "b": "skipped", "c": "skipped", "d": "skipped", "e": "skipped"}
+    assert completed == []
@@ -0,0 +1,126 @@
+"""Provider instances of the external-dns plugin and the cleanup of the ones that failed."""
+
+import json
+import os
+import stat
+
+import pytest
+
+from python_plugin import PluginError
+
+STUB = """#!/usr/bin/env python3
+import json, os, sys
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write(json.dumps([os.path.basename(sys.argv[0])] + sys.argv[1:]) + "\\n")
+if sys.argv[1:3] == ["get", "all"]:
+    print(os.environ.get("STUB_NAMESPACE_CONTENT", "{}"))
+"""
+
+CONFIG = {
+    "txt_owner_id": "owner",
+    "domain_filters": ["example.com"],
+    "policy": "sync",
+    "providers": [{"provider": "AWS"}, {"provider": "azure", "domain_filters": ["example.org"]}],
+}
+
+
+def test_each_provider_gets_its_own_release_and_owner(external_dns):
+    aws, azure = external_dns.instance_configs(CONFIG["providers"], CONFIG, "eks-dev")
+
+    assert aws == {
+        "txt_owner_id": "owner-aws",
+        "domain_filters": ["example.com"],
+        "policy": "sync",
+        "provider": "aws",
+        "release": "external-dns-aws",
+    }
+    assert azure["domain_filters"] == ["example.org"]
+    assert (azure["release"], azure["txt_owner_id"]) == ("external-dns-azure", "owner-azure")
+
+
+def test_explicit_release_and_owner_are_kept(external_dns):
+    specs = [{"provider": "aws", "release": "dns-public", "txt_owner_id": "public"}]
+
+    (config,) = external_dns.instance_configs(specs, {"release": "shared"}, "eks-dev")
+
+    assert (config["release"], config["txt_owner_id"]) == ("dns-public", "public")
+
+
+def test_owner_defaults_to_the_cluster_name(external_dns):
+    (config,) = external_dns.instance_configs([{"provider": "aws"}], {}, "eks-dev")
+
+    assert config["txt_owner_id"] == "eks-dev-aws"
+
+
+@pytest.mark.parametrize("specs, message", [
+    ([{"domain_filters": ["example.com"]}], r"providers\[0\] must be a mapping"),
+    (["aws"], r"providers\[0\] must be a mapping"),
+    ([{"provider": "aws"}, {"provider": "aws"}], "own release; shared: external-dns-aws"),
+    ([{"provider": "aws"}, {"provider": "azure", "txt_owner_id": "owner-aws"}], "own txt_owner_id"),
+])
+def test_invalid_provider_instances(external_dns, specs, message):
+    with pytest.raises(PluginError, match=message):
+        external_dns.instance_configs(specs, {"txt_owner_id": "owner"}, "eks-dev")
+
+
+@pytest.fixture
+def plugin(external_dns, tmp_path):
+    for tool in ("helm", "kubectl"):
+        path = tmp_path / tool
+        path.write_text(STUB)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.jsonl"
+    env = {
+        "PATH": f"{tmp_path}{os.pathsep}{os.environ['PATH']}",
+        "STUB_LOG": str(log),
+        "CLUSTER_NAME": "eks-dev",
+    }
+    plugin = external_dns.ExternalDnsPlugin("external-dns", tmp_path, env, CONFIG)
+
+    def calls():
+        return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+    return plugin, calls
+
+
+def test_cleanup_removes_only_the_failed_release(plugin):
+    plugin, calls = plugin
+    plugin.failed_releases = ("external-dns-azure",)
+
+    plugin.cleanup_on_failure()
+
+    helm_calls = [call for call in calls() if call[0] == "helm"]
+    assert [call[1:3] for call in helm_calls] == [
+        ["status", "external-dns-azure"],
+        ["uninstall", "external-dns-azure"],
+    ]
+    assert ["kubectl", "delete", "namespace", "external-dns-system", "--ignore-not-found=true"] in calls()
+
+
+def test_cleanup_keeps_a_namespace_shared_with_other_releases(plugin):
+    plugin, calls = plugin
+    plugin.env["STUB_NAMESPACE_CONTENT"] = json.dumps({"items": [{"kind": "Deployment"}]})
+    plugin.failed_releases = ("external-dns-aws",)
+
+    plugin.cleanup_on_failure()
+
+    assert not [call for call in calls() if call[1:3] == ["delete", "namespace"]]
+
+
+def test_nothing_to_clean_up_before_a_release_was_installed(plugin):
+    plugin, calls = plugin
+
+    plugin.cleanup_on_failure()
+
+    assert calls() == []
+
+
+def test_run_concurrently_records_the_failed_releases(plugin):
+    plugin, _ = plugin
+
+    def fail():
+        raise PluginError("upgrade failed")
+
+    with pytest.raises(PluginError, match="1 of 2 external-dns releases failed: external-dns-azure"):
+        plugin.run_concurrently({"external-dns-aws": lambda: None, "external-dns-azure": fail})
+    assert plugin.failed_releases == ("external-dns-azure",)
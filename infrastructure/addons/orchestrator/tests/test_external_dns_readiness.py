@@ -0,0 +1,43 @@
+"""Rollout readiness of the external-dns deployment, as read from its watch stream."""
+
+import pytest
+
+
+def deployment(generation=2, desired=1, **status):
+    status.setdefault("observedGeneration", generation)
+    return {"metadata": {"generation": generation}, "spec": {"replicas": desired}, "status": status}
+
+
+AVAILABLE = [{"type": "Available", "status": "True"}]
+
+
+@pytest.mark.parametrize("status, progress", [
+    ({"observedGeneration": 1}, "waiting for the deployment update to be observed"),
+    ({"updatedReplicas": 0}, "0 of 1 pods updated"),
+    ({"updatedReplicas": 1, "replicas": 2}, "1 old pods pending termination"),
+    ({"updatedReplicas": 1, "replicas": 1, "readyReplicas": 1, "availableReplicas": 0}, "0 of 1 pods ready"),
+    ({"updatedReplicas": 1, "replicas": 1, "readyReplicas": 1, "availableReplicas": 1}, "deployment not yet available"),
+])
+def test_deployment_not_ready(external_dns, status, progress):
+    assert external_dns.deployment_progress(deployment(**status)) == (False, progress)
+
+
+def test_deployment_ready(external_dns):
+    ready = deployment(desired=2, updatedReplicas=2, readyReplicas=2, availableReplicas=2, conditions=AVAILABLE)
+    assert external_dns.deployment_progress(ready) == (True, "2 of 2 pods ready")
+
+
+def test_deployment_without_status_is_not_ready(external_dns):
+    assert external_dns.deployment_progress({"metadata": {"generation": 1}}) == (
+        False, "waiting for the deployment update to be observed"
+    )
+
+
+def test_readiness_probe_required_on_every_container(external_dns):
+    def with_containers(*containers):
+        return {"spec": {"template": {"spec": {"containers": list(containers)}}}}
+
+    probe = {"readinessProbe": {"httpGet": {"path": "/healthz", "port": 7979}}}
+    assert external_dns.has_readiness_probe(with_containers(probe))
+    assert not external_dns.has_readiness_probe(with_containers(probe, {}))
+    assert not external_dns.has_readiness_probe(with_containers())
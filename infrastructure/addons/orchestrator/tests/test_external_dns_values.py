@@ -0,0 +1,59 @@
+"""Domain filters of the external-dns Helm values."""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+
+@pytest.mark.parametrize("value, domains", [
+    (["a.com", " b.com "], ["a.com", "b.com"]),
+    ('["a.com", "b.com"]', ["a.com", "b.com"]),
+    ("['a.com', 'b.com']", ["a.com", "b.com"]),
+    ("a.com, b.com,", ["a.com", "b.com"]),
+    ("a.com", ["a.com"]),
+    ("[a.com", ["[a.com"]),
+    ("", []),
+    (None, []),
+])
+def test_parse_domain_filters(external_dns, value, domains):
+    assert external_dns.parse_domain_filters(value) == domains
+
+
+def context(external_dns, **fields):
+    defaults = dict(
+        plugin_name="external-dns", plugin_dir=Path("."), namespace="external-dns-system", cloud_provider="aws",
+        dns_provider="aws", environment="dev", cluster_name="eks-dev", domain_filters=["a.com", "b.com"],
+        txt_owner_id="owner", txt_prefix=None, aws_auth_mode=None, aws_region="eu-west-1",
+        aws_credentials_secret_name="secret", aws_role_arn=None, aws_web_identity_token_file=None,
+        plugin_version="1.13.1",
+    )
+    defaults.update(fields)
+    return external_dns.InstallContext(**defaults)
+
+
+@pytest.mark.parametrize("values", [{}, {"domainFilters": None}, {"domainFilters": []}])
+def test_domain_filters_come_from_the_setting(external_dns, values):
+    external_dns.ensure_domain_filters(values, context(external_dns))
+
+    assert values["domainFilters"] == ["a.com", "b.com"]
+
+
+def test_values_file_can_pin_its_domain_filters(external_dns):
+    values = {"domainFilters": ["pinned.com"]}
+
+    external_dns.ensure_domain_filters(values, context(external_dns))
+
+    assert values["domainFilters"] == ["pinned.com"]
+
+
+@pytest.mark.parametrize("provider", ["aws", "azure"])
+def test_bundled_values_files_take_the_setting(external_dns, provider):
+    plugin_dir = Path(external_dns.__file__).parent
+    plugin = external_dns.ExternalDnsPlugin("external-dns", plugin_dir, {}, {"policy": "upsert-only"})
+
+    document = plugin.prepare_values(context(external_dns, plugin_dir=plugin_dir, dns_provider=provider))
+
+    values = yaml.safe_load(document)
+    assert values["domainFilters"] == ["a.com", "b.com"]
+    assert values["policy"] == "upsert-only"
@@ -0,0 +1,61 @@
+"""Per-cluster config of fleet runs."""
+
+import textwrap
+
+import pytest
+
+GLOBAL_CONFIG = """
+cluster_name: "{{ CLUSTER_NAME | default('aks-msdp-dev-01') }}"
+plugins:
+  external-dns:
+    enabled: true
+    config:
+      txt_owner_id: "{{ CLUSTER_NAME | default('aks-msdp-dev-01') }}"
+      policy: sync
+settings:
+  state_dir: .plugin-manager
+"""
+
+
+@pytest.fixture
+def manager(plugin_manager, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CLUSTER_NAME", raising=False)
+    config_dir = tmp_path / "infrastructure" / "addons" / "config"
+    (config_dir / "azure" / "clusters").mkdir(parents=True)
+    (config_dir / "plugins-config.yaml").write_text(GLOBAL_CONFIG)
+    (config_dir / "azure" / "dev.yaml").write_text("environment: dev\n")
+    (config_dir / "azure" / "clusters" / "aks-b.yaml").write_text(textwrap.dedent("""
+        plugins:
+          external-dns:
+            config:
+              policy: upsert-only
+    """))
+    return plugin_manager.PluginManager(str(config_dir / "plugins-config.yaml"), "dev", "azure", dry_run=True)
+
+
+def owner(manager):
+    return manager.config["plugins"]["external-dns"]["config"]["txt_owner_id"]
+
+
+def test_each_cluster_resolves_its_own_templates(manager):
+    cluster_a = manager.for_cluster("aks-a")
+    cluster_b = manager.for_cluster("aks-b", "aks-b-context")
+
+    assert owner(manager) == "aks-msdp-dev-01"
+    assert (owner(cluster_a), owner(cluster_b)) == ("aks-a", "aks-b")
+    assert (cluster_a.config["cluster_name"], cluster_b.config["cluster_name"]) == ("aks-a", "aks-b")
+    assert cluster_b.extra_env["KUBE_CONTEXT"] == "aks-b-context"
+
+
+def test_cluster_layer_applies_only_to_its_cluster(manager):
+    policy = {name: manager.for_cluster(name).config["plugins"]["external-dns"]["config"]["policy"]
+              for name in ("aks-a", "aks-b")}
+
+    assert policy == {"aks-a": "sync", "aks-b": "upsert-only"}
+
+
+def test_cluster_variables_override_the_environment(manager, monkeypatch):
+    monkeypatch.setenv("CLUSTER_NAME", "from-environment")
+
+    assert owner(manager.for_cluster("aks-a")) == "aks-a"
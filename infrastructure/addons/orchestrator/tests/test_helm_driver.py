@@ -0,0 +1,138 @@
+"""HelmDriver against stub helm and kubectl executables that record their calls."""
+
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+import yaml
+
+from helm_driver import HelmDriver, HelmError, release_spec
+from plugin_index import installation_driver
+
+STUB = """#!/usr/bin/env python3
+import json, os, sys
+args = sys.argv[1:]
+record = {"tool": os.path.basename(sys.argv[0]), "args": args}
+if args[:2] == ["apply", "-f"]:
+    record["stdin"] = sys.stdin.read()
+for i, arg in enumerate(args):
+    if arg == "--values":
+        with open(args[i + 1]) as f:
+            record.setdefault("values", []).append(f.read())
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write(json.dumps(record) + "\\n")
+if args[:2] == ["repo", "list"]:
+    print(os.environ.get("STUB_REPOS", "[]"))
+if args[:1] == ["upgrade"] and os.environ.get("STUB_FAIL_UPGRADE"):
+    sys.exit(1)
+"""
+
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    for tool in ("helm", "kubectl"):
+        path = tmp_path / tool
+        path.write_text(STUB)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.jsonl"
+    monkeypatch.setenv("STUB_LOG", str(log))
+
+    def calls():
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+
+    return HelmDriver(helm=str(tmp_path / "helm"), kubectl=str(tmp_path / "kubectl")), calls
+
+
+def make_release(tmp_path, name="demo", **installation):
+    plugin_dir = tmp_path / "plugins" / name
+    (plugin_dir / "values").mkdir(parents=True)
+    (plugin_dir / "values" / "aws.yaml").write_text("region: ${AWS_REGION}\nreplicas: ${REPLICAS:-2}\n")
+    spec = {
+        "chart": "demo-repo/demo",
+        "version": "1.2.3",
+        "repository": "https://charts.example.com",
+        "namespace": f"{name}-system",
+    }
+    spec.update(installation)
+    return release_spec(name, spec, "aws", plugin_dir)
+
+
+def test_prepare_adds_each_repository_once_and_creates_namespaces(tmp_path, stubs):
+    driver, calls = stubs
+    releases = [make_release(tmp_path, "one"), make_release(tmp_path, "two")]
+
+    driver.prepare(releases, dict(os.environ))
+    driver.prepare(releases, dict(os.environ))
+
+    helm_calls = [c["args"] for c in calls() if c["tool"] == "helm"]
+    assert helm_calls == [
+        ["repo", "list", "-o", "json"],
+        ["repo", "add", "--force-update", "demo-repo", "https://charts.example.com"],
+        ["repo", "update", "demo-repo"],
+    ]
+    applies = [c for c in calls() if c["tool"] == "kubectl"]
+    assert len(applies) == 2
+    namespaces = [doc["metadata"]["name"] for doc in yaml.safe_load_all(applies[0]["stdin"])]
+    assert namespaces == ["one-system", "two-system"]
+
+
+def test_prepare_skips_repositories_helm_already_has(tmp_path, stubs, monkeypatch):
+    driver, calls = stubs
+    monkeypatch.setenv("STUB_REPOS", json.dumps([{"name": "demo-repo", "url": "https://charts.example.com"}]))
+
+    driver.prepare([make_release(tmp_path, create_namespace=False)], dict(os.environ))
+
+    assert [c["args"][:2] for c in calls()] == [["repo", "list"], ["repo", "update"]]
+
+
+def test_prepare_rejects_one_repository_name_with_two_urls(tmp_path, stubs):
+    driver, _ = stubs
+    releases = [make_release(tmp_path, "one"), make_release(tmp_path, "two", repository="https://other.example.com")]
+
+    with pytest.raises(HelmError, match="two URLs"):
+        driver.prepare(releases, dict(os.environ))
+
+
+def test_install_runs_upgrade_with_rendered_values(tmp_path, stubs):
+    driver, calls = stubs
+    release = make_release(tmp_path)
+    driver.prepare([release], dict(os.environ))
+
+    driver.install(release, dict(os.environ, AWS_REGION="eu-west-1"), timeout=60)
+
+    upgrade = [c for c in calls() if c["args"][:1] == ["upgrade"]][0]
+    args = upgrade["args"]
+    assert args[:5] == ["upgrade", "--install", "demo", "demo-repo/demo", "--namespace"]
+    assert args[args.index("--version") + 1] == "1.2.3"
+    assert args[-4:] == ["--timeout", "60s", "--wait", "--atomic"]
+    assert upgrade["values"] == ["region: eu-west-1\nreplicas: 2\n"]
+
+
+def test_install_failure_raises(tmp_path, stubs, monkeypatch):
+    driver, _ = stubs
+    release = make_release(tmp_path)
+    driver.prepare([release], dict(os.environ))
+    monkeypatch.setenv("STUB_FAIL_UPGRADE", "1")
+
+    with pytest.raises(HelmError):
+        driver.install(release, dict(os.environ), timeout=60)
+
+
+def test_nginx_ingress_installs_with_the_native_driver(tmp_path, stubs):
+    plugin_dir = Path(__file__).resolve().parents[2] / "plugins" / "nginx-ingress"
+    installation = yaml.safe_load((plugin_dir / "plugin.yaml").read_text())["plugin"]["installation"]
+    assert installation_driver(installation) == "native"
+    driver, calls = stubs
+    release = release_spec("nginx-ingress", installation, "aws", plugin_dir)
+    driver.prepare([release], dict(os.environ))
+
+    driver.install(release, dict(os.environ, REPLICA_COUNT="3"), timeout=600)
+
+    upgrade = [c for c in calls() if c["args"][:1] == ["upgrade"]][0]
+    assert upgrade["args"][2:4] == ["ingress-nginx", "ingress-nginx/ingress-nginx"]
+    assert upgrade["args"][upgrade["args"].index("--namespace") + 1] == "nginx-ingress"
+    assert yaml.safe_load(upgrade["values"][0])["controller"]["replicaCount"] == 3
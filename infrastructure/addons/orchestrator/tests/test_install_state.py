@@ -0,0 +1,83 @@
+"""Install fingerprints and run checkpoints kept in the plugin manager's state directory."""
+
+from conftest import plugin_yaml
+from install_state import InstallStateStore, RunCheckpoint
+
+
+def test_records_and_forgets_installs(tmp_path):
+    store = InstallStateStore(tmp_path / "install-state.json")
+    store.record("eks-dev", "dev", "external-dns", "abc", duration=1.5)
+
+    reloaded = InstallStateStore(tmp_path / "install-state.json")
+    assert reloaded.get("eks-dev", "dev", "external-dns")["fingerprint"] == "abc"
+    assert reloaded.get("eks-prod", "dev", "external-dns") is None
+    assert list(reloaded.entries("eks-dev", "dev")) == ["external-dns"]
+
+    reloaded.forget("eks-dev", "dev", "external-dns")
+    assert InstallStateStore(tmp_path / "install-state.json").get("eks-dev", "dev", "external-dns") is None
+
+
+def test_unreadable_state_starts_empty(tmp_path):
+    path = tmp_path / "install-state.json"
+    path.write_text('{"version": 1, "entries": {"eks-dev/dev/a": {"fingerp')
+    store = InstallStateStore(path)
+
+    assert store.get("eks-dev", "dev", "a") is None
+    store.record("eks-dev", "dev", "b", "abc")
+    assert InstallStateStore(path).get("eks-dev", "dev", "b")["fingerprint"] == "abc"
+
+
+def test_state_of_another_layout_is_ignored(tmp_path):
+    path = tmp_path / "install-state.json"
+    path.write_text('["not", "a", "mapping"]')
+
+    assert InstallStateStore(path).entries("eks-dev", "dev") == {}
+
+
+def test_checkpoint_of_an_unfinished_run_can_be_resumed(tmp_path):
+    checkpoint = RunCheckpoint(tmp_path / "checkpoint.json")
+    checkpoint.start("run-1", ["a", "b", "c"])
+    checkpoint.record("a", "installed")
+    checkpoint.record("b", "failed")
+
+    saved = RunCheckpoint(tmp_path / "checkpoint.json").load()
+    assert (saved["run_id"], saved["completed"], saved["failed"]) == ("run-1", {"a": "installed"}, ["b"])
+
+    checkpoint.finish()
+    assert RunCheckpoint(tmp_path / "checkpoint.json").load() is None
+
+
+def test_unreadable_checkpoint_is_not_resumed(tmp_path, caplog):
+    path = tmp_path / "checkpoint.json"
+    path.write_text('{"version": 1, "run_id": "run-1", "compl')
+
+    assert RunCheckpoint(path).load() is None
+    assert "not resuming" in caplog.text
+
+
+def test_installs_with_a_recorded_fingerprint_are_skipped(make_manager):
+    config = {"cluster_name": "eks-dev", "plugins": {"a": {"enabled": True, "config": {"replicas": 1}}}}
+    manager = make_manager(config, {"a": plugin_yaml("a")})
+    plugin = manager.get_enabled_plugins()[0]
+    fingerprint = manager.plugin_fingerprint(plugin)
+    assert not manager.is_plugin_unchanged("a", fingerprint)
+
+    manager.install_state.record("eks-dev", "dev", "a", fingerprint)
+
+    assert manager.is_plugin_unchanged("a", fingerprint)
+    assert manager.install_and_verify_plugin(plugin) == "unchanged"
+    assert not manager.is_plugin_unchanged("a", manager.plugin_fingerprint(dict(plugin, name="b")))
+
+    config["plugins"]["a"]["config"]["replicas"] = 2
+    changed = make_manager(config)
+    assert not changed.is_plugin_unchanged("a", changed.plugin_fingerprint(changed.get_enabled_plugins()[0]))
+    assert not make_manager(dict(config, cluster_name="eks-prod")).is_plugin_unchanged("a", fingerprint)
+
+
+def test_force_reinstalls_unchanged_plugins(make_manager):
+    manager = make_manager({"cluster_name": "eks-dev", "plugins": {"a": {"enabled": True}}},
+                           {"a": plugin_yaml("a")}, force=True)
+    fingerprint = manager.plugin_fingerprint(manager.get_enabled_plugins()[0])
+    manager.install_state.record("eks-dev", "dev", "a", fingerprint)
+
+    assert not manager.is_plugin_unchanged("a", fingerprint)
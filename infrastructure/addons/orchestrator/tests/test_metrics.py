@@ -0,0 +1,85 @@
+"""The metrics registry, its Prometheus text rendering and the state kept across runs."""
+
+import json
+
+from metrics import INSTALL_BUCKETS, MetricsRegistry
+
+INSTALLS = 'plugin_manager_plugin_installs_total'
+DURATION = 'plugin_manager_plugin_install_duration_seconds'
+
+
+def test_renders_counters_gauges_and_histograms():
+    registry = MetricsRegistry()
+    registry.inc(INSTALLS, {'plugin': 'external-dns', 'result': 'success'})
+    registry.inc(INSTALLS, {'result': 'success', 'plugin': 'external-dns'})
+    registry.set('plugin_manager_last_run_success', {'action': 'install'}, 1)
+    registry.observe(DURATION, {'plugin': 'external-dns'}, 12.5)
+    registry.observe(DURATION, {'plugin': 'external-dns'}, 4000)
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE plugin_manager_plugin_installs_total counter' in lines
+    assert 'plugin_manager_plugin_installs_total{plugin="external-dns",result="success"} 2' in lines
+    assert 'plugin_manager_last_run_success{action="install"} 1' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_bucket{plugin="external-dns",le="5"} 0' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_bucket{plugin="external-dns",le="15"} 1' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_bucket{plugin="external-dns",le="1800"} 1' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_bucket{plugin="external-dns",le="+Inf"} 2' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_sum{plugin="external-dns"} 4012.5' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_count{plugin="external-dns"} 2' in lines
+    # Metrics without series are left out
+    assert not any(line.startswith('plugin_manager_rollbacks_total') for line in lines)
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc(INSTALLS, {'plugin': 'a"b\\c\nd'})
+
+    assert 'plugin_manager_plugin_installs_total{plugin="a\\"b\\\\c\\nd"} 1' in registry.render().splitlines()
+
+
+def test_series_accumulate_across_runs(tmp_path):
+    path = tmp_path / 'metrics-state.json'
+    first = MetricsRegistry()
+    first.inc(INSTALLS, {'result': 'success'})
+    first.observe(DURATION, {}, 30)
+    first.save(path)
+
+    second = MetricsRegistry()
+    second.load(path)
+    second.inc(INSTALLS, {'result': 'success'})
+    second.observe(DURATION, {}, 30)
+
+    lines = second.render().splitlines()
+    assert 'plugin_manager_plugin_installs_total{result="success"} 2' in lines
+    assert 'plugin_manager_plugin_install_duration_seconds_count 2' in lines
+
+
+def test_unusable_state_is_ignored(tmp_path):
+    path = tmp_path / 'metrics-state.json'
+    registry = MetricsRegistry()
+
+    for content in ('{"version": 1, "ser', '[]', json.dumps({'version': 0, 'series': {INSTALLS: []}})):
+        path.write_text(content)
+        registry.load(path)
+    registry.load(tmp_path / 'missing.json')
+
+    assert registry.render() == '\n'
+
+
+def test_histograms_with_another_bucket_layout_are_dropped(tmp_path):
+    path = tmp_path / 'metrics-state.json'
+    stale = {'buckets': [1, 0], 'sum': 3.0, 'count': 1}
+    current = {'buckets': [0] * len(INSTALL_BUCKETS) + [1], 'sum': 4000.0, 'count': 1}
+    path.write_text(json.dumps({'version': 1, 'series': {
+        DURATION: [{'labels': {'plugin': 'old'}, 'value': stale}, {'labels': {'plugin': 'new'}, 'value': current}],
+        'plugin_manager_removed_metric': [{'labels': {}, 'value': 1}],
+    }}))
+    registry = MetricsRegistry()
+
+    registry.load(path)
+
+    rendered = registry.render()
+    assert 'plugin="old"' not in rendered
+    assert 'plugin_manager_plugin_install_duration_seconds_count{plugin="new"} 1' in rendered
+    assert 'plugin_manager_removed_metric' not in rendered
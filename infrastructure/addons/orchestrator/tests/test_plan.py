@@ -0,0 +1,35 @@
+"""The plan action: what an install of the current config would do."""
+
+from conftest import plugin_yaml
+
+
+def test_plugins_failing_validation_are_planned_as_invalid(make_manager, caplog):
+    config = {
+        "cluster_name": "eks-dev",
+        "plugins": {
+            "present": {"enabled": True, "priority": 1},
+            "missing": {"enabled": True, "priority": 2},
+            "disabled": {"enabled": False},
+        },
+    }
+    manager = make_manager(config, {"present": plugin_yaml("present")})
+
+    actions = manager.plan_plugins()
+
+    assert actions == {"present": "add", "missing": "invalid"}
+    assert "an install would not start" in caplog.text
+    assert manager.install_all_plugins() is False
+
+
+def test_recorded_installs_are_unchanged_or_changed(make_manager):
+    config = {"cluster_name": "eks-dev", "plugins": {"a": {"enabled": True, "config": {"replicas": 1}}}}
+    manager = make_manager(config, {"a": plugin_yaml("a")})
+    plugin = manager.get_enabled_plugins()[0]
+    manager.install_state.record("eks-dev", "dev", "a", manager.plugin_fingerprint(plugin),
+                                 components=manager.plugin_fingerprint_components(plugin))
+    manager.install_state.record("eks-dev", "dev", "gone", "abc")
+
+    assert manager.plan_plugins() == {"a": "no-op", "gone": "remove"}
+
+    config["plugins"]["a"]["config"]["replicas"] = 2
+    assert make_manager(config).plan_plugins() == {"a": "change", "gone": "remove"}
@@ -0,0 +1,82 @@
+"""Streaming plugin script output and killing scripts that run past their timeout."""
+
+import logging
+import os
+import sys
+import time
+
+import process_runner
+from process_runner import OutputTail, run_streaming
+
+
+def run(tmp_path, script, timeout=10, **options):
+    return run_streaming(["bash", "-c", script], env=dict(os.environ), cwd=tmp_path, timeout=timeout,
+                         prefix="demo", **options)
+
+
+def test_output_is_logged_line_by_line(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+
+    result = run(tmp_path, "echo out; echo err >&2; exit 3")
+
+    assert (result.returncode, result.timed_out) == (3, False)
+    assert result.output_tail == "out\nerr\n"
+    assert "[demo] out" in caplog.text and "[demo] err" in caplog.text
+
+
+def test_only_the_tail_of_the_output_is_kept(tmp_path):
+    result = run(tmp_path, "for i in $(seq 1 100); do echo line-$i; done", tail_bytes=32)
+
+    assert result.output_tail.startswith("... (earlier output truncated)\n")
+    assert result.output_tail.endswith("line-100\n")
+    assert "line-1\n" not in result.output_tail
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    started = time.monotonic()
+
+    result = run(tmp_path, f"sleep 60 & echo $! > {pid_file}; echo started; wait", timeout=1)
+
+    assert result.timed_out
+    assert result.returncode is not None and result.returncode < 0
+    assert result.output_tail == "started\n"
+    assert time.monotonic() - started < 10
+    child = int(pid_file.read_text())
+    assert not process_alive(child)
+
+
+def test_scripts_ignoring_sigterm_are_killed(tmp_path, monkeypatch):
+    monkeypatch.setattr(process_runner, "KILL_GRACE_PERIOD", 0.5)
+
+    result = run_streaming([sys.executable, "-c", "import signal, time\n"
+                            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+                            "print('ready', flush=True)\n"
+                            "time.sleep(60)\n"],
+                           env=dict(os.environ), cwd=tmp_path, timeout=1, prefix="demo")
+
+    assert result.timed_out
+    assert result.returncode == -9
+    assert result.duration < 10
+
+
+def test_tail_keeps_the_last_line_even_if_it_is_too_long():
+    tail = OutputTail(4)
+    tail.append("first\n")
+    tail.append("a much longer line\n")
+
+    assert tail.truncated
+    assert tail.text() == "... (earlier output truncated)\na much longer line\n"
+
+
+def process_alive(pid):
+    # The killed child is reparented and may linger briefly as a zombie
+    for _ in range(50):
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                if stat.read().rsplit(")", 1)[1].split()[0] == "Z":
+                    return False
+        except FileNotFoundError:
+            return False
+        time.sleep(0.1)
+    return True
@@ -0,0 +1,125 @@
+"""Loading plugin classes from plugin.py and the settings and deadline of a hook."""
+
+import sys
+import textwrap
+import time
+
+import pytest
+
+from python_plugin import PluginError, PythonPlugin, load_plugin_class
+
+
+def write_plugin(tmp_path, source, name="demo"):
+    plugin_dir = tmp_path / name
+    plugin_dir.mkdir()
+    (plugin_dir / "plugin.py").write_text(textwrap.dedent(source))
+    return plugin_dir
+
+
+def test_loads_the_single_subclass(tmp_path):
+    plugin_dir = write_plugin(tmp_path, """
+        from python_plugin import PythonPlugin
+
+        class DemoPlugin(PythonPlugin):
+            def install(self):
+                return True
+    """)
+
+    plugin_class = load_plugin_class(plugin_dir)
+
+    assert plugin_class.__name__ == "DemoPlugin"
+    assert plugin_class.implements("install")
+    assert not plugin_class.implements("uninstall")
+
+
+def test_imported_base_classes_do_not_count(tmp_path):
+    plugin_dir = write_plugin(tmp_path, """
+        from python_plugin import PythonPlugin
+        from argparse import ArgumentParser
+
+        class DemoPlugin(PythonPlugin):
+            pass
+    """)
+
+    assert load_plugin_class(plugin_dir).__name__ == "DemoPlugin"
+
+
+def test_plugin_class_picks_one_of_several(tmp_path):
+    plugin_dir = write_plugin(tmp_path, """
+        from python_plugin import PythonPlugin
+
+        class BasePlugin(PythonPlugin):
+            pass
+
+        class DemoPlugin(BasePlugin):
+            pass
+
+        PLUGIN_CLASS = DemoPlugin
+    """)
+
+    assert load_plugin_class(plugin_dir).__name__ == "DemoPlugin"
+
+
+@pytest.mark.parametrize("source, found", [
+    ("from python_plugin import PythonPlugin\n", 0),
+    ("from python_plugin import PythonPlugin\nclass A(PythonPlugin): pass\nclass B(PythonPlugin): pass\n", 2),
+])
+def test_requires_exactly_one_subclass(tmp_path, source, found):
+    plugin_dir = write_plugin(tmp_path, source)
+
+    with pytest.raises(PluginError, match=f"found {found}"):
+        load_plugin_class(plugin_dir)
+
+
+def test_missing_module(tmp_path):
+    with pytest.raises(PluginError, match="not found"):
+        load_plugin_class(tmp_path)
+
+
+def test_import_error_leaves_no_module_behind(tmp_path):
+    plugin_dir = write_plugin(tmp_path, "raise RuntimeError('broken plugin')\n", name="broken")
+
+    with pytest.raises(PluginError, match="broken plugin"):
+        load_plugin_class(plugin_dir)
+    assert "addon_plugin_broken" not in sys.modules
+
+
+def test_module_is_imported_once(tmp_path):
+    plugin_dir = write_plugin(tmp_path, """
+        from python_plugin import PythonPlugin
+
+        class DemoPlugin(PythonPlugin):
+            pass
+    """)
+    first = load_plugin_class(plugin_dir)
+    (plugin_dir / "plugin.py").write_text("raise RuntimeError('imported again')\n")
+
+    assert load_plugin_class(plugin_dir) is first
+
+
+def test_config_from_env_takes_the_first_set_variable():
+    class DemoPlugin(PythonPlugin):
+        ENV_SETTINGS = {"provider": ("DNS_PROVIDER", "PROVIDER"), "policy": ("POLICY",)}
+
+    config = DemoPlugin.config_from_env({"DNS_PROVIDER": "", "PROVIDER": "aws", "OTHER": "x"})
+
+    assert config == {"provider": "aws"}
+
+
+def test_settings_read_the_config(tmp_path):
+    plugin = PythonPlugin("demo", tmp_path, {"POLICY": "env"}, {"policy": "sync", "prefix": ""})
+
+    assert plugin.setting("policy") == "sync"
+    assert plugin.setting("prefix", "default") == "default"
+    with pytest.raises(PluginError, match="registry"):
+        plugin.require_setting("registry")
+
+
+def test_commands_are_cut_off_at_the_deadline(tmp_path):
+    plugin = PythonPlugin("demo", tmp_path, {}, deadline=time.monotonic() + 0.5)
+
+    assert plugin.remaining(60) <= 0.5
+    with pytest.raises(PluginError, match="timed out"):
+        plugin.run([sys.executable, "-c", "import time; time.sleep(5)"], capture_output=True)
+    with pytest.raises(PluginError, match="ran out of time"):
+        plugin.run([sys.executable, "-c", "pass"])
@@ -0,0 +1,59 @@
+"""${VAR} values templates and the compiled templates they share with config resolution."""
+
+import stat
+
+from config_templates import compile_template
+from values_template import compile_values, load_values, main
+
+ENV = {"AWS_REGION": "eu-west-1", "EMPTY": ""}
+
+
+def test_renders_variables_and_defaults():
+    template = compile_values("region: ${AWS_REGION}\nlevel: ${LOG_LEVEL:-info}\nprefix: ${UNSET}\n")
+
+    assert template.render(ENV.get) == "region: eu-west-1\nlevel: info\nprefix: \n"
+
+
+def test_empty_is_not_unset():
+    template = compile_values("${EMPTY:-fallback}|${MISSING:-fallback}|${MISSING:-}")
+
+    assert template.render(ENV.get) == "|fallback|"
+    assert template.inputs(ENV.get) == {"EMPTY": "", "MISSING": None}
+
+
+def test_other_dollar_syntax_is_left_alone():
+    source = "log_format: '$remote_addr - ${HOST:-x} {{ NOT_A_VALUES_VARIABLE }}'"
+    template = compile_values(source)
+
+    assert template.variables == {"HOST"}
+    assert template.render({}.get) == "log_format: '$remote_addr - x {{ NOT_A_VALUES_VARIABLE }}'"
+
+
+def test_template_without_variables_renders_its_source():
+    source = "replicas: 2\n"
+
+    assert compile_values(source).render(ENV.get) is source
+
+
+def test_compiled_once_per_syntax():
+    source = "${AWS_REGION} {{ AWS_REGION | default('us-east-1') }}"
+
+    assert compile_values(source) is compile_values(source)
+    assert compile_values(source).render({}.get) == " {{ AWS_REGION | default('us-east-1') }}"
+    assert compile_template(source).render({}.get) == "${AWS_REGION} us-east-1"
+
+
+def test_cli_writes_a_private_file(tmp_path, monkeypatch):
+    (tmp_path / "values.yaml").write_text("region: ${AWS_REGION:-us-east-1}\n")
+    output = tmp_path / "rendered.yaml"
+    monkeypatch.setenv("AWS_REGION", "eu-central-1")
+
+    assert main(["values_template.py", str(tmp_path / "values.yaml"), str(output)]) == 0
+    assert output.read_text() == "region: eu-central-1\n"
+    assert stat.S_IMODE(output.stat().st_mode) == 0o600
+    assert load_values(tmp_path / "values.yaml").variables == {"AWS_REGION"}
+
+
+def test_cli_reports_unreadable_templates(tmp_path, capsys):
+    assert main(["values_template.py", str(tmp_path / "missing.yaml"), str(tmp_path / "out.yaml")]) == 1
+    assert "values template" in capsys.readouterr().err
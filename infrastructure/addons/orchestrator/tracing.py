@@ -0,0 +1,216 @@
+"""
+Run tracing for the Kubernetes Add-ons Plugin Manager.
+
+Records nested timing spans (config load, dependency resolution, each
+plugin phase, each script run) for one plugin-manager run and exports them
+either as OpenTelemetry OTLP/JSON or as a Chrome trace-event file, which
+chrome://tracing, Perfetto and most trace viewers open directly.
+
+Spans nest per thread. Work handed to a thread pool keeps its parent when
+the callable is wrapped with Tracer.bind; spans started on a thread without
+a parent attach to the run's root span.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_FORMATS = ('otel', 'chrome')
+
+
+class Span:
+    """One timed operation"""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'error',
+                 'thread_id', 'thread_name')
+
+    def __init__(self, name: str, span_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start_ns = 0
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+
+class Tracer:
+    """Collects the spans of one run; safe to use from worker threads"""
+
+    def __init__(self, service_name: str = 'plugin-manager', attributes: Optional[Dict[str, Any]] = None):
+        self.service_name = service_name
+        self.attributes = dict(attributes or {})
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root: Optional[Span] = None
+        # Wall-clock anchor for monotonic span timestamps
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        if stack:
+            return stack[-1]
+        root = self._root
+        return root if root is not None and root.end_ns is None else None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span"""
+        parent = self.current()
+        span = Span(name, os.urandom(8).hex(), parent.span_id if parent else None, attributes)
+        if parent is None and self._root is None:
+            self._root = span
+        stack = self._stack()
+        stack.append(span)
+        span.start_ns = self._epoch_ns + time.perf_counter_ns()
+        try:
+            yield span
+        except SystemExit:
+            raise
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end_ns = self._epoch_ns + time.perf_counter_ns()
+            stack.pop()
+            with self._lock:
+                self.spans.append(span)
+
+    def bind(self, func: Callable) -> Callable:
+        """Wrap `func` so spans it starts on another thread nest under the current span"""
+        parent = self.current()
+
+        @functools.wraps(func)
+        def run_with_parent(*args, **kwargs):
+            stack = self._stack()
+            if parent is None or stack:
+                return func(*args, **kwargs)
+            stack.append(parent)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stack.pop()
+
+        return run_with_parent
+
+    def export(self, path: str, trace_format: str = 'otel') -> None:
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {trace_format}")
+        document = self.to_otel() if trace_format == 'otel' else self.to_chrome()
+        with open(path, 'w') as f:
+            json.dump(document, f, indent=2 if trace_format == 'otel' else None)
+
+    def to_otel(self) -> Dict:
+        """Spans as an OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otel_attributes(dict(self.attributes, **{'service.name': self.service_name}))},
+                'scopeSpans': [{
+                    'scope': {'name': self.service_name},
+                    'spans': [
+                        {
+                            'traceId': self.trace_id,
+                            'spanId': span.span_id,
+                            'parentSpanId': span.parent_id or '',
+                            'name': span.name,
+                            'kind': 1,  # SPAN_KIND_INTERNAL
+                            'startTimeUnixNano': str(span.start_ns),
+                            'endTimeUnixNano': str(span.end_ns),
+                            'attributes': _otel_attributes(dict(span.attributes, **{'thread.name': span.thread_name})),
+                            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }],
+        }
+
+    def to_chrome(self) -> Dict:
+        """Spans as Chrome trace events, one lane per thread"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.service_name}}]
+        for thread_id, thread_name in {span.thread_id: span.thread_name for span in spans}.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': thread_name}})
+        for span in spans:
+            args = dict(span.attributes)
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': span.start_ns / 1000,
+                'dur': (span.end_ns - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': dict(self.attributes)}
+
+
+def _otel_attributes(attributes: Dict[str, Any]) -> List[Dict]:
+    converted = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        converted.append({'key': key, 'value': typed})
+    return converted
+
+
+def traced(name: str) -> Callable:
+    """Record a method call as a span on `self.tracer`
+
+    A str or plugin dict first argument is recorded as the plugin name, and
+    a False or 'failed' return value marks the span as failed.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            tracer = getattr(self, 'tracer', None)
+            if tracer is None:
+                return method(self, *args, **kwargs)
+            attributes = {}
+            if args and isinstance(args[0], str):
+                attributes['plugin.name'] = args[0]
+            elif args and isinstance(args[0], dict) and 'name' in args[0]:
+                attributes['plugin.name'] = args[0]['name']
+            with tracer.span(name, **attributes) as span:
+                result = method(self, *args, **kwargs)
+                if result is False or result == 'failed':
+                    span.set_error(f"returned {result!r}")
+                return result
+        return wrapper
+    return decorator
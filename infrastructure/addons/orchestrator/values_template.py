@@ -0,0 +1,58 @@
+"""
+${VAR} interpolation for plugin Helm values files.
+
+Values files under plugins/*/values reference the environment as ``${VAR}``
+or ``${VAR:-default}``; a default applies when the variable is unset, an
+unset variable without one renders as ''. Anything else, such as the
+``$remote_addr`` variables of an nginx log format, is left alone.
+
+Templates are compiled by config_templates with this syntax, so values
+files share the compiled-template cache of the config resolution and
+expose the set of variables they reference, which lets callers key caches
+of rendered values on exactly the inputs that matter.
+
+Install scripts render a values file through the command line:
+
+    python3 values_template.py <template> <output>
+
+Only the standard library is used, so scripts can run it with any python3.
+"""
+
+import os
+import re
+import sys
+from pathlib import Path
+
+from config_templates import CompiledTemplate, compile_template
+
+VALUES_PATTERN = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+
+def compile_values(source: str) -> CompiledTemplate:
+    """Compile a values template, reusing the cached result for content seen before"""
+    return compile_template(source, VALUES_PATTERN)
+
+
+def load_values(path: Path) -> CompiledTemplate:
+    """Compiled template of a values file"""
+    return compile_values(Path(path).read_text())
+
+
+def main(argv) -> int:
+    if len(argv) != 3:
+        print(f"usage: {argv[0]} <template> <output>", file=sys.stderr)
+        return 2
+    try:
+        rendered = load_values(Path(argv[1])).render(os.environ.get)
+        # The rendered values can carry credentials from the environment
+        fd = os.open(argv[2], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(rendered)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"values template: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
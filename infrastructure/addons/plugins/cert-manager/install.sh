@@ -70,14 +70,14 @@ prepare_values() {
 install_plugin() {
     log_info "Installing Cert-Manager..."
     
-    # Add Helm repository
-    add_helm_repo "jetstack" "https://charts.jetstack.io" || exit 1
+    # Use the cached chart, or add the Helm repository
+    resolve_helm_chart "jetstack" "https://charts.jetstack.io" "cert-manager" "v1.13.2" || exit 1
     
     # Create namespace with labels
     ensure_namespace "$NAMESPACE" "app.kubernetes.io/managed-by=plugin-manager app.kubernetes.io/name=cert-manager" || exit 1
     
     # Install with Helm
-    helm_install_or_upgrade "cert-manager" "jetstack/cert-manager" "$NAMESPACE" "$TEMP_VALUES_FILE" "v1.13.2" 600 || exit 1
+    helm_install_or_upgrade "cert-manager" "$HELM_CHART" "$NAMESPACE" "$TEMP_VALUES_FILE" "v1.13.2" 600 || exit 1
     
     log_success "Cert-Manager installed successfully"
 }
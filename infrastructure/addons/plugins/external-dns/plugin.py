@@ -0,0 +1,894 @@
+"""External DNS plugin, run in process by the plugin manager.
+
+install.py runs the same installer standalone (install.sh execs it).
+"""
+
+from __future__ import annotations
+
+import ast
+import base64
+import codecs
+import hashlib
+import json
+import logging
+import os
+import selectors
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import yaml
+
+# The plugin framework, chart cache and values templates live next to the plugin manager
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "orchestrator"))
+
+from chart_cache import ChartCache, ChartCacheError  # noqa: E402
+from config_templates import CompiledTemplate  # noqa: E402
+from python_plugin import PluginError, PythonPlugin  # noqa: E402
+from values_template import load_values  # noqa: E402
+
+CHART_REPOSITORY = "https://kubernetes-sigs.github.io/external-dns/"
+DEFAULT_RELEASE = "external-dns"
+
+
+def parse_domain_filters(value: Any) -> List[str]:
+    """Domains of the domain_filters setting.
+
+    A list from the plugin config, or a string when run standalone: a JSON or
+    Python list literal ('["a.com", "b.com"]', the str() of a list) or a
+    comma-separated list.
+    """
+    items = value if isinstance(value, (list, tuple)) else None
+    if items is None:
+        raw = str(value or "").strip()
+        if raw.startswith("["):
+            try:
+                parsed = json.loads(raw)
+            except ValueError:
+                try:
+                    parsed = ast.literal_eval(raw)
+                except (ValueError, SyntaxError):
+                    parsed = None
+            if isinstance(parsed, (list, tuple)):
+                items = parsed
+        if items is None:
+            items = raw.split(",")
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+@dataclass
+class InstallContext:
+    plugin_name: str
+    plugin_dir: Path
+    namespace: str
+    cloud_provider: str
+    dns_provider: str
+    environment: str
+    cluster_name: str
+    domain_filters: List[str]
+    txt_owner_id: str
+    txt_prefix: Optional[str]
+    aws_auth_mode: Optional[str]
+    aws_region: Optional[str]
+    aws_credentials_secret_name: str
+    aws_role_arn: Optional[str]
+    aws_web_identity_token_file: Optional[str]
+    plugin_version: str
+    release_name: str = DEFAULT_RELEASE
+
+
+def chart_fullname(release_name: str) -> str:
+    """Name the chart gives the release's deployment, service account and RBAC objects."""
+    return release_name if "external-dns" in release_name else f"{release_name}-external-dns"
+
+
+def instance_configs(specs: List[Any], config: Mapping[str, Any], cluster_name: str) -> List[Dict[str, Any]]:
+    """Settings of each configured provider instance.
+
+    An instance's settings overlay the shared ones. Every instance gets its
+    own release, external-dns-<provider> unless it names one, and its own TXT
+    owner, <txt_owner_id>-<provider> unless it sets one, so the instances
+    never claim each other's records.
+    """
+    shared = {key: value for key, value in config.items() if key not in ("providers", "release")}
+    configs = []
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict) or not spec.get("provider"):
+            raise PluginError(f"providers[{index}] must be a mapping with a provider")
+        provider = str(spec["provider"]).lower()
+        instance_config = dict(shared, **spec)
+        instance_config["provider"] = provider
+        instance_config["release"] = str(spec.get("release") or f"{DEFAULT_RELEASE}-{provider}")
+        if not spec.get("txt_owner_id"):
+            owner = config.get("txt_owner_id") or cluster_name or DEFAULT_RELEASE
+            instance_config["txt_owner_id"] = f"{owner}-{provider}"
+        configs.append(instance_config)
+
+    for setting in ("release", "txt_owner_id"):
+        values = [str(instance_config[setting]) for instance_config in configs]
+        duplicates = sorted({value for value in values if values.count(value) > 1})
+        if duplicates:
+            raise PluginError(f"Each provider needs its own {setting}; shared: {', '.join(duplicates)}")
+    return configs
+
+
+def parse_values(rendered: str, path: Path) -> Dict[str, Any]:
+    data = yaml.safe_load(rendered) or {}
+    if not isinstance(data, dict):
+        raise PluginError(f"Unexpected data structure in values file: {path}")
+    return data
+
+
+def update_values_for_provider(context: InstallContext, values: Dict[str, Any]) -> None:
+    if context.dns_provider == "aws":
+        extra_env: List[Dict[str, Any]] = values.get("extraEnv", []) or []
+        if context.aws_auth_mode == "oidc":
+            extra_env.extend(
+                [
+                    {"name": "AWS_REGION", "value": context.aws_region},
+                    {"name": "AWS_ROLE_ARN", "value": context.aws_role_arn},
+                    {
+                        "name": "AWS_WEB_IDENTITY_TOKEN_FILE",
+                        "value": context.aws_web_identity_token_file,
+                    },
+                ]
+            )
+        elif context.aws_auth_mode == "static":
+            extra_env.extend(
+                [
+                    {"name": "AWS_REGION", "value": context.aws_region},
+                    {
+                        "name": "AWS_ACCESS_KEY_ID",
+                        "valueFrom": {
+                            "secretKeyRef": {
+                                "name": context.aws_credentials_secret_name,
+                                "key": "aws-access-key-id",
+                            }
+                        },
+                    },
+                    {
+                        "name": "AWS_SECRET_ACCESS_KEY",
+                        "valueFrom": {
+                            "secretKeyRef": {
+                                "name": context.aws_credentials_secret_name,
+                                "key": "aws-secret-access-key",
+                            }
+                        },
+                    },
+                ]
+            )
+        values["extraEnv"] = extra_env
+        # Some chart versions expect env instead of extraEnv; keep both in sync.
+        existing_env: List[Dict[str, Any]] = values.get("env", []) or []
+        existing_env.extend(extra_env)
+        values["env"] = existing_env
+
+    if context.dns_provider == "azure":
+        azure_section = values.get("azure", {}) or {}
+        azure_section["useManagedIdentityExtension"] = False
+        azure_section.pop("userAssignedIdentityID", None)
+        values["azure"] = azure_section
+
+        service_account = values.get("serviceAccount")
+        if isinstance(service_account, dict):
+            service_account.pop("annotations", None)
+
+
+def ensure_domain_filters(values: Dict[str, Any], context: InstallContext) -> None:
+    """Set domainFilters from the domain_filters setting, unless the values file pins a non-empty list."""
+    existing = values.get("domainFilters")
+    if isinstance(existing, list) and existing:
+        return
+    values["domainFilters"] = context.domain_filters
+
+
+def ensure_txt_settings(values: Dict[str, Any], context: InstallContext) -> None:
+    values["txtOwnerId"] = context.txt_owner_id
+    if context.txt_prefix:
+        values["txtPrefix"] = context.txt_prefix
+
+
+# Bump when the post-processing of the rendered values changes
+VALUES_CACHE_VERSION = 3
+
+
+def values_cache_key(template: CompiledTemplate, variables: Mapping[str, str], context: InstallContext) -> str:
+    """Hash of everything the final values depend on.
+
+    That is the template, the variables it references (unset is distinct from
+    empty) and the context fields the provider updates use.
+    """
+    inputs = {
+        "version": VALUES_CACHE_VERSION,
+        "template": hashlib.sha256(template.source.encode()).hexdigest(),
+        "variables": template.inputs(variables.get),
+        "context": {
+            "dns_provider": context.dns_provider,
+            "domain_filters": context.domain_filters,
+            "txt_owner_id": context.txt_owner_id,
+            "txt_prefix": context.txt_prefix,
+            "aws_auth_mode": context.aws_auth_mode,
+            "aws_region": context.aws_region,
+            "aws_credentials_secret_name": context.aws_credentials_secret_name,
+            "aws_role_arn": context.aws_role_arn,
+            "aws_web_identity_token_file": context.aws_web_identity_token_file,
+        },
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def read_cached_values(cache_file: Optional[Path], key: str) -> Optional[str]:
+    if cache_file is None:
+        return None
+    try:
+        cached = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        return None
+    return cached.get("values") if cached.get("key") == key else None
+
+
+def write_cached_values(cache_file: Optional[Path], key: str, document: str) -> None:
+    if cache_file is None:
+        return
+    try:
+        cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        # The rendered values can carry credentials from the environment
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as handle:
+            json.dump({"key": key, "values": document}, handle)
+        os.replace(tmp_file, cache_file)
+    except OSError as exc:
+        logging.warning("Could not cache rendered Helm values: %s", exc)
+
+
+def namespace_manifest(namespace: str, labels: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "apiVersion": "v1",
+        "kind": "Namespace",
+        "metadata": {"name": namespace, "labels": dict(labels)},
+    }
+
+
+POD_SELECTOR = "app.kubernetes.io/name=external-dns"
+READY_TIMEOUT_SECONDS = 300
+
+
+def release_selector(release_name: str) -> str:
+    """Label selector of one release's objects; several releases can share a namespace."""
+    return f"{POD_SELECTOR},app.kubernetes.io/instance={release_name}"
+
+
+def iter_json_stream(process: subprocess.Popen, deadline: float) -> Iterator[Dict[str, Any]]:
+    """Objects of a concatenated JSON stream (kubectl get -w -o json) as they arrive, until the deadline."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not selector.select(remaining):
+                return
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                return
+            buffer += utf8.decode(chunk)
+            while True:
+                buffer = buffer.lstrip()
+                if not buffer:
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    break  # incomplete object; wait for more output
+                buffer = buffer[end:]
+                yield obj
+
+
+def deployment_progress(deployment: Dict[str, Any]) -> Tuple[bool, str]:
+    """Whether a deployment is available with all updated pods ready, as kubectl rollout status decides it."""
+    metadata = deployment.get("metadata", {})
+    spec = deployment.get("spec", {})
+    status = deployment.get("status", {})
+    desired = spec.get("replicas", 1)
+    updated = status.get("updatedReplicas", 0)
+    ready = status.get("readyReplicas", 0)
+    available = status.get("availableReplicas", 0)
+
+    if status.get("observedGeneration", 0) < metadata.get("generation", 0):
+        return False, "waiting for the deployment update to be observed"
+    if updated < desired:
+        return False, f"{updated} of {desired} pods updated"
+    if status.get("replicas", 0) > updated:
+        return False, f"{status['replicas'] - updated} old pods pending termination"
+    if ready < updated or available < updated:
+        return False, f"{min(ready, available)} of {updated} pods ready"
+    conditions = {c.get("type"): c.get("status") for c in status.get("conditions", [])}
+    if conditions.get("Available") != "True":
+        return False, "deployment not yet available"
+    return True, f"{ready} of {desired} pods ready"
+
+
+def has_readiness_probe(deployment: Dict[str, Any]) -> bool:
+    containers = deployment.get("spec", {}).get("template", {}).get("spec", {}).get("containers", [])
+    return bool(containers) and all(container.get("readinessProbe") for container in containers)
+
+
+VERIFY_KINDS = (
+    "deployments",
+    "replicasets",
+    "pods",
+    "services",
+    "serviceaccounts",
+    "clusterroles",
+    "clusterrolebindings",
+)
+# Kinds the chart always creates; a missing one points at a broken release
+EXPECTED_KINDS = ("Deployment", "ServiceAccount", "ClusterRole", "ClusterRoleBinding")
+
+
+class ExternalDnsPlugin(PythonPlugin):
+    """Installs the external-dns Helm release with provider credentials and values.
+
+    Settings come from the plugin config; the environment carries the cluster,
+    cloud provider and credentials. Cloud settings (aws_region, aws_role_arn,
+    azure_subscription_id, ...) fall back to the cloud-level AWS_*/AZURE_*
+    variables the plugin manager exports.
+    """
+
+    ENV_SETTINGS = {
+        "provider": ("DNS_PROVIDER", "EXTERNAL_DNS_PROVIDER", "PROVIDER"),
+        "providers": ("EXTERNAL_DNS_PROVIDERS",),
+        "release": ("EXTERNAL_DNS_RELEASE",),
+        "namespace": ("NAMESPACE",),
+        "domain_filters": ("DOMAIN_FILTERS",),
+        "txt_owner_id": ("TXT_OWNER_ID",),
+        "txt_prefix": ("TXT_PREFIX",),
+        "policy": ("POLICY",),
+        "registry": ("REGISTRY",),
+        "plugin_version": ("PLUGIN_VERSION",),
+        "aws_credentials_secret_name": ("AWS_CREDENTIALS_SECRET_NAME",),
+    }
+
+    # Releases whose install or uninstall failed in the last run_concurrently()
+    failed_releases: Tuple[str, ...] = ()
+
+    @property
+    def namespace(self) -> str:
+        return str(self.setting("namespace", "external-dns-system"))
+
+    @property
+    def release_name(self) -> str:
+        return str(self.setting("release", DEFAULT_RELEASE))
+
+    def cloud_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """A cloud setting of the plugin config, else the environment variable of the same name"""
+        value = self.setting(key)
+        return str(value) if value is not None else self.optional(key.upper(), default)
+
+    def gather_context(self) -> InstallContext:
+        plugin_name = self.optional("PLUGIN_NAME", self.name)
+        cloud_provider = self.require("CLOUD_PROVIDER")
+        dns_provider = str(self.setting("provider", cloud_provider)).lower()
+        environment = self.optional("ENVIRONMENT", "")
+        cluster_name = self.require("CLUSTER_NAME")
+        domain_filters = parse_domain_filters(self.require_setting("domain_filters"))
+        if not domain_filters:
+            raise PluginError("domain_filters must contain at least one domain")
+        txt_owner_id = str(self.require_setting("txt_owner_id"))
+        txt_prefix = self.setting("txt_prefix")
+        plugin_version = str(self.setting("plugin_version", "1.13.1"))
+        aws_credentials_secret = str(self.setting("aws_credentials_secret_name", "external-dns-aws-credentials"))
+
+        aws_auth_mode: Optional[str] = None
+        aws_region = None
+        aws_role_arn = self.cloud_setting("aws_role_arn")
+        aws_web_identity_file = self.cloud_setting(
+            "aws_web_identity_token_file",
+            "/var/run/secrets/azure/tokens/azure-identity-token",
+        )
+
+        if dns_provider == "aws":
+            aws_region = self.cloud_setting("aws_region")
+            if not aws_region:
+                raise PluginError("aws_region (or AWS_REGION) must be set when using AWS as DNS provider")
+            access_key = self.optional("AWS_ACCESS_KEY_ID")
+            secret_key = self.optional("AWS_SECRET_ACCESS_KEY")
+            if access_key and secret_key:
+                aws_auth_mode = "static"
+            elif aws_role_arn:
+                aws_auth_mode = "oidc"
+            else:
+                raise PluginError(
+                    "Either AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY or AWS_ROLE_ARN must be provided "
+                    "when using AWS as DNS provider"
+                )
+
+        if dns_provider == "azure":
+            for key in ("azure_subscription_id", "azure_resource_group"):
+                if not self.cloud_setting(key):
+                    raise PluginError(f"{key} (or {key.upper()}) must be set when using Azure as DNS provider")
+
+        return InstallContext(
+            plugin_name=plugin_name,
+            plugin_dir=self.plugin_dir,
+            namespace=self.namespace,
+            cloud_provider=cloud_provider,
+            dns_provider=dns_provider,
+            environment=environment,
+            cluster_name=cluster_name,
+            domain_filters=domain_filters,
+            txt_owner_id=txt_owner_id,
+            txt_prefix=str(txt_prefix) if txt_prefix is not None else None,
+            aws_auth_mode=aws_auth_mode,
+            aws_region=aws_region,
+            aws_credentials_secret_name=aws_credentials_secret,
+            aws_role_arn=aws_role_arn,
+            aws_web_identity_token_file=aws_web_identity_file,
+            plugin_version=plugin_version,
+            release_name=self.release_name,
+        )
+
+    def provider_specs(self) -> List[Any]:
+        """Provider instances from the plugin config; EXTERNAL_DNS_PROVIDERS holds them as JSON when run standalone."""
+        specs = self.setting("providers")
+        if isinstance(specs, str):
+            try:
+                specs = json.loads(specs)
+            except ValueError as exc:
+                raise PluginError(f"EXTERNAL_DNS_PROVIDERS is not valid JSON: {exc}")
+        if specs is not None and not isinstance(specs, list):
+            raise PluginError("external-dns providers must be a list")
+        return specs or []
+
+    def instances(self) -> List["ExternalDnsPlugin"]:
+        """The plugin itself for a single provider, else one plugin per configured provider instance."""
+        specs = self.provider_specs()
+        if not specs:
+            return [self]
+        env = dict(self.env, PLUGIN_NAME=self.optional("PLUGIN_NAME", self.name))
+        return [
+            type(self)(instance_config["release"], self.plugin_dir, env, instance_config, deadline=self.deadline)
+            for instance_config in instance_configs(specs, self.config, self.optional("CLUSTER_NAME", ""))
+        ]
+
+    def run_concurrently(self, tasks: Dict[str, Callable[[], None]]) -> None:
+        """Run one task per release at the same time; raises once all of them finished if any failed.
+
+        The releases whose task failed are kept in failed_releases.
+        """
+        if len(tasks) == 1:
+            release, task = next(iter(tasks.items()))
+            try:
+                task()
+            except Exception:
+                self.failed_releases = (release,)
+                raise
+            return
+        failed = []
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix=self.name) as executor:
+            futures = {release: executor.submit(task) for release, task in tasks.items()}
+            for release, future in futures.items():
+                try:
+                    future.result()
+                except Exception as exc:
+                    self.log.error("Release %s failed: %s", release, exc)
+                    failed.append(release)
+        self.failed_releases = tuple(failed)
+        if failed:
+            raise PluginError(f"{len(failed)} of {len(tasks)} external-dns releases failed: {', '.join(failed)}")
+
+    def install(self) -> None:
+        instances = self.instances()
+        contexts = [instance.gather_context() for instance in instances]
+        context = contexts[0]
+        self.log.info("Installing plugin: %s", context.plugin_name)
+        self.log.info("Environment: %s", context.environment)
+        self.log.info("Cloud Provider: %s", context.cloud_provider)
+        for instance_context in contexts:
+            self.log.info("DNS Provider: %s (release %s)", instance_context.dns_provider, instance_context.release_name)
+        self.log.info("Cluster: %s", context.cluster_name)
+
+        # Render every release's values before touching the cluster
+        documents = [instance.prepare_values(c) for instance, c in zip(instances, contexts)]
+
+        # Shared by all releases: the chart, the namespaces and the credentials secrets
+        chart_args = self.resolve_chart(context)
+        self.apply_manifests(self.shared_manifests(instances, contexts))
+
+        self.run_concurrently({
+            c.release_name: (lambda instance=instance, c=c, document=document:
+                             instance.install_release(c, chart_args, document))
+            for instance, c, document in zip(instances, contexts, documents)
+        })
+
+    def health_check(self) -> bool:
+        """One read of each release's deployment: healthy once every rollout is complete."""
+        healthy = True
+        for instance in self.instances():
+            namespace = instance.namespace
+            name = chart_fullname(instance.release_name)
+            result = instance.run(
+                ["kubectl", "get", "deployment", name, "--namespace", namespace, "-o", "json"],
+                capture_output=True,
+                check=False,
+                timeout=30,
+            )
+            if result.returncode != 0:
+                instance.log.warning("Deployment %s not found in namespace %s", name, namespace)
+                healthy = False
+                continue
+            ready, progress = deployment_progress(json.loads(result.stdout))
+            (instance.log.info if ready else instance.log.warning)("Deployment %s: %s", name, progress)
+            healthy = healthy and ready
+        return healthy
+
+    def uninstall(self) -> None:
+        instances = self.instances()
+        self.run_concurrently({
+            instance.release_name: instance.uninstall_release
+            for instance in instances
+        })
+        self.delete_empty_namespaces(instance.namespace for instance in instances)
+
+    def delete_empty_namespaces(self, namespaces: Iterable[str]) -> None:
+        """Remove each namespace only if nothing else lives in it."""
+        for namespace in dict.fromkeys(namespaces):
+            remaining = self.run(
+                ["kubectl", "get", "all", "--namespace", namespace, "-o", "json"],
+                capture_output=True,
+                check=False,
+            )
+            if remaining.returncode != 0:
+                self.log.info("Namespace %s not found, skipping", namespace)
+            elif json.loads(remaining.stdout or "{}").get("items"):
+                self.log.warning("Namespace %s contains other resources, keeping it", namespace)
+            else:
+                self.run(["kubectl", "delete", "namespace", namespace, "--ignore-not-found=true"])
+                self.log.info("Namespace %s removed", namespace)
+
+    def uninstall_release(self) -> None:
+        namespace = self.namespace
+        release = self.release_name
+        status = self.run(
+            ["helm", "status", release, "--namespace", namespace],
+            capture_output=True,
+            check=False,
+        )
+        if status.returncode == 0:
+            self.run(["helm", "uninstall", release, "--namespace", namespace, "--timeout", "300s"])
+            self.log.info("Helm release %s removed", release)
+        else:
+            self.log.info("Helm release %s not found, skipping", release)
+
+        self.run(
+            [
+                "kubectl",
+                "delete",
+                "clusterrole,clusterrolebinding",
+                chart_fullname(release),
+                "--ignore-not-found=true",
+            ]
+        )
+
+    def cleanup_on_failure(self) -> None:
+        """Remove the releases that failed; the releases installed next to them stay."""
+        if not self.failed_releases:
+            # Failed before any release was installed
+            return
+        self.log.info("Running cleanup after failure: %s", ", ".join(self.failed_releases))
+        failed = [instance for instance in self.instances() if instance.release_name in self.failed_releases]
+        for instance in failed:
+            try:
+                instance.uninstall_release()
+            except PluginError as exc:
+                instance.log.warning("Cleanup of release %s failed: %s", instance.release_name, exc)
+        self.delete_empty_namespaces(instance.namespace for instance in failed)
+
+    def values_cache_file(self, context: InstallContext) -> Optional[Path]:
+        """Rendered-values cache of this cluster and release, inside the plugin state directory.
+
+        The plugin manager sets PLUGIN_STATE_DIR; without it nothing is cached.
+        """
+        state_dir = self.optional("PLUGIN_STATE_DIR")
+        if not state_dir:
+            return None
+        return Path(state_dir) / "values-cache" / f"{context.cluster_name}-{context.release_name}.json"
+
+    def values_variables(self, context: InstallContext) -> Dict[str, str]:
+        """Variables of the values templates: the environment, overridden by the scalar settings (policy -> POLICY)"""
+        variables = dict(self.env)
+        for key, value in self.config.items():
+            if isinstance(value, (str, int, float, bool)):
+                variables[key.upper()] = str(value)
+        variables["DOMAIN_FILTERS"] = ",".join(context.domain_filters)
+        variables["TXT_OWNER_ID"] = context.txt_owner_id
+        if context.aws_region:
+            variables["AWS_REGION"] = context.aws_region
+        return variables
+
+    def prepare_values(self, context: InstallContext) -> str:
+        """Render the provider's values template into the YAML document passed to Helm.
+
+        Repeated reconciles with the same template and inputs reuse the cached
+        document instead of rendering it again.
+        """
+        values_path = context.plugin_dir / "values" / f"{context.dns_provider}.yaml"
+        if not values_path.exists():
+            raise PluginError(f"Values file not found: {values_path}")
+        template = load_values(values_path)
+        variables = self.values_variables(context)
+
+        key = values_cache_key(template, variables, context)
+        cache_file = self.values_cache_file(context)
+        document = read_cached_values(cache_file, key)
+        if document is not None:
+            self.log.info("Reusing rendered Helm values from %s (inputs unchanged)", cache_file)
+        else:
+            values = parse_values(template.render(variables.get), values_path)
+            update_values_for_provider(context, values)
+            ensure_domain_filters(values, context)
+            ensure_txt_settings(values, context)
+            document = yaml.safe_dump(values, sort_keys=False)
+            write_cached_values(cache_file, key, document)
+            self.log.info("Rendered Helm values from %s", values_path)
+
+        self.log.debug("Helm values content:\n%s", document)
+        return document
+
+    def aws_secret_manifest(self, context: InstallContext) -> Optional[Dict[str, Any]]:
+        """Static AWS credentials secret, equivalent to kubectl create secret generic --from-literal."""
+        if context.aws_auth_mode != "static":
+            return None
+
+        credentials = {
+            "aws-access-key-id": self.require("AWS_ACCESS_KEY_ID"),
+            "aws-secret-access-key": self.require("AWS_SECRET_ACCESS_KEY"),
+        }
+        return {
+            "apiVersion": "v1",
+            "kind": "Secret",
+            "metadata": {
+                "name": context.aws_credentials_secret_name,
+                "namespace": context.namespace,
+            },
+            "type": "Opaque",
+            "data": {
+                key: base64.b64encode(value.encode()).decode()
+                for key, value in credentials.items()
+            },
+        }
+
+    def apply_manifests(self, manifests: List[Dict[str, Any]]) -> None:
+        """Apply all manifests with one kubectl call; documents are applied in order."""
+        self.run(["kubectl", "apply", "-f", "-"], input_text=yaml.safe_dump_all(manifests))
+
+    def resolve_chart(self, context: InstallContext) -> List[str]:
+        """Chart arguments for helm upgrade: the cached archive if possible, else the repository chart"""
+        cache_dir = self.optional("CHART_CACHE_DIR")
+        if cache_dir:
+            try:
+                path, pulled = ChartCache(Path(cache_dir)).ensure(
+                    CHART_REPOSITORY, "external-dns", context.plugin_version, self.env
+                )
+                self.log.info(
+                    "%s chart external-dns %s: %s",
+                    "Pulled" if pulled else "Using cached",
+                    context.plugin_version,
+                    path,
+                )
+                return [str(path)]
+            except (ChartCacheError, OSError) as exc:
+                self.log.warning("Chart cache unavailable, using the chart repository: %s", exc)
+
+        self.run(["helm", "repo", "add", "external-dns", CHART_REPOSITORY])
+        self.run(["helm", "repo", "update", "external-dns"])
+        return ["external-dns/external-dns", "--version", context.plugin_version]
+
+    def shared_manifests(
+        self, instances: List["ExternalDnsPlugin"], contexts: List[InstallContext]
+    ) -> List[Dict[str, Any]]:
+        """Namespaces and AWS credentials secrets of all releases, for one kubectl apply."""
+        # The namespaces come first in the stream so the secrets can be created in them
+        manifests = [
+            namespace_manifest(
+                namespace,
+                {
+                    "app.kubernetes.io/managed-by": "plugin-manager",
+                    "app.kubernetes.io/name": "external-dns",
+                },
+            )
+            for namespace in dict.fromkeys(context.namespace for context in contexts)
+        ]
+        secrets: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for instance, context in zip(instances, contexts):
+            secret = instance.aws_secret_manifest(context)
+            if secret is None:
+                continue
+            key = (context.namespace, context.aws_credentials_secret_name)
+            if key in secrets and secrets[key] != secret:
+                raise PluginError(
+                    f"Releases with different AWS credentials share the secret {key[1]}; "
+                    "set aws_credentials_secret_name for each provider"
+                )
+            secrets[key] = secret
+            instance.log.info("Configured AWS credentials secret: %s", context.aws_credentials_secret_name)
+        return manifests + list(secrets.values())
+
+    def install_release(self, context: InstallContext, chart_args: List[str], values_document: str) -> None:
+        self.run(
+            [
+                "helm",
+                "upgrade",
+                "--install",
+                context.release_name,
+                *chart_args,
+                "--namespace",
+                context.namespace,
+                # Values are streamed on stdin; they never touch a shared temp path
+                "--values",
+                "-",
+                "--timeout",
+                "300s",
+                "--wait",
+                "--atomic",
+            ],
+            input_text=values_document,
+        )
+        self.log.info("External DNS Helm release %s applied successfully", context.release_name)
+        self.wait_until_ready(context)
+        self.verify_installation(context)
+        self.print_summary(context)
+
+    def watch_deployment_ready(self, namespace: str, name: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Follow one kubectl watch stream of the deployment until it is ready.
+
+        Returns the ready deployment, or None if the watch ended or timed out first.
+        The deployment status aggregates the readiness of its pods, so watching it
+        alone covers both; kubectl cannot watch several kinds in one stream.
+        """
+        command = [
+            "kubectl",
+            "get",
+            "deployment",
+            name,
+            "--namespace",
+            namespace,
+            "--watch",
+            "--output",
+            "json",
+        ]
+        self.log.debug("Running command: %s", " ".join(command))
+        # stderr goes to a file so stopping the watch never blocks on a pipe
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, env=self.env, stdout=subprocess.PIPE, stderr=stderr)
+            last_progress = None
+            try:
+                for deployment in iter_json_stream(process, time.monotonic() + timeout):
+                    ready, progress = deployment_progress(deployment)
+                    if progress != last_progress:
+                        self.log.info("Deployment %s: %s", name, progress)
+                        last_progress = progress
+                    if ready:
+                        return deployment
+                self.log.warning("Deployment %s not ready: %s", name, last_progress or "no status received")
+                return None
+            finally:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+                stderr.seek(0)
+                message = stderr.read().decode(errors="replace").strip()
+                if message:
+                    self.log.debug("kubectl watch: %s", message)
+
+    def find_pod(self, namespace: str, release_name: str) -> Optional[str]:
+        """Name of a pod of the release, preferring a running one."""
+        result = self.run(
+            ["kubectl", "get", "pods", "-n", namespace, "-l", release_selector(release_name), "-o", "json"],
+            capture_output=True,
+        )
+        pods = json.loads(result.stdout or "{}").get("items", [])
+        pods.sort(key=lambda pod: pod.get("status", {}).get("phase") != "Running")
+        return pods[0]["metadata"]["name"] if pods else None
+
+    def http_probe(self, namespace: str, pod_name: str) -> bool:
+        result = self.run(
+            [
+                "kubectl",
+                "exec",
+                "-n",
+                namespace,
+                pod_name,
+                "--",
+                "wget",
+                "-q",
+                "--spider",
+                "http://localhost:7979/healthz",
+            ],
+            check=False,
+        )
+        return result.returncode == 0
+
+    def wait_until_ready(self, context: InstallContext) -> None:
+        """Wait for the deployment to become ready, probing /healthz only when readiness does not cover it."""
+        deployment = self.watch_deployment_ready(
+            context.namespace, chart_fullname(context.release_name), self.remaining(READY_TIMEOUT_SECONDS)
+        )
+        if deployment is not None and has_readiness_probe(deployment):
+            self.log.info("External DNS is ready (readiness probes passed)")
+            return
+
+        pod_name = self.find_pod(context.namespace, context.release_name)
+        if pod_name and self.http_probe(context.namespace, pod_name):
+            if deployment is None:
+                self.log.warning(
+                    "Deployment not reported ready within %ss, but %s answers on /healthz",
+                    READY_TIMEOUT_SECONDS,
+                    pod_name,
+                )
+            self.log.info("Health endpoint responded successfully")
+            return
+
+        if pod_name:
+            self.run(["kubectl", "logs", "-n", context.namespace, pod_name, "--tail", "10"], check=False)
+        if deployment is None:
+            raise PluginError(
+                f"{context.release_name} did not become ready within {READY_TIMEOUT_SECONDS}s"
+            )
+        self.log.warning("Health endpoint check failed for pod %s", pod_name or "(none found)")
+
+    def verify_installation(self, context: InstallContext) -> None:
+        # One read over every kind; -n only applies to the namespaced ones
+        result = self.run(
+            [
+                "kubectl",
+                "get",
+                ",".join(VERIFY_KINDS),
+                "--namespace",
+                context.namespace,
+                "-l",
+                release_selector(context.release_name),
+                "-o",
+                "json",
+            ],
+            capture_output=True,
+        )
+        items = json.loads(result.stdout or "{}").get("items", [])
+
+        names_by_kind: Dict[str, List[str]] = {}
+        for item in items:
+            names_by_kind.setdefault(item.get("kind", "?"), []).append(
+                item.get("metadata", {}).get("name", "?")
+            )
+        for kind, names in sorted(names_by_kind.items()):
+            self.log.info("  %s: %s", kind, ", ".join(sorted(names)))
+
+        missing = [kind for kind in EXPECTED_KINDS if kind not in names_by_kind]
+        if missing:
+            self.log.warning("Installed resources not found: %s", ", ".join(missing))
+
+    def print_summary(self, context: InstallContext) -> None:
+        self.log.info("Installation summary:")
+        self.log.info("  Release: %s", context.release_name)
+        self.log.info("  Namespace: %s", context.namespace)
+        self.log.info("  Cloud Provider: %s", context.cloud_provider)
+        self.log.info("  DNS Provider: %s", context.dns_provider)
+        if context.aws_auth_mode:
+            self.log.info("  AWS Auth Mode: %s", context.aws_auth_mode)
+            if context.aws_auth_mode == "static":
+                self.log.info(
+                    "  AWS Credentials Secret: %s", context.aws_credentials_secret_name
+                )
+        self.log.info("  Domain Filters: %s", ", ".join(context.domain_filters))
+        self.log.info("  TXT Owner ID: %s", context.txt_owner_id)
+        self.log.info(
+            "Check status with: kubectl get pods -n %s", context.namespace
+        )
+
@@ -52,14 +52,14 @@ prepare_values() {
 install_plugin() {
     log_info "Installing NGINX Ingress Controller..."
     
-    # Add Helm repository
-    add_helm_repo "ingress-nginx" "https://kubernetes.github.io/ingress-nginx" || exit 1
+    # Use the cached chart, or add the Helm repository
+    resolve_helm_chart "ingress-nginx" "https://kubernetes.github.io/ingress-nginx" "ingress-nginx" "4.8.3" || exit 1
     
     # Create namespace with labels
     ensure_namespace "$NAMESPACE" "app.kubernetes.io/managed-by=plugin-manager app.kubernetes.io/name=nginx-ingress" || exit 1
     
     # Install with Helm
-    helm_install_or_upgrade "ingress-nginx" "ingress-nginx/ingress-nginx" "$NAMESPACE" "$TEMP_VALUES_FILE" "4.8.3" 600 || exit 1
+    helm_install_or_upgrade "ingress-nginx" "$HELM_CHART" "$NAMESPACE" "$TEMP_VALUES_FILE" "4.8.3" 600 || exit 1
     
     log_success "NGINX Ingress Controller installed successfully"
 }
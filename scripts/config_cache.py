@@ -0,0 +1,152 @@
+"""
+Shared YAML config loader with a parsed-document cache.
+
+The same config files (config/dev.yaml, config/global/*.yaml,
+plugins-config.yaml, every plugin.yaml, ...) are read by many scripts in a
+single CI job. load_yaml parses each file once with the libyaml CSafeLoader
+when available and keeps the parsed document serialised with marshal:
+
+- in memory for the rest of the process, keyed by path, mtime and size
+- on disk (MSDP_CONFIG_CACHE_DIR, default ~/.cache/msdp-config), keyed by
+  path and validated by mtime/size or, when those changed, by a SHA-256 of
+  the file content, so a fresh checkout of unchanged files still hits.
+
+Every call returns a fresh copy, so callers may mutate the result.
+Documents marshal cannot encode (e.g. YAML timestamps) are only cached in
+memory. A cache file that cannot be decoded (truncated, or written by another
+Python version) counts as a miss. Set MSDP_CONFIG_CACHE=0 to disable the
+on-disk cache.
+
+marshal is not meant for untrusted data: the cache directory must be trusted
+(it is created private to the user) and never shared between users.
+"""
+
+import copy
+import hashlib
+import marshal
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+CACHE_FORMAT = 2
+
+# (mtime_ns, size), marshalled document (None if it cannot be marshalled), parsed document
+_memory: Dict[Path, Tuple[Tuple[int, int], Optional[bytes], Any]] = {}
+_memory_lock = threading.Lock()
+
+
+def cache_dir() -> Optional[Path]:
+    """Directory of the on-disk cache, or None when disabled"""
+    if os.environ.get('MSDP_CONFIG_CACHE', '1') == '0':
+        return None
+    if os.environ.get('MSDP_CONFIG_CACHE_DIR'):
+        return Path(os.environ['MSDP_CONFIG_CACHE_DIR'])
+    return Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'msdp-config'
+
+
+def _cache_file(path: Path) -> Optional[Path]:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    return directory / f"{hashlib.sha256(str(path).encode()).hexdigest()}.marshal"
+
+
+def _read_record(cache_file: Optional[Path]) -> Optional[Dict]:
+    if cache_file is None:
+        return None
+    try:
+        with open(cache_file, 'rb') as f:
+            record = marshal.load(f)
+    except Exception:
+        # Missing, truncated or corrupt: the cache is an optimisation only
+        return None
+    if not isinstance(record, dict) or record.get('format') != CACHE_FORMAT \
+            or not isinstance(record.get('payload'), bytes):
+        return None
+    return record
+
+
+def _write_record(cache_file: Optional[Path], record: Dict) -> None:
+    if cache_file is None:
+        return
+    try:
+        cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            marshal.dump(record, f)
+        os.replace(tmp_file, cache_file)
+    except (OSError, ValueError):
+        # The cache is an optimisation only; never fail a load because of it
+        pass
+
+
+def _encode(data: Any) -> Optional[bytes]:
+    try:
+        return marshal.dumps(data)
+    except ValueError:
+        return None
+
+
+def _fresh_copy(payload: Optional[bytes], data: Any) -> Any:
+    return marshal.loads(payload) if payload is not None else copy.deepcopy(data)
+
+
+def load_yaml(path) -> Any:
+    """Parse a YAML file, reusing a cached parse when the file is unchanged
+
+    Raises FileNotFoundError and yaml.YAMLError like open() + yaml.safe_load.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _memory_lock:
+        entry = _memory.get(path)
+    if entry is not None and entry[0] == stamp:
+        return _fresh_copy(entry[1], entry[2])
+
+    cache_file = _cache_file(path)
+    record = _read_record(cache_file)
+
+    content = None
+    if record is not None and (record['mtime_ns'], record['size']) != stamp:
+        content = path.read_bytes()
+        if record['sha256'] != hashlib.sha256(content).hexdigest():
+            record = None
+
+    payload = None
+    if record is not None:
+        try:
+            data = marshal.loads(record['payload'])
+            payload = record['payload']
+        except (EOFError, ValueError, TypeError):
+            # Truncated, or written by another Python version: parse the file again
+            record = None
+
+    if payload is None:
+        if content is None:
+            content = path.read_bytes()
+        data = yaml.load(content, Loader=SafeLoader)
+        payload = _encode(data)
+    if payload is not None and (record is None or content is not None):
+        _write_record(cache_file, {
+            'format': CACHE_FORMAT,
+            'path': str(path),
+            'mtime_ns': stamp[0],
+            'size': stamp[1],
+            'sha256': record['sha256'] if record is not None else hashlib.sha256(content).hexdigest(),
+            'payload': payload,
+        })
+
+    with _memory_lock:
+        _memory[path] = (stamp, payload, data if payload is None else None)
+    # A decoded or freshly parsed document is not shared, unless only the memory cache keeps it
+    return data if payload is not None else copy.deepcopy(data)
@@ -14,13 +14,14 @@ Examples:
     python3 generate-backend-config.py prod aws vpc
 """
 
-import yaml
 import json
 import hashlib
 import sys
 import os
 from pathlib import Path
 
+from config_cache import load_yaml
+
 class BackendConfigGenerator:
     def __init__(self, config_dir="config"):
         self.config_dir = Path(config_dir)
@@ -31,22 +32,18 @@ class BackendConfigGenerator:
         try:
             # Try new structure first
             if (self.config_dir / "global" / "naming.yaml").exists():
-                with open(self.config_dir / "global" / "naming.yaml") as f:
-                    self.naming = yaml.safe_load(f)
+                self.naming = load_yaml(self.config_dir / "global" / "naming.yaml")
                 
-                with open(self.config_dir / "global" / "accounts.yaml") as f:
-                    self.accounts = yaml.safe_load(f)
+                self.accounts = load_yaml(self.config_dir / "global" / "accounts.yaml")
             else:
                 # Fallback to old structure
                 print("Warning: Using legacy configuration structure")
-                with open(self.config_dir / "global" / "naming.yaml") as f:
-                    self.naming = yaml.safe_load(f)
+                self.naming = load_yaml(self.config_dir / "global" / "naming.yaml")
                 
                 # Create minimal accounts config from old globals.yaml if it exists
                 old_globals_path = Path("infrastructure/config/globals.yaml")
                 if old_globals_path.exists():
-                    with open(old_globals_path) as f:
-                        old_config = yaml.safe_load(f)
+                    old_config = load_yaml(old_globals_path)
                     
                     # Convert old format to new format
                     self.accounts = {
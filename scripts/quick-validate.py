@@ -1,18 +1,18 @@
 #!/usr/bin/env python3
 """Quick validation script for AWS EKS setup"""
 
-import yaml
 import json
 from pathlib import Path
 
+from config_cache import load_yaml
+
 def main():
     print("🚀 Quick AWS EKS Setup Validation")
     print("=" * 40)
     
     # Test YAML parsing
     try:
-        with open('config/dev.yaml', 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml('config/dev.yaml')
         print("✅ YAML configuration is valid")
         
         # Check AWS section
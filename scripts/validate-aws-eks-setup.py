@@ -18,6 +18,8 @@ import yaml
 import json
 from pathlib import Path
 
+from config_cache import load_yaml
+
 def validate_file_exists(file_path, description):
     """Validate that a file exists"""
     if Path(file_path).exists():
@@ -30,8 +32,7 @@ def validate_file_exists(file_path, description):
 def validate_yaml_config(config_path):
     """Validate YAML configuration structure"""
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
         
         print(f"\n📋 Validating configuration: {config_path}")
         
@@ -9,13 +9,14 @@ Usage:
     python3 scripts/validate-complete-setup.py [--fix] [--verbose]
 """
 
-import yaml
 import json
 import sys
 import subprocess
 from pathlib import Path
 from datetime import datetime
 
+from config_cache import load_yaml
+
 class SetupValidator:
     def __init__(self, fix_issues=False, verbose=False):
         self.fix_issues = fix_issues
@@ -97,8 +98,7 @@ class SetupValidator:
         naming_file = Path("config/global/naming.yaml")
         if naming_file.exists():
             try:
-                with open(naming_file) as f:
-                    naming_config = yaml.safe_load(f)
+                naming_config = load_yaml(naming_file)
                 
                 required_keys = [
                     "organization.name",
@@ -126,8 +126,7 @@ class SetupValidator:
         accounts_file = Path("config/global/accounts.yaml")
         if accounts_file.exists():
             try:
-                with open(accounts_file) as f:
-                    accounts_config = yaml.safe_load(f)
+                accounts_config = load_yaml(accounts_file)
                 
                 if "accounts" in accounts_config and "aws" in accounts_config["accounts"]:
                     self.log_success("accounts.yaml has AWS configuration")
@@ -13,6 +13,8 @@ import subprocess
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+from config_cache import load_yaml
+
 class ImplementationValidator:
     def __init__(self, repo_root: str = "."):
         self.repo_root = Path(repo_root)
@@ -53,8 +55,7 @@ class ImplementationValidator:
         """Validate YAML file syntax."""
         try:
             full_path = self.repo_root / file_path
-            with open(full_path, 'r') as f:
-                yaml.safe_load(f)
+            load_yaml(full_path)
             return True, "Valid YAML syntax"
         except yaml.YAMLError as e:
             return False, f"YAML syntax error: {e}"
@@ -65,8 +66,7 @@ class ImplementationValidator:
         """Validate GitHub Actions workflow structure."""
         try:
             full_path = self.repo_root / file_path
-            with open(full_path, 'r') as f:
-                workflow = yaml.safe_load(f)
+            workflow = load_yaml(full_path)
             
             # Check required fields
             required_fields = ['name', 'on', 'jobs']
@@ -117,8 +117,7 @@ class ImplementationValidator:
                 # Check action structure
                 try:
                     full_path = self.repo_root / action_path
-                    with open(full_path, 'r') as f:
-                        action_def = yaml.safe_load(f)
+                    action_def = load_yaml(full_path)
                     
                     has_name = 'name' in action_def
                     has_description = 'description' in action_def
@@ -11,12 +11,13 @@ from pathlib import Path
 
 import yaml
 
+from config_cache import load_yaml
+
 
 def load_yaml_file(file_path):
     """Load and parse YAML file"""
     try:
-        with open(file_path, "r") as f:
-            return yaml.safe_load(f)
+        return load_yaml(file_path)
     except FileNotFoundError:
         print(f"ERROR: Configuration file not found: {file_path}")
         return None